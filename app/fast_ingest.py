@@ -0,0 +1,131 @@
+# app/fast_ingest.py
+"""
+Pydantic-free order ingest for POST /orders/fast.
+Same validation rules and response shape as POST /orders, but the body is parsed
+once with orjson, checked against precomputed lookup tables and encoded straight
+to bytes.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+import orjson
+
+from engine.models import Order, Trade
+
+# order_type -> (price required, trigger_price required)
+_TYPE_RULES = {
+    "market":      (False, False),
+    "limit":       (True,  False),
+    "ioc":         (True,  False),
+    "fok":         (True,  False),
+    "stop_market": (False, True),
+    "stop_limit":  (True,  True),
+    "take_profit": (False, True),
+}
+_SIDES = frozenset(("buy", "sell"))
+_REQUIRED = frozenset(("symbol", "order_type", "side", "quantity"))
+_ALLOWED = _REQUIRED | {"price", "trigger_price", "expire_ts_ns", "owner", "client_order_id"}
+_EXPIRABLE = frozenset(("limit", "stop_limit"))
+
+
+class IngestError(ValueError):
+    """Request rejected by fast-path validation; message is the client-facing detail."""
+
+
+def _dec(v, name: str, positive: bool = True) -> Decimal:
+    if not isinstance(v, str):
+        raise IngestError(f"Invalid {name}")
+    try:
+        d = Decimal(v)
+    except InvalidOperation:
+        raise IngestError(f"Invalid {name}")
+    if not d.is_finite() or (positive and d <= 0):
+        raise IngestError(f"Invalid {name}")
+    return d
+
+
+def parse_order(body: bytes) -> Order:
+    return order_from_dict(parse_object(body))
+
+
+def parse_object(body) -> dict:
+    try:
+        d = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise IngestError("Malformed JSON body")
+    if not isinstance(d, dict):
+        raise IngestError("Body must be a JSON object")
+    return d
+
+
+def order_from_dict(d: dict) -> Order:
+    keys = d.keys()
+    if not _REQUIRED <= keys:
+        raise IngestError(f"Missing field(s): {', '.join(sorted(_REQUIRED - keys))}")
+    if not keys <= _ALLOWED:
+        raise IngestError(f"Unknown field(s): {', '.join(sorted(keys - _ALLOWED))}")
+
+    symbol = d["symbol"]
+    if not isinstance(symbol, str) or not symbol:
+        raise IngestError("Invalid symbol")
+    order_type = d["order_type"]
+    rules = _TYPE_RULES.get(order_type) if isinstance(order_type, str) else None
+    if rules is None:
+        raise IngestError("Invalid order_type")
+    side = d["side"]
+    if not isinstance(side, str) or side not in _SIDES:
+        raise IngestError("Invalid side")
+    qty = _dec(d["quantity"], "quantity")
+
+    need_px, need_trig = rules
+    px = None
+    if need_px:
+        if d.get("price") is None:
+            raise IngestError("price required for this order_type")
+        px = _dec(d["price"], "price")
+    trig = None
+    if need_trig:
+        if d.get("trigger_price") is None:
+            raise IngestError("trigger_price required for this order_type")
+        trig = _dec(d["trigger_price"], "trigger_price", positive=False)
+    expire = d.get("expire_ts_ns")
+    if expire is not None:
+        if order_type not in _EXPIRABLE:
+            raise IngestError("expire_ts_ns only valid for limit / stop_limit")
+        if type(expire) is not int or expire <= 0:
+            raise IngestError("Invalid expire_ts_ns")
+    owner = d.get("owner")
+    if owner is not None and not isinstance(owner, str):
+        raise IngestError("Invalid owner")
+    cid = d.get("client_order_id")
+    if cid is not None and (not isinstance(cid, str) or not 0 < len(cid) <= 64):
+        raise IngestError("Invalid client_order_id")
+
+    return Order(symbol=symbol, order_type=order_type, side=side,
+                 quantity=qty, price=px, trigger_price=trig, expire_ts_ns=expire, owner=owner,
+                 client_order_id=cid)
+
+
+def encode_submit_result(order: Order, trades: List[Trade], rested: Optional[Order]) -> bytes:
+    return orjson.dumps({
+        "order_id": order.order_id,
+        "client_order_id": order.client_order_id,
+        "resting": rested is not None,
+        "resting_order_id": rested.order_id if rested else None,
+        "resting_qty": format(rested.quantity, "f") if rested else None,
+        "trades": [
+            {
+                "trade_id": t.trade_id,
+                "price": format(t.price, "f"),
+                "quantity": format(t.quantity, "f"),
+                "aggressor_side": t.aggressor_side,
+                "maker_order_id": t.maker_order_id,
+                "taker_order_id": t.taker_order_id,
+                "maker_fee": format(t.maker_fee, "f"),
+                "taker_fee": format(t.taker_fee, "f"),
+            } for t in trades
+        ],
+    })
+
+
+def encode_error(detail: str) -> bytes:
+    return orjson.dumps({"detail": detail})
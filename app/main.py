@@ -109,13 +109,24 @@
 
 
 # app/main.py
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Path, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Path, Query, Request, Response
 from pydantic import BaseModel, Field, ConfigDict
 from decimal import Decimal, InvalidOperation
-import orjson
+import asyncio, math, orjson, os, threading, time
 
-from engine.models import Order
+from engine.models import Order, OrderRejected
 from engine.matching_engine import MatchingEngine
+from engine.profiling import StackSampler
+from engine.sessions import SessionRegistry
+from engine.risk import RiskManager
+from engine.settlement import Settlement
+from engine.registry import OrderRegistry
+from engine.shm_book import ShmBookPublisher
+from engine.audit import AuditLog
+from engine.checkpoint import Checkpointer
+from engine.book_store import BookStore
+from engine.admission import AdmissionControl, AdmissionError
+from app.fast_ingest import IngestError, parse_order, parse_object, order_from_dict, encode_submit_result, encode_error
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
@@ -130,10 +141,64 @@ app.add_middleware(
     allow_credentials=False,
 )
 
+class StampArrival:
+    # Pure ASGI: marks when a request reached the app. Admission control measures
+    # queueing delay (event-loop backlog, body read, validation) from this stamp.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["arrived"] = time.perf_counter()
+        return await self.app(scope, receive, send)
+
+app.add_middleware(StampArrival)
+
+def arrived(request: Request) -> float | None:
+    return request.scope.get("state", {}).get("arrived")
+
+def overloaded_headers(e: AdmissionError) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(e.retry_after_s)))}
+
 # Optional: serve your index.html if you want same-origin
 # app.mount("/ui", StaticFiles(directory=".", html=True), name="ui")
 
-engine = MatchingEngine()
+settlement = Settlement.open(os.path.join("state", "ledger.json"))
+# Co-located readers attach with engine.shm_book.ShmBookReader(<name>); off unless BOOK_SHM_NAME is set
+book_shm = ShmBookPublisher(os.environ["BOOK_SHM_NAME"]) if os.environ.get("BOOK_SHM_NAME") else None
+audit = AuditLog(os.path.join("state", "audit"))
+engine = MatchingEngine(risk=RiskManager(), settlement=settlement,  # accounts are opt-in via /admin/accounts
+                        registry=OrderRegistry(), book_shm=book_shm, audit=audit,
+                        # idle books are parked in state/hibernated and reloaded on first use
+                        store=BookStore(os.path.join("state", "hibernated")), max_books=1000,
+                        # per symbol: <= 256 new orders in flight, shed new orders once queueing delay stays > 5 ms
+                        admission=AdmissionControl(),
+                        # cancels / reduce-only amends queue ahead of new orders on the symbol lock
+                        cancel_priority=True,
+                        # whole-book checksum in md / snapshots / saved state; journaled per md seq for engine.replay
+                        checksums=True)
+sessions = SessionRegistry(engine)
+checkpointer = Checkpointer(engine)  # state/orderbook_<symbol>.json every 5 s for changed books
+sampler: StackSampler | None = None
+simulator = None  # engine.whatif.BookSimulator, created on first /quote/batch (NumPy is imported lazily)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    asyncio.create_task(engine.run_expiry())
+    asyncio.create_task(engine.run_call_auctions())
+    asyncio.create_task(settlement.run())
+    asyncio.create_task(settlement.run_checkpoints())
+    asyncio.create_task(checkpointer.run())
+    asyncio.create_task(engine.run_hibernation())
+
+@app.on_event("shutdown")
+async def flush_on_shutdown():
+    while settlement.pending:
+        settlement.drain()
+    settlement.checkpoint()
+    if book_shm is not None:
+        book_shm.close()
+    audit.close()
 
 class OrderIn(BaseModel):
     symbol: str = Field(examples=["BTC-USDT"])
@@ -142,6 +207,9 @@ class OrderIn(BaseModel):
     quantity: str
     price: str | None = None
     trigger_price: str | None = None  # for stop/take-profit
+    expire_ts_ns: int | None = None   # GTD/GTT: unix ns after which the resting remainder is cancelled
+    owner: str | None = None          # account / session id for mass cancel and the kill switch
+    client_order_id: str | None = Field(None, max_length=64)  # idempotency key for retries (per owner)
 
     model_config = ConfigDict(extra="forbid")
 
@@ -176,6 +244,13 @@ class OrderIn(BaseModel):
             except (InvalidOperation, ValueError):
                 raise HTTPException(status_code=422, detail="Invalid trigger_price")
 
+        # expiry only applies to orders that can rest
+        if self.expire_ts_ns is not None:
+            if self.order_type not in ("limit", "stop_limit"):
+                raise HTTPException(status_code=422, detail="expire_ts_ns only valid for limit / stop_limit")
+            if self.expire_ts_ns <= 0:
+                raise HTTPException(status_code=422, detail="Invalid expire_ts_ns")
+
         return Order(
             symbol=self.symbol,
             order_type=self.order_type,  # type: ignore
@@ -183,17 +258,26 @@ class OrderIn(BaseModel):
             quantity=qty,
             price=px,
             trigger_price=trig,
+            expire_ts_ns=self.expire_ts_ns,
+            owner=self.owner,
+            client_order_id=self.client_order_id,
         )
 
 @app.post("/orders")
-async def submit_order(o: OrderIn):
+async def submit_order(o: OrderIn, request: Request):
     order = o.to_order()
-    trades, rested = await engine.submit(order)
+    try:
+        trades, rested = await engine.submit(order, arrived(request))
+    except OrderRejected as e:
+        raise HTTPException(status_code=422, detail=f"Rejected: {e}")
+    except AdmissionError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=overloaded_headers(e))
 
     def ser_decimal(x):
         return format(x, "f") if isinstance(x, Decimal) else x
     return {
         "order_id": order.order_id,
+        "client_order_id": order.client_order_id,
         "resting": rested is not None,
         "resting_order_id": rested.order_id if rested else None,
         "resting_qty": ser_decimal(rested.quantity) if rested else None,
@@ -211,44 +295,391 @@ async def submit_order(o: OrderIn):
         ]
     }
 
+@app.post("/orders/fast")
+async def submit_order_fast(request: Request):
+    # Same contract as POST /orders without pydantic / jsonable_encoder on the hot path
+    try:
+        order = parse_order(await request.body())
+    except IngestError as e:
+        return Response(content=encode_error(str(e)), status_code=422, media_type="application/json")
+    try:
+        trades, rested = await engine.submit(order, arrived(request))
+    except OrderRejected as e:
+        return Response(content=encode_error(f"Rejected: {e}"), status_code=422, media_type="application/json")
+    except AdmissionError as e:
+        return Response(content=encode_error(str(e)), status_code=503, media_type="application/json",
+                        headers=overloaded_headers(e))
+    return Response(content=encode_submit_result(order, trades, rested), media_type="application/json")
+
 @app.post("/orders/{order_id}/cancel")
-async def cancel_order(order_id: str, symbol: str = Query(...)):
-    ok = await engine.cancel(symbol, order_id)
+async def cancel_order(order_id: str, request: Request, symbol: str = Query(...)):
+    try:
+        ok = await engine.cancel(symbol, order_id, arrived=arrived(request))
+    except AdmissionError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=overloaded_headers(e))
     return {"ok": ok}
 
+@app.post("/orders/{order_id}/amend")
+async def amend_order(order_id: str, request: Request, symbol: str = Query(...),
+                      quantity: str = Query(..., description="new remaining quantity; must be smaller")):
+    try:
+        qty = Decimal(quantity)
+    except InvalidOperation:
+        qty = None
+    if qty is None or not qty.is_finite():
+        raise HTTPException(status_code=422, detail="Invalid quantity")
+    try:
+        ok = await engine.amend(symbol, order_id, qty, arrived=arrived(request))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=overloaded_headers(e))
+    return {"ok": ok}
+
+@app.post("/orders/mass_cancel")
+async def mass_cancel(
+    symbol: str = Query(...),
+    side: str | None = Query(None, pattern="^(buy|sell)$"),
+    min_price: str | None = Query(None),
+    max_price: str | None = Query(None),
+    owner: str | None = Query(None),
+):
+    price_range = None
+    if min_price is not None or max_price is not None:
+        try:
+            price_range = (None if min_price is None else Decimal(min_price),
+                           None if max_price is None else Decimal(max_price))
+        except InvalidOperation:
+            raise HTTPException(status_code=422, detail="Invalid price range")
+    ids = await engine.mass_cancel(symbol, side, price_range, owner)
+    return {"ok": True, "cancelled": len(ids), "order_ids": ids}
+
+@app.get("/orders")
+async def open_orders(
+    owner: str | None = Query(None, description="omit for anonymous orders"),
+    symbol: str | None = Query(None),
+    cursor: int = Query(0, ge=0, description="`next` from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    page, nxt = engine.registry.open_orders(owner, symbol, cursor, limit)
+    return {"owner": owner, "orders": [s.to_json() for s in page], "next": nxt}
+
+@app.get("/orders/{order_id}")
+async def order_status(order_id: str):
+    s = engine.registry.get(order_id)
+    if s is None:
+        raise HTTPException(status_code=404, detail="Unknown order (or evicted from the archive)")
+    return s.to_json()
+
+@app.get("/trades")
+async def recent_trades(
+    symbol: str = Query(...),
+    since: int | None = Query(None, description="only trades after this ts_ns (time filter)"),
+    limit: int = Query(500, ge=1, le=10_000),
+    after_seq: int | None = Query(None, ge=0, description="seq of the last trade seen; pages without gaps"),
+):
+    return {"symbol": symbol, "trades": engine.recent_trades(symbol, since, limit, after_seq)}
+
+@app.get("/quote")
+async def quote(
+    symbol: str = Query(...),
+    side: str = Query(..., pattern="^(buy|sell)$"),
+    qty: str = Query(...),
+):
+    try:
+        q = Decimal(qty)
+        if q <= 0:
+            raise ValueError("qty must be positive")
+    except (InvalidOperation, ValueError):
+        raise HTTPException(status_code=422, detail="Invalid qty")
+    return engine.quote(symbol, side, q)
+
+class WhatIfIn(BaseModel):
+    symbol: str = Field(examples=["BTC-USDT"])
+    side: str = Field(pattern="^(buy|sell)$")
+    quantities: list[float] = Field(min_length=1, max_length=100_000)
+    limit_prices: list[float | None] | None = None  # per quantity; null = market
+
+    model_config = ConfigDict(extra="forbid")
+
+@app.post("/quote/batch")
+async def quote_batch(w: WhatIfIn):
+    # vectorized what-if: each hypothetical order is swept alone against the current book
+    global simulator
+    if simulator is None:
+        from engine.whatif import BookSimulator
+        simulator = BookSimulator(engine)
+    # null = market; a NaN / inf / non-positive value from the client is rejected, not read as one
+    if w.limit_prices is not None and any(p is not None and not (math.isfinite(p) and p > 0) for p in w.limit_prices):
+        raise HTTPException(status_code=422, detail="Invalid limit price")
+    lim = None if w.limit_prices is None else [float("nan") if p is None else p for p in w.limit_prices]
+    try:
+        res = simulator.simulate(w.symbol, w.side, w.quantities, lim)
+    except ValueError as e:  # non-finite / non-positive quantities, mismatched lengths
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"symbol": w.symbol, "side": w.side, **res.to_json()}
+
 @app.post("/admin/save")
 async def save_state(symbol: str = Query(...)):
-    ok = await engine.load_state(symbol)
+    ok = await checkpointer.checkpoint(symbol)
     return {"ok": ok}
 
 @app.post("/admin/load")
 async def load_state(symbol: str = Query(...)):
-    ok = engine.load_state(symbol)
+    try:
+        ok = await engine.load_state(symbol)
+    except ValueError as e:  # checksum mismatch: the file does not hold the book it claims
+        raise HTTPException(status_code=409, detail=str(e))
     return {"ok": ok}
 
+@app.get("/accounts/{owner}")
+async def get_account(owner: str):
+    a = engine.risk.accounts.get(owner)
+    if a is None:
+        raise HTTPException(status_code=404, detail="Unknown account")
+    return a.to_json()
+
+@app.post("/admin/accounts/{owner}")
+async def configure_account(
+    owner: str,
+    balance: str | None = Query(None),
+    max_order_qty: str | None = Query(None),
+    max_open_notional: str | None = Query(None),
+):
+    try:
+        vals = [None if v is None else Decimal(v) for v in (balance, max_order_qty, max_open_notional)]
+    except InvalidOperation:
+        raise HTTPException(status_code=422, detail="Invalid amount")
+    return engine.risk.configure(owner, *vals).to_json()
+
+@app.get("/ledger/{owner}")
+async def ledger_balances(owner: str):
+    return {
+        "owner": owner,
+        "balances": settlement.ledger.balances_of(owner),
+        "settled_trades": settlement.ledger.settled,
+        "pending_trades": settlement.pending,
+    }
+
+@app.get("/fees")
+async def effective_fees(symbol: str = Query(...), owner: str | None = Query(None)):
+    return {"symbol": symbol, "owner": owner, **engine.fees.rate(owner, symbol).to_json()}
+
+@app.post("/admin/fees")
+async def set_fees(
+    maker_bps: int = Query(..., description="negative = maker rebate"),
+    taker_bps: int = Query(..., ge=0),
+    owner: str | None = Query(None),
+    symbol: str | None = Query(None),
+):
+    if (owner is None) == (symbol is None):
+        raise HTTPException(status_code=422, detail="give exactly one of owner / symbol")
+    if owner is not None:
+        engine.fees.set_account(owner, maker_bps, taker_bps)
+    else:
+        engine.fees.set_symbol(symbol, maker_bps, taker_bps)
+    return {"ok": True}
+
+@app.get("/auction")
+async def auction_indicative(symbol: str = Query(...)):
+    return engine.indicative(symbol)
+
+@app.post("/admin/auction/start")
+async def auction_start(symbol: str = Query(...), periodic: bool = Query(False)):
+    engine.start_auction(symbol, periodic)
+    return {"ok": True, "symbol": symbol, "periodic": periodic}
+
+@app.post("/admin/auction/uncross")
+async def auction_uncross(symbol: str = Query(...)):
+    trades = await engine.uncross(symbol)
+    return {
+        "ok": True,
+        "symbol": symbol,
+        "price": format(trades[0].price, "f") if trades else None,
+        "volume": format(sum(t.quantity for t in trades), "f"),
+        "trades": len(trades),
+        "in_auction": symbol in engine.auctions,
+    }
+
+@app.get("/admin/books/{symbol}/health")
+async def book_health(symbol: str):
+    h = engine.book_health(symbol)
+    if h is None:
+        raise HTTPException(status_code=404, detail="Book not resident (unknown or hibernated)")
+    return h
+
+@app.get("/admin/admission")
+async def admission_stats(symbol: str | None = Query(None)):
+    # per symbol: in-flight depth, shedding state, shed counters, recent queue-wait percentiles
+    return engine.admission.stats(symbol)
+
+@app.get("/admin/lock_waits")
+async def lock_waits():
+    # symbol-lock waits of submits vs cancels / amends (the cancel lane jumps the queue)
+    return engine.lock_wait_stats()
+
+@app.get("/admin/audit")
+async def audit_stats():
+    return {
+        "queued": audit.queued,
+        "records_written": audit.records_written,
+        "bytes_written": audit.bytes_written,
+        "dropped": audit.dropped,
+        "rotations": audit.rotations,
+    }
+
+@app.post("/admin/kill")
+async def kill_switch(owner: str = Query(...)):
+    # cancels every resting and trigger order of `owner` across all symbols
+    by_symbol = await engine.cancel_owner(owner)
+    return {"ok": True, "cancelled": sum(map(len, by_symbol.values())), "by_symbol": by_symbol}
+
+@app.post("/admin/profile/start")
+async def profile_start(
+    interval_ms: float = Query(5.0, gt=0),
+    duration_s: float | None = Query(60.0, gt=0, description="auto-stop after this long; collect with /stop"),
+):
+    # Samples the event-loop thread (this handler runs on it)
+    global sampler
+    if sampler is not None and sampler.running:
+        raise HTTPException(status_code=409, detail="profiler already running")
+    sampler = StackSampler(threading.get_ident(), interval_ms / 1000)
+    sampler.start(duration_s)
+    return {"ok": True, "interval_ms": interval_ms, "duration_s": duration_s}
+
+@app.post("/admin/profile/stop")
+async def profile_stop():
+    global sampler
+    if sampler is None:
+        raise HTTPException(status_code=409, detail="profiler not started")
+    s, sampler = sampler, None
+    s.stop()
+    path = s.write_collapsed(os.path.join(engine.state_dir, "profiles", f"loop-{s.started_ns}.collapsed"))
+    return {
+        "ok": True,
+        "path": path,
+        "samples": s.samples,
+        "window_s": (s.stopped_ns - s.started_ns) / 1e9,
+        "top": [{"frame": f, "samples": n} for f, n in s.top(15)],
+    }
+
+# `encoding=binary` switches a feed to the compact frames of engine/md_codec.py
+# (decode with engine.md_codec.decode); every update is encoded once per encoding.
+
+async def send_binary(ws: WebSocket, msg):
+    # updates with a value beyond the int64 fixed-point range go out as a JSON text frame
+    frame = msg.binary()
+    if frame is None:
+        await ws.send_text(msg.json_text())
+    else:
+        await ws.send_bytes(frame)
+
 @app.websocket("/ws/marketdata")
-async def ws_marketdata(ws: WebSocket, symbol: str):
+async def ws_marketdata(ws: WebSocket, symbol: str, encoding: str = "json"):
+    if encoding not in ("json", "binary"):
+        await ws.close(code=1008)
+        return
     await ws.accept()
     q = await engine.md_pub.subscribe(f"md:{symbol}")
     try:
+        if encoding == "binary":
+            await send_binary(ws, engine.md_snapshot(symbol))
+            while True:
+                await send_binary(ws, await q.get())
         await ws.send_text(orjson.dumps(engine.snapshot(symbol)).decode())
         while True:
             msg = await q.get()
-            await ws.send_text(orjson.dumps(msg).decode())
+            await ws.send_text(msg.json_text())
     except WebSocketDisconnect:
         pass
     finally:
         await engine.md_pub.unsubscribe(f"md:{symbol}", q)
 
 @app.websocket("/ws/trades")
-async def ws_trades(ws: WebSocket, symbol: str):
+async def ws_trades(ws: WebSocket, symbol: str, encoding: str = "json"):
+    if encoding not in ("json", "binary"):
+        await ws.close(code=1008)
+        return
     await ws.accept()
     q = await engine.trades_pub.subscribe(f"trades:{symbol}")
     try:
+        if encoding == "binary":
+            while True:
+                await send_binary(ws, await q.get())
         while True:
             msg = await q.get()
-            await ws.send_text(orjson.dumps(msg).decode())
+            await ws.send_text(msg.json_text())
     except WebSocketDisconnect:
         pass
     finally:
         await engine.trades_pub.unsubscribe(f"trades:{symbol}", q)
+
+@app.websocket("/ws/orders")
+async def ws_orders(ws: WebSocket, owner: str, cancel_on_disconnect: bool = True):
+    # Order entry session. Messages (JSON text):
+    #   {"op": "new", <POST /orders/fast body>}  -> submit result
+    #   {"op": "cancel", "symbol": ..., "order_id": ...}  -> {"op": "cancel", "order_id", "ok"}
+    #   {"op": "amend", "symbol": ..., "order_id": ..., "quantity": "<smaller>"}  -> {"op": "amend", "order_id", "ok"}
+    # Orders are stamped with the session owner; with cancel_on_disconnect, dropping the
+    # owner's last session pulls all of its resting and trigger orders.
+    await ws.accept()
+    session = sessions.open(owner, cancel_on_disconnect)
+    try:
+        while True:
+            raw = await ws.receive_text()
+            t_in = time.perf_counter()
+            try:
+                d = parse_object(raw)
+                op = d.pop("op", "new")
+                if op == "new":
+                    if d.setdefault("owner", owner) != owner:
+                        raise IngestError("owner does not match session")
+                    order = order_from_dict(d)
+                    try:
+                        trades, rested = await engine.submit(order, t_in)
+                    except OrderRejected as e:
+                        raise IngestError(f"Rejected: {e}")
+                    except AdmissionError as e:
+                        raise IngestError(str(e))
+                    session.orders_sent += 1
+                    await ws.send_text(encode_submit_result(order, trades, rested).decode())
+                elif op == "cancel":
+                    symbol, order_id = d.get("symbol"), d.get("order_id")
+                    if not isinstance(symbol, str) or not isinstance(order_id, str):
+                        raise IngestError("cancel needs symbol and order_id")
+                    try:
+                        ok = await engine.cancel(symbol, order_id, owner, t_in)
+                    except AdmissionError as e:
+                        raise IngestError(str(e))
+                    await ws.send_text(orjson.dumps({"op": "cancel", "order_id": order_id, "ok": ok}).decode())
+                elif op == "amend":
+                    symbol, order_id = d.get("symbol"), d.get("order_id")
+                    if not isinstance(symbol, str) or not isinstance(order_id, str):
+                        raise IngestError("amend needs symbol and order_id")
+                    try:
+                        qty = Decimal(str(d.get("quantity")))
+                    except InvalidOperation:
+                        qty = None
+                    if qty is None or not qty.is_finite():
+                        raise IngestError("Invalid quantity")
+                    try:
+                        ok = await engine.amend(symbol, order_id, qty, owner, t_in)
+                    except ValueError as e:
+                        raise IngestError(str(e))
+                    except AdmissionError as e:
+                        raise IngestError(str(e))
+                    await ws.send_text(orjson.dumps({"op": "amend", "order_id": order_id, "ok": ok}).decode())
+                else:
+                    raise IngestError("Invalid op")
+            except IngestError as e:
+                await ws.send_text(encode_error(str(e)).decode())
+            except WebSocketDisconnect:
+                raise
+            except Exception:
+                # a bad frame must not end the session (and trigger cancel-on-disconnect)
+                session.errors += 1
+                await ws.send_text(encode_error("Internal error").decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await sessions.close(session)
@@ -0,0 +1,110 @@
+# engine/admission.py
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Optional
+import time
+
+
+class AdmissionError(Exception):
+    """Request shed under overload; message is the client-facing reason."""
+    def __init__(self, reason: str, retry_after_s: float):
+        super().__init__(reason)
+        self.retry_after_s = retry_after_s
+
+
+def wait_summary(waits) -> dict:
+    """count / mean / p50 / p99 / max in µs of a window of waits given in seconds."""
+    w = sorted(waits)
+    n = len(w)
+    if not n:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    return {"count": n, "mean": sum(w) / n * 1e6, "p50": w[n // 2] * 1e6,
+            "p99": w[min(n - 1, int(n * 0.99))] * 1e6, "max": w[-1] * 1e6}
+
+
+class _SymbolQueue:
+    __slots__ = ("depth", "above_since", "admitted", "shed_full", "shed_delay", "waits")
+
+    def __init__(self, window: int):
+        self.depth = 0  # admitted and not finished (waiting for or holding the symbol lock)
+        self.above_since: Optional[float] = None  # since when every request waited longer than the target
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_delay = 0
+        self.waits: deque = deque(maxlen=window)  # recent queue waits, seconds
+
+
+class AdmissionControl:
+    """
+    Per-symbol ingress limits for submits and cancels.
+
+    Queue wait is measured from `arrived` (a `time.perf_counter()` stamp taken when the
+    request reached the process) to admission, so it covers event-loop backlog and body
+    parsing, not just the symbol lock. Two rules, both per symbol:
+    - depth: at most `max_depth` new orders in flight; cancels get `cancel_headroom` times that
+    - delay (CoDel-style): once every request has waited longer than `target_delay_s` for
+      `interval_s`, new orders that waited longer than the target are shed until one gets
+      through under it. Cancels are never shed for delay: they shrink the book and the load.
+    Shedding raises `AdmissionError` before the order touches risk, the registry or the book.
+    """
+    def __init__(self, max_depth: int = 256, target_delay_s: float = 0.005, interval_s: float = 0.1,
+                 cancel_headroom: float = 4.0, window: int = 1024):
+        self.max_depth = max_depth
+        self.target_delay_s = target_delay_s
+        self.interval_s = interval_s
+        self.cancel_depth = int(max_depth * cancel_headroom)
+        self.window = window
+        self.queues: Dict[str, _SymbolQueue] = {}
+
+    def admit(self, symbol: str, cancel: bool = False, arrived: Optional[float] = None):
+        """Count a request in for `symbol` or raise AdmissionError; pair with `done` when admitted."""
+        q = self.queues.get(symbol)
+        if q is None:
+            q = self.queues[symbol] = _SymbolQueue(self.window)
+        now = time.perf_counter()
+        wait = now - arrived if arrived is not None else 0.0
+        q.waits.append(wait)
+        if wait > self.target_delay_s:
+            if q.above_since is None:
+                q.above_since = now
+        else:
+            q.above_since = None
+        if cancel:
+            if q.depth >= self.cancel_depth:
+                q.shed_full += 1
+                raise AdmissionError(f"Overloaded: {q.depth} requests queued for {symbol}", self.interval_s)
+        elif q.depth >= self.max_depth:
+            q.shed_full += 1
+            raise AdmissionError(f"Overloaded: {q.depth} requests queued for {symbol}", self.interval_s)
+        elif q.above_since is not None and now - q.above_since >= self.interval_s:
+            q.shed_delay += 1
+            raise AdmissionError(f"Overloaded: queueing delay {wait * 1e3:.1f} ms on {symbol}", self.interval_s)
+        q.depth += 1
+        q.admitted += 1
+
+    def done(self, symbol: str):
+        self.queues[symbol].depth -= 1
+
+    def forget(self, symbol: str) -> bool:
+        """Drop `symbol`'s queue state (counters included); False, keeping it, while requests are in flight."""
+        q = self.queues.get(symbol)
+        if q is not None and q.depth:
+            return False
+        self.queues.pop(symbol, None)
+        return True
+
+    def stats(self, symbol: Optional[str] = None) -> Dict[str, dict]:
+        """Per symbol: depth, counters and recent queue-wait percentiles (µs)."""
+        out = {}
+        for s, q in self.queues.items():
+            if symbol is not None and s != symbol:
+                continue
+            out[s] = {
+                "depth": q.depth,
+                "shedding": q.above_since is not None and time.perf_counter() - q.above_since >= self.interval_s,
+                "admitted": q.admitted,
+                "shed_full": q.shed_full,
+                "shed_delay": q.shed_delay,
+                "wait_us": wait_summary(q.waits),
+            }
+        return out
@@ -0,0 +1,101 @@
+# engine/auction.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import chain
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from .models import Order
+
+ZERO = Decimal("0")
+_INT64_SAFE = 1 << 62
+
+Fill = Tuple[Order, Decimal]
+
+
+@dataclass
+class AuctionResult:
+    price: Optional[Decimal]  # None = nothing crosses
+    volume: Decimal = ZERO
+    imbalance: Decimal = ZERO  # |demand - supply| at `price`
+    buy_fills: List[Fill] = field(default_factory=list)
+    sell_fills: List[Fill] = field(default_factory=list)
+
+
+def _scale(orders: Sequence[Order]) -> int:
+    # decimal places needed to express every quantity as an integer
+    return max(0, max(-o.quantity.as_tuple().exponent for o in orders))
+
+
+def uncross(buys: Sequence[Order], sells: Sequence[Order],
+            reference: Optional[Decimal] = None) -> AuctionResult:
+    """
+    Single-price call auction over limit (price set) and market (price None) orders.
+
+    Demand/supply curves are built once over the distinct limit prices with NumPy
+    (quantities as scaled integers, so the arithmetic is exact); the clearing price
+    maximizes executable volume, then minimizes imbalance, then sits closest to
+    `reference` (else the middle candidate). Fills are allocated in price-time priority.
+    """
+    if not buys or not sells:
+        return AuctionResult(None)
+    prices = sorted({o.price for o in chain(buys, sells) if o.price is not None})
+    if not prices:
+        if reference is None:
+            return AuctionResult(None)  # market vs market: no price discovery
+        prices = [reference]
+    idx = {p: i for i, p in enumerate(prices)}
+    k = _scale(list(chain(buys, sells)))
+
+    def ints(orders):
+        return [int(o.quantity.scaleb(k)) for o in orders]
+    bq, sq = ints(buys), ints(sells)
+    # int64 curves unless the totals could overflow; then exact Python ints
+    dtype = np.int64 if max(sum(bq), sum(sq)) < _INT64_SAFE else object
+
+    def curve(orders, q):
+        lvl = np.zeros(len(prices), dtype=dtype)
+        at = [(idx[o.price], n) for o, n in zip(orders, q) if o.price is not None]
+        if at:
+            i, n = zip(*at)
+            np.add.at(lvl, np.array(i, dtype=np.intp), np.array(n, dtype=dtype))
+        return lvl, sum(n for o, n in zip(orders, q) if o.price is None)
+
+    b_lvl, b_mkt = curve(buys, bq)
+    s_lvl, s_mkt = curve(sells, sq)
+    demand = b_lvl[::-1].cumsum()[::-1] + b_mkt  # buy qty willing to pay >= p
+    supply = s_lvl.cumsum() + s_mkt              # sell qty willing to take <= p
+    vol = np.minimum(demand, supply)
+    best = vol.max()
+    if best <= 0:
+        return AuctionResult(None)
+    cand = np.flatnonzero(vol == best)
+    imb = np.abs(demand[cand] - supply[cand])
+    cand = cand[imb == imb.min()]
+    if len(cand) > 1 and reference is not None:
+        i = int(min(cand, key=lambda c: abs(prices[c] - reference)))
+    else:
+        i = int(cand[(len(cand) - 1) // 2])
+    px = prices[i]
+
+    def to_dec(n) -> Decimal:
+        return Decimal(int(n)).scaleb(-k)
+
+    def allocate(orders, q, eligible, sort_key) -> List[Fill]:
+        left = int(best)
+        out: List[Fill] = []
+        for o, n in sorted(((o, n) for o, n in zip(orders, q) if eligible(o)), key=sort_key):
+            if left <= 0:
+                break
+            take = min(n, left)
+            left -= take
+            out.append((o, to_dec(take)))
+        return out
+
+    # market orders first, then best price, then time
+    buy_fills = allocate(buys, bq, lambda o: o.price is None or o.price >= px,
+                         lambda on: (on[0].price is not None, -(on[0].price or ZERO), on[0].ts_ns))
+    sell_fills = allocate(sells, sq, lambda o: o.price is None or o.price <= px,
+                          lambda on: (on[0].price is not None, on[0].price or ZERO, on[0].ts_ns))
+    return AuctionResult(px, to_dec(best), to_dec(abs(demand[i] - supply[i])), buy_fills, sell_fills)
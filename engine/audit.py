@@ -0,0 +1,206 @@
+# engine/audit.py
+from __future__ import annotations
+from collections import deque
+from decimal import Decimal
+from typing import Any, Iterator, Optional
+import gzip, os, shutil, struct, threading, time
+import orjson
+
+from .models import Order, Trade
+
+_LEN = struct.Struct("<I")
+
+
+def _default(x):
+    if isinstance(x, Decimal):
+        return format(x, "f")
+    raise TypeError
+
+
+class AuditLog:
+    """
+    Drop-copy of every order, reject, cancel, amend, trigger and trade, plus auction
+    phases and (with book checksums on) the checksum behind each md seq, which is what
+    `engine.replay` verifies a replay against.
+    The engine only appends (kind, ts_ns, payload) tuples to a deque (atomic under the
+    GIL, no lock, never blocks); a daemon thread serializes them with orjson and writes
+    u32-length-prefixed records in `batch_bytes` chunks. The active segment
+    `audit-<start_ns>.log` is rotated by size or age and gzipped in another thread.
+    If the writer falls `max_queue` records behind, new records are dropped and counted
+    rather than stalling matching.
+    """
+    def __init__(self, directory: str = os.path.join("state", "audit"), rotate_bytes: int = 64 << 20,
+                 rotate_s: float = 3600.0, batch_bytes: int = 1 << 20, flush_interval_s: float = 0.05,
+                 max_queue: Optional[int] = 1_000_000, compress: bool = True):
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.rotate_ns = int(rotate_s * 1e9)
+        self.batch_bytes = batch_bytes
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        self.compress = compress
+        self.q: deque = deque()
+        self.records_written = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._file = None
+        self._path: Optional[str] = None
+        self._opened_ns = 0
+        self._size = 0
+        self._stop = threading.Event()
+        self._compressors: list = []
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def queued(self) -> int:
+        return len(self.q)
+
+    # ---------- Engine side (event-loop thread) ----------
+
+    def _put(self, kind: str, payload: Any):
+        q = self.q
+        if self.max_queue is not None and len(q) >= self.max_queue:
+            self.dropped += 1
+            return
+        q.append((kind, time.time_ns(), payload))
+
+    def order(self, o: Order):
+        self._put("order", o)  # submitted orders are never mutated by the engine
+
+    def reject(self, o: Order, reason: str):
+        self._put("reject", (o, reason))
+
+    def cancel(self, symbol: str, order_id: str, reason: str = "cancelled"):
+        self._put("cancel", (symbol, order_id, reason))
+
+    def amend(self, symbol: str, order_id: str, quantity: Decimal):
+        self._put("amend", (symbol, order_id, quantity))
+
+    def trigger(self, parent: Order, child_order_id: str):
+        self._put("trigger", (parent.symbol, parent.order_id, child_order_id))
+
+    def trade(self, t: Trade):
+        self._put("trade", t)
+
+    def auction_start(self, symbol: str, periodic: bool):
+        self._put("auction_start", (symbol, periodic))
+
+    def uncross(self, symbol: str, reference: Optional[Decimal]):
+        self._put("uncross", (symbol, reference))
+
+    def book(self, symbol: str, seq: int, checksum: int):
+        self._put("book", (symbol, seq, checksum))
+
+    # ---------- Writer thread ----------
+
+    @staticmethod
+    def _record(kind: str, ts: int, p: Any) -> dict:
+        if kind == "order":
+            return {"type": kind, "ts_ns": ts, "order": p.to_json()}
+        if kind == "reject":
+            return {"type": kind, "ts_ns": ts, "order": p[0].to_json(), "reason": p[1]}
+        if kind == "cancel":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "order_id": p[1], "reason": p[2]}
+        if kind == "amend":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "order_id": p[1], "quantity": p[2]}
+        if kind == "book":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "seq": p[1], "checksum": p[2]}
+        if kind == "auction_start":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "periodic": p[1]}
+        if kind == "uncross":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "reference": p[1]}
+        if kind == "trigger":
+            return {"type": kind, "ts_ns": ts, "symbol": p[0], "order_id": p[1], "child_order_id": p[2]}
+        d = p.__dict__.copy()  # trades keep their own ts_ns
+        d["type"] = "trade"
+        return d
+
+    def _open(self):
+        self._opened_ns = max(time.time_ns(), self._opened_ns + 1)  # unique segment names
+        self._path = os.path.join(self.directory, f"audit-{self._opened_ns}.log")
+        self._file = open(self._path, "ab", buffering=self.batch_bytes)
+        self._size = 0
+
+    def _rotate(self):
+        self._file.close()
+        path, self._file = self._path, None
+        self.rotations += 1
+        if self.compress:
+            t = threading.Thread(target=_gzip, args=(path,), name="audit-gzip", daemon=True)
+            t.start()
+            self._compressors = [c for c in self._compressors if c.is_alive()] + [t]
+
+    def _drain(self) -> int:
+        q, pack, dumps, rec = self.q, _LEN.pack, orjson.dumps, self._record
+        buf = bytearray()
+        n = 0
+        while q and len(buf) < self.batch_bytes:
+            body = dumps(rec(*q.popleft()), default=_default)
+            buf += pack(len(body))
+            buf += body
+            n += 1
+        if n:
+            if self._file is None:
+                self._open()
+            self._file.write(buf)
+            self._size += len(buf)
+            self.bytes_written += len(buf)
+            self.records_written += n
+        return n
+
+    def _run(self):
+        while True:
+            stopping = self._stop.wait(self.flush_interval_s)
+            while self._drain():
+                if self._size >= self.rotate_bytes:
+                    self._rotate()
+            if self._file is not None:
+                self._file.flush()
+                if time.time_ns() - self._opened_ns >= self.rotate_ns:
+                    self._rotate()
+            if stopping:
+                return
+
+    def close(self):
+        """Write everything queued, close (and compress) the active segment."""
+        self._stop.set()
+        self._thread.join()
+        if self._file is not None:
+            self._rotate()
+        for t in self._compressors:
+            t.join()
+
+
+def _gzip(path: str):
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.remove(path)
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Records of one segment (.log or .log.gz) in write order; stops at a torn tail."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        while True:
+            head = f.read(4)
+            if len(head) < 4:
+                return
+            (n,) = _LEN.unpack(head)
+            body = f.read(n)
+            if len(body) < n:
+                return
+            yield orjson.loads(body)
+
+
+def segments(directory: str) -> list:
+    """Segment paths oldest first (names sort by start time)."""
+    found = {}
+    for n in os.listdir(directory):
+        if n.startswith("audit-") and n.endswith((".log", ".log.gz")):
+            start = int(n[6:].split(".")[0])
+            if n.endswith(".log") or start not in found:  # .gz may still be being written
+                found[start] = n
+    return [os.path.join(directory, found[k]) for k in sorted(found)]
@@ -0,0 +1,70 @@
+# engine/book_store.py
+from __future__ import annotations
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from urllib.parse import quote, unquote
+import os
+import orjson
+
+from .models import Order
+
+
+def _row(o: Order) -> list:
+    def sd(x):
+        return None if x is None else str(x)
+    return [o.order_type, o.side, str(o.quantity), sd(o.price), sd(o.trigger_price),
+            o.expire_ts_ns, o.owner, o.client_order_id, o.order_id, o.ts_ns]
+
+
+def _order(symbol: str, r: list) -> Order:
+    def dec(x):
+        return None if x is None else Decimal(x)
+    return Order(symbol=symbol, order_type=r[0], side=r[1], quantity=Decimal(r[2]), price=dec(r[3]),
+                 trigger_price=dec(r[4]), expire_ts_ns=r[5], owner=r[6], client_order_id=r[7],
+                 order_id=r[8], ts_ns=r[9])
+
+
+class BookStore:
+    """
+    Snapshot store for hibernated books: one orjson file per symbol holding the resting
+    orders (FIFO within each level) and pending triggers as positional rows, plus the tail
+    of its trade tape and its md seq so both feeds carry on where they stopped.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.directory, quote(symbol, safe="") + ".book")
+
+    def symbols(self) -> List[str]:
+        return [unquote(n[:-5]) for n in os.listdir(self.directory) if n.endswith(".book")]
+
+    def save(self, symbol: str, orders: List[Order], triggers: List[Order],
+             tape: Optional[tuple] = None, md_seq: int = 0):
+        """`tape` is `TradeTape.release` output: (total, last_ts, rows)."""
+        d = {"orders": [_row(o) for o in orders], "triggers": [_row(o) for o in triggers], "md_seq": md_seq}
+        if tape is not None:
+            total, last_ts, rows = tape
+            d["tape"] = [total, last_ts, [[ts, side, str(p), str(q), tid, m, k] for ts, side, p, q, tid, m, k in rows]]
+        path = self._path(symbol)
+        with open(path + ".tmp", "wb") as f:
+            f.write(orjson.dumps(d))
+        os.replace(path + ".tmp", path)
+
+    def load(self, symbol: str) -> Tuple[List[Order], List[Order], Optional[tuple], int]:
+        """(orders, triggers, tape or None, md_seq); files from before the tape was saved load with none."""
+        with open(self._path(symbol), "rb") as f:
+            d = orjson.loads(f.read())
+        tape = d.get("tape")
+        if tape is not None:
+            total, last_ts, rows = tape
+            tape = (total, last_ts, [(ts, side, Decimal(p), Decimal(q), tid, m, k) for ts, side, p, q, tid, m, k in rows])
+        return ([_order(symbol, r) for r in d["orders"]], [_order(symbol, r) for r in d["triggers"]],
+                tape, d.get("md_seq", 0))
+
+    def delete(self, symbol: str):
+        try:
+            os.remove(self._path(symbol))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,204 @@
+# engine/checkpoint.py
+from __future__ import annotations
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+import asyncio, os, time
+import orjson
+
+from .matching_engine import MatchingEngine
+from .order_book import OrderBook, PriceLevelBook
+
+# Order.to_json field order; an order is frozen as a tuple of these (Decimals are immutable)
+_FIELDS = ("symbol", "order_type", "side", "quantity", "price", "trigger_price",
+           "expire_ts_ns", "owner", "client_order_id", "order_id", "ts_ns")
+_DECIMALS = frozenset(("quantity", "price", "trigger_price"))
+
+
+def _freeze(o) -> tuple:
+    return (o.symbol, o.order_type, o.side, o.quantity, o.price, o.trigger_price,
+            o.expire_ts_ns, o.owner, o.client_order_id, o.order_id, o.ts_ns)
+
+
+def _thaw(t: tuple) -> dict:
+    return {k: (str(v) if v is not None and k in _DECIMALS else v) for k, v in zip(_FIELDS, t)}
+
+
+class _SymbolState:
+    __slots__ = ("book", "frozen", "triggers", "encoded", "lock")
+
+    def __init__(self, book: OrderBook):
+        self.book = book
+        # side -> price -> tuple of frozen orders (FIFO); replaced, never mutated, when the level changes
+        self.frozen: Dict[str, Dict[Decimal, tuple]] = {"buy": {}, "sell": {}}
+        self.triggers: Optional[tuple] = None
+        self.encoded: Dict[Tuple[str, Decimal], Tuple[tuple, bytes]] = {}  # writer thread only
+        self.lock = asyncio.Lock()
+
+
+class Checkpointer:
+    """
+    Periodic per-symbol checkpoints written off the event loop, in the `save_state` file format.
+
+    Capture is incremental: books track the levels touched since the last capture
+    (`PriceLevelBook.dirty`) and only those are re-frozen into immutable tuples; untouched
+    levels reuse the previous capture, and the writer reuses their encoded bytes. Dirty
+    levels are frozen in chunks of `chunk_levels` with a yield in between, then whatever
+    changed meanwhile is frozen in one final synchronous pass, which is the consistent
+    point in time (`md_seq` is recorded with it). Encoding and the tmp-file + rename write
+    run in a worker thread that releases the GIL between chunks. Chunks are sized in
+    orders (`chunk_orders`), so the loop pause does not grow with level depth.
+    `max_pause_s` is the longest synchronous capture step seen so far.
+    """
+    FINAL_LEVELS = 32  # dirty levels left for the synchronous final pass
+
+    def __init__(self, engine: MatchingEngine, interval_s: float = 5.0, chunk_orders: int = 2000):
+        self.engine = engine
+        self.interval_s = interval_s
+        self.chunk_orders = chunk_orders
+        self.states: Dict[str, _SymbolState] = {}
+        self.checkpoints = 0
+        self.max_pause_s = 0.0
+        self.last_write_s = 0.0
+        self.last_encoded_levels = 0  # levels re-encoded by the last write (the rest were reused)
+
+    def _state(self, symbol: str, book: OrderBook) -> _SymbolState:
+        st = self.states.get(symbol)
+        if st is None or st.book is not book:  # new or replaced (load_state) book: capture from scratch
+            st = self.states[symbol] = _SymbolState(book)
+            for side in (book.bids, book.asks):
+                side.dirty = set(side.levels)
+        return st
+
+    @staticmethod
+    def _freeze_levels(side: PriceLevelBook, frozen: Dict[Decimal, tuple], budget: Optional[int]) -> int:
+        # freeze dirty levels until `budget` orders have been copied (None = all); returns what is left
+        dirty = side.dirty
+        while dirty and (budget is None or budget > 0):
+            price = dirty.pop()
+            lvl = side.levels.get(price)
+            orders = tuple(_freeze(o) for o in lvl if o.quantity > 0) if lvl else ()
+            if orders:
+                frozen[price] = orders
+            else:
+                frozen.pop(price, None)
+            if budget is not None:
+                budget -= len(orders) + 1
+        return budget or 0
+
+    def changed(self, symbol: str) -> bool:
+        book = self.engine.books.get(symbol)
+        st = self.states.get(symbol)
+        if book is None:
+            return False
+        if st is None or st.book is not book or book.bids.dirty or book.asks.dirty:
+            return True
+        return st.triggers != tuple(_freeze(o) for o in self.engine.triggers.get(symbol, ()))
+
+    async def capture(self, symbol: str) -> Optional[dict]:
+        book = self.engine.books.get(symbol)
+        if book is None:
+            return None
+        st = self._state(symbol, book)
+        sides = ((book.bids, st.frozen["buy"]), (book.asks, st.frozen["sell"]))
+        best, stalled = None, 0
+        while True:
+            left = len(book.bids.dirty) + len(book.asks.dirty)
+            if left <= self.FINAL_LEVELS:
+                break
+            # give up on chunking if flow keeps dirtying levels faster than we freeze them
+            if best is not None and left >= best:
+                stalled += 1
+                if stalled == 8:
+                    break
+            else:
+                best, stalled = left, 0
+            t0 = time.perf_counter()
+            budget = self.chunk_orders
+            for side, frozen in sides:
+                budget = self._freeze_levels(side, frozen, budget)
+            self.max_pause_s = max(self.max_pause_s, time.perf_counter() - t0)
+            await asyncio.sleep(0)
+            if self.engine.books.get(symbol) is not book:
+                return await self.capture(symbol)
+        # final pass, no awaits: the checkpoint's point in time
+        t0 = time.perf_counter()
+        for side, frozen in sides:
+            self._freeze_levels(side, frozen, None)
+        st.triggers = tuple(_freeze(o) for o in self.engine.triggers.get(symbol, ()))
+        snap = {
+            "symbol": symbol,
+            "md_seq": self.engine.md_seq.get(symbol, 0),
+            "ts_ns": time.time_ns(),
+            "buy": dict(st.frozen["buy"]),
+            "sell": dict(st.frozen["sell"]),
+            "triggers": st.triggers,
+            "checksum": book.checksum(),
+        }
+        self.max_pause_s = max(self.max_pause_s, time.perf_counter() - t0)
+        return snap
+
+    def _write(self, st: _SymbolState, snap: dict, path: str) -> int:
+        # worker thread
+        old, new = st.encoded, {}
+        parts = [b'{"symbol":', orjson.dumps(snap["symbol"]), b',"md_seq":', str(snap["md_seq"]).encode(),
+                 b',"ts_ns":', str(snap["ts_ns"]).encode()]
+        n = since_yield = 0
+        for side, name in (("buy", "bids"), ("sell", "asks")):
+            parts.append(b',"' + name.encode() + b'":[')
+            first = True
+            for price, orders in snap[side].items():
+                hit = old.get((side, price))
+                if hit is not None and hit[0] is orders:
+                    b = hit[1]
+                else:
+                    b = orjson.dumps([str(price), [_thaw(t) for t in orders]])
+                    n += 1
+                    since_yield += len(orders)
+                    if since_yield >= 500:
+                        since_yield = 0
+                        time.sleep(0)  # let the event loop have the GIL
+                new[(side, price)] = (orders, b)
+                if not first:
+                    parts.append(b",")
+                parts.append(b)
+                first = False
+            parts.append(b"]")
+        parts.append(b',"triggers":')
+        parts.append(orjson.dumps([_thaw(t) for t in snap["triggers"]]))
+        if snap["checksum"] is not None:
+            parts.append(b',"checksum":' + str(snap["checksum"]).encode())
+        parts.append(b"}")
+        st.encoded = new
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp, path)
+        return n
+
+    async def checkpoint(self, symbol: str) -> bool:
+        """Capture `symbol` and write it to the engine's state file; matching continues meanwhile."""
+        book = self.engine.books.get(symbol)
+        if book is None:
+            return False
+        st = self._state(symbol, book)
+        async with st.lock:
+            snap = await self.capture(symbol)
+            if snap is None:
+                return False
+            st = self.states[symbol]
+            t0 = time.perf_counter()
+            self.last_encoded_levels = await asyncio.get_running_loop().run_in_executor(
+                None, self._write, st, snap, self.engine._state_path(symbol))
+            self.last_write_s = time.perf_counter() - t0
+            self.checkpoints += 1
+            return True
+
+    async def run(self):
+        """Background task: checkpoint every changed symbol each `interval_s`."""
+        while True:
+            await asyncio.sleep(self.interval_s)
+            for symbol in [s for s in self.states if s not in self.engine.books]:
+                del self.states[symbol]  # hibernated: its store snapshot is the state now
+            for symbol in list(self.engine.books):
+                if self.changed(symbol):
+                    await self.checkpoint(symbol)
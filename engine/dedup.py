@@ -0,0 +1,75 @@
+# engine/dedup.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import time
+
+
+class DedupCache:
+    """
+    Bounded idempotency index: (owner, client_order_id) -> value.
+    Each owner keeps at most `per_owner` ids, oldest first out, and ids older than
+    `window_s` are treated as unseen; at most `max_owners` owners are tracked (the one
+    idle longest is dropped). Memory is capped at per_owner * max_owners entries no
+    matter how long the process runs: with the defaults 256k entries, each holding the
+    order and its result (about 1 KB for a filled order), so a few hundred MB at worst.
+    All operations are O(1) amortized.
+    """
+    def __init__(self, per_owner: int = 1_000, window_s: Optional[float] = 600.0, max_owners: int = 256):
+        self.per_owner = per_owner
+        self.window_ns = None if window_s is None else int(window_s * 1e9)
+        self.max_owners = max_owners
+        self.owners: "OrderedDict[Optional[str], OrderedDict]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _expired(self, ts: int, now: int) -> bool:
+        return self.window_ns is not None and now - ts > self.window_ns
+
+    def get(self, owner: Optional[str], key: Hashable) -> Optional[Any]:
+        ids = self.owners.get(owner)
+        if ids is None:
+            return None
+        entry = ids.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[0], time.monotonic_ns()):
+            del ids[key]
+            self.size -= 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, owner: Optional[str], key: Hashable, value: Any):
+        now = time.monotonic_ns()
+        ids = self.owners.get(owner)
+        if ids is None:
+            ids = self.owners[owner] = OrderedDict()
+            if len(self.owners) > self.max_owners:
+                _, dropped = self.owners.popitem(last=False)
+                self.size -= len(dropped)
+                self.evictions += len(dropped)
+        else:
+            self.owners.move_to_end(owner)
+        if key in ids:
+            del ids[key]
+            self.size -= 1
+        ids[key] = (now, value)
+        self.size += 1
+        # trim from the old end: past the window, or over capacity
+        while ids:
+            k, (ts, _) = next(iter(ids.items()))
+            if len(ids) <= self.per_owner and not self._expired(ts, now):
+                break
+            del ids[k]
+            self.size -= 1
+            self.evictions += 1
+
+    def discard(self, owner: Optional[str], key: Hashable):
+        ids = self.owners.get(owner)
+        if ids is not None and ids.pop(key, None) is not None:
+            self.size -= 1
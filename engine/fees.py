@@ -0,0 +1,91 @@
+# engine/fees.py
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+_BPS = Decimal(10_000)
+
+
+class FeeRate:
+    """Resolved maker/taker rate in integer bps (negative maker = rebate) plus the Decimal fractions used per trade."""
+    __slots__ = ("maker_bps", "taker_bps", "maker", "taker")
+
+    def __init__(self, maker_bps: int, taker_bps: int):
+        self.maker_bps = maker_bps
+        self.taker_bps = taker_bps
+        self.maker = Decimal(maker_bps) / _BPS
+        self.taker = Decimal(taker_bps) / _BPS
+
+    def to_json(self) -> Dict[str, int]:
+        return {"maker_bps": self.maker_bps, "taker_bps": self.taker_bps}
+
+
+@dataclass
+class FeeTier:
+    min_volume: Decimal  # traded quote notional needed to reach this tier
+    maker_bps: int
+    taker_bps: int
+
+
+class FeeSchedule:
+    """
+    Effective rate for (owner, symbol), most specific first:
+    account override > symbol override > owner's volume tier > default.
+    Lookups are cached per (owner, symbol); an owner's entries are dropped when their
+    traded volume crosses into the next tier or the schedule is edited. The engine
+    resolves the rate once per order and keeps it on the order.
+    """
+    def __init__(self, maker_bps: int = 10, taker_bps: int = 20, tiers: Optional[List[FeeTier]] = None):
+        self.default = FeeRate(maker_bps, taker_bps)
+        self.tiers: List[FeeTier] = sorted(tiers or [], key=lambda t: t.min_volume)
+        self._tier_rates = [FeeRate(t.maker_bps, t.taker_bps) for t in self.tiers]
+        self._tier_floors = [t.min_volume for t in self.tiers]
+        self.symbols: Dict[str, FeeRate] = {}
+        self.accounts: Dict[str, FeeRate] = {}
+        self.volume: Dict[str, Decimal] = {}
+        self._next_tier: Dict[str, Decimal] = {}  # owner -> volume at which their tier changes
+        self._cache: Dict[Tuple[Optional[str], str], FeeRate] = {}
+
+    def set_symbol(self, symbol: str, maker_bps: int, taker_bps: int):
+        self.symbols[symbol] = FeeRate(maker_bps, taker_bps)
+        self._cache.clear()
+
+    def set_account(self, owner: str, maker_bps: int, taker_bps: int):
+        self.accounts[owner] = FeeRate(maker_bps, taker_bps)
+        self._cache.clear()
+
+    def rate(self, owner: Optional[str], symbol: str) -> FeeRate:
+        r = self._cache.get((owner, symbol))
+        if r is None:
+            r = self._cache[(owner, symbol)] = self._resolve(owner, symbol)
+        return r
+
+    def _resolve(self, owner: Optional[str], symbol: str) -> FeeRate:
+        if owner is not None and owner in self.accounts:
+            return self.accounts[owner]
+        if symbol in self.symbols:
+            return self.symbols[symbol]
+        if owner is None or not self.tiers:
+            return self.default
+        i = bisect_right(self._tier_floors, self.volume.get(owner, Decimal(0)))
+        self._next_tier[owner] = self._tier_floors[i] if i < len(self._tier_floors) else None
+        return self._tier_rates[i - 1] if i > 0 else self.default
+
+    def record(self, owner: Optional[str], notional: Decimal):
+        """Add traded notional for tiering (the engine calls this per fill)."""
+        if owner is None or not self.tiers:
+            return
+        v = self.volume[owner] = self.volume.get(owner, Decimal(0)) + notional
+        nxt = self._next_tier.get(owner)
+        if nxt is not None and v >= nxt:
+            self._next_tier.pop(owner)
+            for key in [k for k in self._cache if k[0] == owner]:
+                del self._cache[key]
+
+    def reset_volumes(self):
+        """Start a new tier period (e.g. from a daily job for trailing-30d tiers)."""
+        self.volume.clear()
+        self._next_tier.clear()
+        self._cache.clear()
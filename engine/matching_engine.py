@@ -182,11 +182,24 @@
 from __future__ import annotations
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
-import uuid, datetime, decimal, asyncio, json, os
+from collections import OrderedDict, defaultdict, deque
+import uuid, datetime, decimal, asyncio, json, os, time
 
-from .models import Order, Trade
-from .order_book import OrderBook
+from .models import Order, OrderRejected, Trade
+from .order_book import OrderBook, levels_checksum
+from .trade_tape import TradeTape
+from .timer_wheel import TimerWheel
+from .risk import RiskError, RiskManager
+from .settlement import Settlement
+from .fees import FeeRate, FeeSchedule
+from .dedup import DedupCache
+from .registry import OrderRegistry
+from .shm_book import ShmBookPublisher
+from .md_codec import MdUpdate, TradeUpdate
+from .audit import AuditLog
+from .book_store import BookStore
+from .admission import AdmissionControl, wait_summary
+from .priority_lock import PriorityLock
 
 def ser_decimal(x):
     if isinstance(x, decimal.Decimal):
@@ -209,35 +222,184 @@ class Broadcaster:
         async with self._lock:
             self._subs[topic].discard(q)
 
-    async def publish(self, topic: str, message: dict):
+    async def publish(self, topic: str, message):
         for q in list(self._subs.get(topic, [])):
             try: q.put_nowait(message)
             except Exception: pass
 
 
+def _state_checksum(data: dict) -> int:
+    # book checksum of a save_state / checkpoint file, from its orders
+    total = 0
+    for key, side in (("bids", "buy"), ("asks", "sell")):
+        levels: Dict[Decimal, Decimal] = {}
+        for _, orders in data.get(key, []):
+            for od in orders:
+                q = Decimal(od["quantity"])
+                if q > 0:
+                    p = Decimal(od["price"])
+                    levels[p] = levels.get(p, Decimal(0)) + q
+        total += levels_checksum(side, levels.items())
+    return total & 0xFFFFFFFF
+
+
 class MatchingEngine:
     """
     Extended engine with:
     - stop_market, stop_limit, take_profit triggers
     - JSON persistence (per symbol)
-    - fee model
+    - fee model: per-account / per-symbol / volume-tiered schedules, rate cached per order
     - per-symbol lock for concurrency
+    - bounded in-memory trade tape for recent-trades / backfill queries
+    - GTD/GTT expiry via a per-engine timer wheel (`run_expiry` drives it)
+    - mass cancel by side / price range / owner, and a per-owner kill switch
+    - call-auction phases (open / reopen / periodic) uncrossed at a single price
+    - optional pre-trade risk checks against incrementally maintained account exposure
+    - optional settlement: trades queued to a batched integer ledger off the hot path
+    - idempotent submits keyed by (owner, client_order_id) through a bounded dedup cache
+    - optional order registry: status / fills / average price per order id, open orders per owner
+    - optional shared-memory top-of-book table for co-located readers (seqlock per symbol)
+    - optional audit drop-copy of orders / rejects / cancels / trades, written off-thread
+    - optional hibernation of idle books to a snapshot store, lazy reload, LRU cap on resident books
+    - optional per-symbol admission control: bounded in-flight depth and target queueing delay
+    - optional cancel priority lane: cancels and reduce-only amends take the symbol lock ahead of new orders
+    - optional incrementally maintained book checksums in md, snapshots, saved state and the audit log
     """
-    def __init__(self, maker_fee_bps: int = 10, taker_fee_bps: int = 20, state_dir: str = "state"):
-        self.books: Dict[str, OrderBook] = {}
+    def __init__(self, maker_fee_bps: int = 10, taker_fee_bps: int = 20, state_dir: str = "state",
+                 tape_capacity: int = 100_000, risk: Optional[RiskManager] = None,
+                 settlement: Optional[Settlement] = None, fees: Optional[FeeSchedule] = None,
+                 dedup: Optional[DedupCache] = None, registry: Optional[OrderRegistry] = None,
+                 book_shm: Optional[ShmBookPublisher] = None, audit: Optional[AuditLog] = None,
+                 store: Optional[BookStore] = None, max_books: Optional[int] = None,
+                 admission: Optional[AdmissionControl] = None, cancel_priority: bool = False,
+                 checksums: bool = False):
+        self.books: "OrderedDict[str, OrderBook]" = OrderedDict()  # least recently used first (with a store)
         self.triggers: Dict[str, List[Order]] = defaultdict(list)  # pending trigger orders (not on book)
         self.trades_pub = Broadcaster()
         self.md_pub = Broadcaster()
-        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
-        self.maker_fee = Decimal(maker_fee_bps) / Decimal(10_000)
-        self.taker_fee = Decimal(taker_fee_bps) / Decimal(10_000)
+        self.cancel_priority = cancel_priority
+        self.checksums = checksums
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(PriorityLock if cancel_priority else asyncio.Lock)
+        # recent waits for the symbol lock, seconds: "new" = submits, "cancel" = cancels and amends
+        self.lock_waits: Dict[str, deque] = {"new": deque(maxlen=4096), "cancel": deque(maxlen=4096)}
+        self.fees = fees if fees is not None else FeeSchedule(maker_fee_bps, taker_fee_bps)
         self.state_dir = state_dir
+        self.tape = TradeTape(tape_capacity)
+        self.expiry = TimerWheel(start_ns=time.time_ns())  # items: (symbol, order_id)
+        self.auctions: Dict[str, bool] = {}  # symbols in a call-auction phase -> periodic?
+        self.auction_markets: Dict[str, List[Order]] = defaultdict(list)  # market orders awaiting the uncross
+        self.risk = risk
+        self.settlement = settlement
+        self.dedup = dedup if dedup is not None else DedupCache()
+        self.registry = registry
+        self.book_shm = book_shm
+        self.audit = audit
+        self.md_seq: Dict[str, int] = {}
+        self.trade_seq: Dict[str, int] = {}
+        self.store = store
+        self.max_books = max_books if store is not None else None
+        # hibernated symbol -> owners with orders in it; None = left by a previous process (not yet loaded)
+        self.hibernated: Dict[str, Optional[set]] = {s: None for s in store.symbols()} if store is not None else {}
+        self.hibernations = 0
+        self.wakes = 0
+        self.admission = admission
         os.makedirs(self.state_dir, exist_ok=True)
 
     def _book(self, symbol: str) -> OrderBook:
-        if symbol not in self.books:
-            self.books[symbol] = OrderBook(symbol)
-        return self.books[symbol]
+        """Resident book for `symbol`, reloading it if hibernated or creating it on first use."""
+        b = self.books.get(symbol)
+        if b is None:
+            b = self.books[symbol] = OrderBook(symbol, self.checksums)
+            if symbol in self.hibernated:
+                self._wake(symbol, b)
+            if self.max_books is not None and len(self.books) > self.max_books:
+                self._evict_lru(keep=symbol)
+        elif self.store is not None:
+            self.books.move_to_end(symbol)
+            b.last_access = time.monotonic()
+        return b
+
+    def _known(self, symbol: str) -> Optional[OrderBook]:
+        # for queries and cancels: never creates a book for an unknown symbol
+        b = self.books.get(symbol)
+        if b is None and symbol in self.hibernated:
+            b = self._book(symbol)
+        return b
+
+    # ---------- Hibernation ----------
+
+    def hibernate(self, symbol: str) -> bool:
+        """
+        Move an idle book out of memory into the store, with its triggers, the tail of its
+        trade tape and its feed seqs; its lock and admission state are dropped (rebuilt on use).
+        """
+        if self.store is None or symbol not in self.books or symbol in self.auctions or self.auction_markets.get(symbol):
+            return False
+        lock = self.locks.get(symbol)
+        if lock is not None and (lock.locked() or lock._waiters):
+            return False
+        if self.admission is not None and not self.admission.forget(symbol):
+            return False
+        book = self.books.pop(symbol)
+        triggers = self.triggers.pop(symbol, [])
+        self.auction_markets.pop(symbol, None)
+        self.locks.pop(symbol, None)
+        tape = self.tape.release(symbol)
+        self.trade_seq.pop(symbol, None)  # == the tape's total, restored from it
+        md_seq = self.md_seq.pop(symbol, 0)
+        orders = [o for side in (book.bids, book.asks) for lvl in side.levels.values() for o in lvl if o.quantity > 0]
+        if orders or triggers or tape is not None or md_seq:
+            self.store.save(symbol, orders, triggers, tape, md_seq)
+            self.hibernated[symbol] = {o.owner for o in orders + triggers if o.owner is not None}
+        self.hibernations += 1
+        return True
+
+    def _wake(self, symbol: str, book: OrderBook):
+        owners = self.hibernated.pop(symbol)
+        orders, triggers, tape, md_seq = self.store.load(symbol)
+        self.store.delete(symbol)
+        if tape is not None:
+            self.trade_seq[symbol] = self.tape.restore(symbol, *tape)
+        if md_seq:
+            self.md_seq[symbol] = md_seq
+        if owners is None:
+            # written by a previous process: register exposure, expiry and status like load_state
+            for o in orders:
+                self._rest(book, o)
+            if self.registry is not None:
+                for o in orders + triggers:
+                    if o.order_id not in self.registry.live:
+                        self.registry.on_new(o)
+        else:
+            # risk, registry and expiry timers still hold these orders by id
+            for o in orders:
+                (book.bids if o.side == "buy" else book.asks).add(o)
+        if triggers:
+            self.triggers[symbol] = triggers + self.triggers.get(symbol, [])
+        self.wakes += 1
+
+    def _evict_lru(self, keep: str):
+        for symbol in list(self.books):
+            if len(self.books) <= self.max_books:
+                return
+            if symbol != keep:
+                self.hibernate(symbol)
+
+    def hibernate_idle(self, idle_s: float) -> int:
+        """Hibernate every book not used for `idle_s` seconds; returns how many."""
+        cutoff = time.monotonic() - idle_s
+        n = 0
+        for symbol, book in list(self.books.items()):
+            if book.last_access > cutoff:
+                break  # LRU order: the rest were used more recently
+            n += self.hibernate(symbol)
+        return n
+
+    async def run_hibernation(self, idle_s: float = 300.0, interval_s: float = 30.0):
+        """Background task: hibernate books idle for `idle_s`, checked every `interval_s`."""
+        while True:
+            await asyncio.sleep(interval_s)
+            self.hibernate_idle(idle_s)
 
     def _eligible_side(self, side: str, book: OrderBook):
         return (book.asks if side == "buy" else book.bids)
@@ -255,42 +417,26 @@ class MatchingEngine:
 
     def _sweep_available(self, taker: Order, book: OrderBook) -> Decimal:
         maker = self._eligible_side(taker.side, book)
-        total = Decimal("0")
-        prices = sorted(maker.levels.keys(), reverse=(maker.side=="buy"))
-        for p in prices:
-            qty_at = maker.qty_at_price.get(p, Decimal("0"))
-            if qty_at <= 0:
-                continue
-            if self._crossable(taker, p):
-                total += qty_at
-            else:
-                break
-        return total
+        if taker.order_type == "market":
+            return maker.available()
+        return maker.available(taker.price)
 
     def _emit_md(self, symbol: str):
         book = self._book(symbol)
         depth = book.depth(10)
-        md_msg = {
-            "timestamp": datetime.datetime.utcnow().isoformat(timespec="microseconds") + "Z",
-            "symbol": symbol,
-            "bids": [[ser_decimal(p), ser_decimal(q)] for p,q in depth.bids],
-            "asks": [[ser_decimal(p), ser_decimal(q)] for p,q in depth.asks],
-        }
+        if self.book_shm is not None:
+            self.book_shm.publish(symbol, depth.bids, depth.asks)
+        seq = self.md_seq[symbol] = self.md_seq.get(symbol, 0) + 1
+        cs = book.checksum()
+        if cs is not None and self.audit is not None:
+            self.audit.book(symbol, seq, cs)
+        # encoded lazily, once per encoding, by the first subscriber that needs it
+        md_msg = MdUpdate(symbol, seq, time.time_ns(), depth.bids, depth.asks, cs)
         asyncio.create_task(self.md_pub.publish(f"md:{symbol}", md_msg))
 
     def _emit_trade(self, t: Trade):
-        msg = {
-            "timestamp": datetime.datetime.utcnow().isoformat(timespec="microseconds") + "Z",
-            "symbol": t.symbol,
-            "trade_id": t.trade_id,
-            "price": ser_decimal(t.price),
-            "quantity": ser_decimal(t.quantity),
-            "aggressor_side": t.aggressor_side,
-            "maker_order_id": t.maker_order_id,
-            "taker_order_id": t.taker_order_id,
-            "maker_fee": ser_decimal(t.maker_fee),
-            "taker_fee": ser_decimal(t.taker_fee),
-        }
+        seq = self.trade_seq[t.symbol] = self.tape.record(t)  # tape rows carry the same seq
+        msg = TradeUpdate(seq, t.ts_ns, t)
         asyncio.create_task(self.trades_pub.publish(f"trades:{t.symbol}", msg))
 
     # ---------- Trigger logic (stop / take-profit) ----------
@@ -317,7 +463,7 @@ class MatchingEngine:
         if o.order_type == "stop_market" or o.order_type == "take_profit":
             return Order(
                 symbol=o.symbol, order_type="market", side=o.side,
-                quantity=o.quantity, price=None
+                quantity=o.quantity, price=None, owner=o.owner
             )
         elif o.order_type == "stop_limit":
             if o.price is None:
@@ -327,128 +473,587 @@ class MatchingEngine:
                 child_px = o.price
             return Order(
                 symbol=o.symbol, order_type="limit", side=o.side,
-                quantity=o.quantity, price=child_px
+                quantity=o.quantity, price=child_px, expire_ts_ns=o.expire_ts_ns, owner=o.owner
             )
         return o  # should not happen
 
-    async def _check_and_fire_triggers(self, symbol: str, last_price: Decimal):
-        # Called on each trade to activate eligible triggers
-        remaining = []
-        for o in self.triggers.get(symbol, []):
-            if self._trigger_condition(o, last_price):
-                child = self._activate_trigger(o)
-                # Submit child order immediately (await!)
-                await self.submit(child)
+    def _take_triggered(self, symbol: str, lo: Decimal, hi: Decimal) -> List[Order]:
+        # Trade prices within one sweep move monotonically, so a threshold trigger
+        # is hit by some trade iff it is hit by the lowest or the highest one.
+        pending = self.triggers.get(symbol)
+        if not pending:
+            return []
+        fired, remaining = [], []
+        now = time.time_ns()
+        for o in pending:
+            if o.expire_ts_ns is not None and o.expire_ts_ns <= now:
+                remaining.append(o)  # past its deadline: never fires, the next expiry sweep drops it
+            elif self._trigger_condition(o, lo) or self._trigger_condition(o, hi):
+                fired.append(o)
             else:
                 remaining.append(o)
-        self.triggers[symbol] = remaining
+        if fired:
+            self.triggers[symbol] = remaining
+        return fired
+
+    def _fire_triggers(self, symbol: str, trades: List[Trade]):
+        # Breadth-first so stop cascades run iteratively (no recursion, no lock re-entry).
+        pending = deque([trades])
+        while pending:
+            batch = pending.popleft()
+            lo = min(t.price for t in batch)
+            hi = max(t.price for t in batch)
+            for o in self._take_triggered(symbol, lo, hi):
+                child = self._activate_trigger(o)
+                if self.registry is not None:
+                    self.registry.on_triggered(o.order_id, child.order_id)
+                if self.audit is not None:
+                    self.audit.trigger(o, child.order_id)
+                child_trades, _ = self._match(child)
+                if child_trades:
+                    pending.append(child_trades)
 
 
     # ---------- Public operations ----------
 
 
-    async def submit(self, order: Order) -> Tuple[List[Trade], Optional[Order]]:
+    async def submit(self, order: Order, arrived: Optional[float] = None) -> Tuple[List[Trade], Optional[Order]]:
         """
-        Process an incoming order (or activated child).
+        Process an incoming order.
         Advanced types:
         - stop_market/stop_limit/take_profit -> store in triggers (not live) until triggered.
-        Returns (trades, resting_order_if_any)
+        Triggers hit by this order's trades are activated after it finishes matching.
+        Returns (trades, resting_order_if_any); raises OrderRejected if the order's expiry
+        has already passed and RiskError (a subclass) if a pre-trade check fails.
+        A repeated (owner, client_order_id) returns the first submission's result.
+        With admission control, raises AdmissionError when the symbol is overloaded;
+        `arrived` is the request's `time.perf_counter()` arrival stamp.
         """
+        if self.admission is not None:
+            self.admission.admit(order.symbol, False, arrived)
+            try:
+                if order.client_order_id is not None:
+                    return await self._submit_once(order)
+                return await self._submit(order)
+            finally:
+                self.admission.done(order.symbol)
+        if order.client_order_id is not None:
+            return await self._submit_once(order)
+        return await self._submit(order)
+
+    async def _submit_once(self, order: Order) -> Tuple[List[Trade], Optional[Order]]:
+        # The future goes in before processing, so a retry racing the original waits for it.
+        key = order.client_order_id
+        prior = self.dedup.get(order.owner, key)
+        if prior is not None:
+            original, fut = prior
+            order.order_id = original.order_id  # so callers report the id the book knows
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise  # this retry itself was cancelled
+                # the original was cancelled before it reached the book: take its place
+                return await self._submit_once(order)
+        fut = asyncio.get_running_loop().create_future()
+        self.dedup.put(order.owner, key, (order, fut))
+        try:
+            result = await self._submit(order)
+        except BaseException as e:
+            self.dedup.discard(order.owner, key)  # rejected or cancelled: a retry may be accepted
+            if isinstance(e, Exception):
+                fut.set_exception(e)
+                fut.exception()  # retrieved here; waiting retries still get it raised
+            else:
+                fut.cancel()  # waiting retries resubmit in its place
+            raise
+        fut.set_result(result)
+        return result
+
+    async def _submit(self, order: Order) -> Tuple[List[Trade], Optional[Order]]:
+        if order.expire_ts_ns is not None and order.expire_ts_ns <= time.time_ns():
+            if self.audit is not None:
+                self.audit.reject(order, "expired")
+            raise OrderRejected("expire_ts_ns is in the past")
+        if order.fee_rate is None:
+            order.fee_rate = self.fees.rate(order.owner, order.symbol)
         # Trigger orders do not hit the book immediately
         if order.order_type in ("stop_market", "stop_limit", "take_profit"):
+            if self.risk is not None:
+                self._risk_check(order, None)
+            if order.symbol in self.hibernated:
+                self._book(order.symbol)  # bring its other triggers back first
             self.triggers[order.symbol].append(order)
+            if order.expire_ts_ns is not None:
+                self.expiry.schedule(order.expire_ts_ns, (order.symbol, order.order_id))
+            self._accepted(order)
             # No MD emit (no book change)
             return ([], None)
 
+        t0 = time.perf_counter()
+        async with self.locks[order.symbol]:
+            self.lock_waits["new"].append(time.perf_counter() - t0)
+            if self.risk is not None:
+                # checked and matched in the same loop step, so the exposure cannot move in between
+                est = None
+                if order.price is None:  # market: what sweeping the opposite side would cost, O(log n)
+                    est = self._eligible_side(order.side, self._book(order.symbol)).sweep(order.quantity)[1]
+                self._risk_check(order, est)
+            trades, rested = self._match(order)
+            if trades:
+                self._fire_triggers(order.symbol, trades)
+            return (trades, rested)
+
+    def _risk_check(self, order: Order, est_notional: Optional[Decimal]):
+        try:
+            self.risk.check(order, est_notional)
+        except RiskError as e:
+            if self.audit is not None:
+                self.audit.reject(order, str(e))
+            raise
+
+    def _accepted(self, order: Order):
+        if self.registry is not None:
+            self.registry.on_new(order)
+        if self.audit is not None:
+            self.audit.order(order)
+
+    def _cancelled(self, symbol: str, order_id: str, reason: str = "cancelled"):
+        if self.registry is not None:
+            self.registry.on_cancel(order_id, reason)
+        if self.audit is not None:
+            self.audit.cancel(symbol, order_id, reason)
+
+    def _match(self, order: Order) -> Tuple[List[Trade], Optional[Order]]:
+        # Caller holds self.locks[order.symbol].
+        self._accepted(order)
+        if order.symbol in self.auctions:
+            return self._auction_accept(order)
         trades: List[Trade] = []
         remaining = order.quantity
         book = self._book(order.symbol)
         maker_side = self._eligible_side(order.side, book)
 
-        async with self.locks[order.symbol]:
+        # FOK precheck
+        if order.order_type == "fok":
+            avail = self._sweep_available(order, book)
+            if avail < remaining:
+                self._cancelled(order.symbol, order.order_id, "unfilled")
+                self._emit_md(order.symbol)
+                return ([], None)
 
-            # FOK precheck
-            if order.order_type == "fok":
-                avail = self._sweep_available(order, book)
-                if avail < remaining:
-                    self._emit_md(order.symbol)
-                    return ([], None)
-
-            # Sweep best->next under price-time
-            while remaining > 0:
-                best = self._best_maker_price(order.side, book)
-                if best is None or not self._crossable(order, best):
-                    break
-                head = maker_side.pop_best_order()
-                if head is None:
-                    break
-                trade_qty = min(remaining, head.quantity)
-                exec_price = best
-                head.quantity -= trade_qty
-                remaining -= trade_qty
-                maker_side.reduce_head(exec_price, trade_qty)
-
-                # Fees
-                maker_fee = (trade_qty * exec_price) * self.maker_fee
-                taker_fee = (trade_qty * exec_price) * self.taker_fee
-
-                t = Trade(
-                    symbol=order.symbol,
-                    trade_id=str(uuid.uuid4()),
-                    price=exec_price,
-                    quantity=trade_qty,
-                    aggressor_side=order.side,
-                    maker_order_id=head.order_id,
-                    taker_order_id=order.order_id,
-                    maker_fee=maker_fee,
-                    taker_fee=taker_fee,
-                )
-                trades.append(t)
-                self._emit_trade(t)  # uses create_task internally
-
-                # Trigger activation check on each trade (await!)
-                await self._check_and_fire_triggers(order.symbol, exec_price)
-
-            rested = None
-            if remaining > 0:
-                if order.order_type in ("ioc", "market", "fok"):
-                    rested = None
-                else:
-                    o2 = order.clone_shallow(quantity=remaining)
-                    if o2.side == "buy":
-                        book.bids.add(o2)
-                    else:
-                        book.asks.add(o2)
-                    rested = o2
+        # Sweep best->next under price-time
+        while remaining > 0:
+            best = self._best_maker_price(order.side, book)
+            if best is None or not self._crossable(order, best):
+                break
+            head = maker_side.pop_best_order()
+            if head is None:
+                break
+            trade_qty = min(remaining, head.quantity)
+            exec_price = best
+            head.quantity -= trade_qty
+            remaining -= trade_qty
+            maker_side.reduce_head(exec_price, trade_qty)
+            trades.append(self._make_trade(order.symbol, exec_price, trade_qty, order, head))
 
-            self._emit_md(order.symbol)
-            return (trades, rested)
+        rested = None
+        if remaining > 0:
+            if order.order_type in ("ioc", "market", "fok"):
+                rested = None
+            else:
+                rested = self._rest(book, order.clone_shallow(quantity=remaining))
+        if remaining > 0 and rested is None:
+            self._cancelled(order.symbol, order.order_id, "unfilled")
+
+        self._emit_md(order.symbol)
+        return (trades, rested)
 
-    async def cancel(self, symbol: str, order_id: str) -> bool:
+    def _fee_rate(self, o: Order) -> FeeRate:
+        r = o.fee_rate
+        if r is None:  # trigger children, restored orders
+            r = o.fee_rate = self.fees.rate(o.owner, o.symbol)
+        return r
+
+    def _make_trade(self, symbol: str, price: Decimal, qty: Decimal, taker: Order, maker: Order) -> Trade:
+        notional = qty * price
+        fees = self.fees
+        if fees.tiers:
+            fees.record(maker.owner, notional)
+            fees.record(taker.owner, notional)
+        t = Trade(
+            symbol=symbol,
+            trade_id=str(uuid.uuid4()),
+            price=price,
+            quantity=qty,
+            aggressor_side=taker.side,
+            maker_order_id=maker.order_id,
+            taker_order_id=taker.order_id,
+            maker_fee=notional * self._fee_rate(maker).maker,
+            taker_fee=notional * self._fee_rate(taker).taker,
+            maker_owner=maker.owner,
+            taker_owner=taker.owner,
+        )
+        self._emit_trade(t)  # uses create_task internally
+        if self.settlement is not None:
+            self.settlement.offer(t)
+        if self.risk is not None:
+            self.risk.on_fill(taker, qty, price)
+            self.risk.on_fill(maker, qty, price)
+        if self.registry is not None:
+            self.registry.on_fill(taker.order_id, qty, notional)
+            self.registry.on_fill(maker.order_id, qty, notional)
+        if self.audit is not None:
+            self.audit.trade(t)
+        return t
+
+    def _rest(self, book: OrderBook, o: Order) -> Order:
+        if o.side == "buy":
+            book.bids.add(o)
+        else:
+            book.asks.add(o)
+        if o.expire_ts_ns is not None:
+            self.expiry.schedule(o.expire_ts_ns, (o.symbol, o.order_id))
+        if self.risk is not None:
+            self.risk.on_rest(o)
+        return o
+
+    # ---------- Call auction ----------
+
+    def _auction_accept(self, order: Order) -> Tuple[List[Trade], Optional[Order]]:
+        # During a call phase nothing matches: limits rest (the book may cross),
+        # market orders wait for the uncross, IOC/FOK have nothing to execute against.
+        if order.order_type in ("ioc", "fok"):
+            self._cancelled(order.symbol, order.order_id, "unfilled")
+            return ([], None)
+        if order.order_type == "market":
+            self.auction_markets[order.symbol].append(order)
+            return ([], order)
+        rested = self._rest(self._book(order.symbol), order.clone_shallow())
+        self._emit_md(order.symbol)
+        return ([], rested)
+
+    def start_auction(self, symbol: str, periodic: bool = False):
+        """
+        Enter a call phase for `symbol`: orders accumulate until `uncross`.
+        One-shot phases (open, reopen after a halt) return to continuous trading after
+        the uncross; periodic ones stay in auction mode and are uncrossed by `run_call_auctions`.
+        """
+        self.auctions[symbol] = periodic
+        if self.audit is not None:
+            self.audit.auction_start(symbol, periodic)
+
+    def _auction_sides(self, symbol: str) -> Tuple[List[Order], List[Order]]:
+        book = self._known(symbol)
+        markets = self.auction_markets.get(symbol, [])
+        buys = (list(book.bids.orders.values()) if book else []) + [o for o in markets if o.side == "buy"]
+        sells = (list(book.asks.orders.values()) if book else []) + [o for o in markets if o.side == "sell"]
+        return buys, sells
+
+    def indicative(self, symbol: str) -> dict:
+        """Price / volume / imbalance the book would uncross at right now (nothing executes)."""
+        from .auction import uncross
+        res = uncross(*self._auction_sides(symbol), self.tape.last_price(symbol))
+        return {
+            "symbol": symbol,
+            "in_auction": symbol in self.auctions,
+            "price": ser_decimal(res.price),
+            "volume": ser_decimal(res.volume),
+            "imbalance": ser_decimal(res.imbalance),
+        }
+
+    async def uncross(self, symbol: str, reference_price: Optional[Decimal] = None) -> List[Trade]:
+        """Match the accumulated call-phase orders at one clearing price (reference defaults to the last trade)."""
+        from .auction import uncross
         async with self.locks[symbol]:
-            b = self._book(symbol)
-            ok = b.bids.remove_order(order_id) or b.asks.remove_order(order_id)
+            if reference_price is None:
+                reference_price = self.tape.last_price(symbol)
+            if self.audit is not None:
+                self.audit.uncross(symbol, reference_price)
+            res = uncross(*self._auction_sides(symbol), reference_price)
+            markets = self.auction_markets.pop(symbol, None)  # unfilled market orders do not rest
+            trades: List[Trade] = []
+            if res.price is not None:
+                # pair buy and sell fills in allocation order; the later order is the taker
+                bf = [[o, q] for o, q in res.buy_fills]
+                sf = [[o, q] for o, q in res.sell_fills]
+                i = j = 0
+                while i < len(bf) and j < len(sf):
+                    b, s = bf[i][0], sf[j][0]
+                    q = min(bf[i][1], sf[j][1])
+                    taker, maker = (s, b) if b.ts_ns <= s.ts_ns else (b, s)
+                    trades.append(self._make_trade(symbol, res.price, q, taker, maker))
+                    bf[i][1] -= q
+                    sf[j][1] -= q
+                    i += bf[i][1] == 0
+                    j += sf[j][1] == 0
+                book = self._book(symbol)
+                book.bids.apply_fills((o, q) for o, q in res.buy_fills if o.price is not None)
+                book.asks.apply_fills((o, q) for o, q in res.sell_fills if o.price is not None)
+            if markets:
+                filled = {id(o): q for o, q in res.buy_fills + res.sell_fills if o.price is None}
+                for o in markets:
+                    if filled.get(id(o), 0) < o.quantity:
+                        self._cancelled(symbol, o.order_id, "unfilled")
+            if not self.auctions.get(symbol, False):
+                self.auctions.pop(symbol, None)  # one-shot phase: back to continuous
+            if trades:
+                self._emit_md(symbol)
+                self._fire_triggers(symbol, trades)
+            return trades
+
+    async def run_call_auctions(self, interval_s: float = 1.0):
+        """Background task: uncross every periodic-auction symbol each `interval_s`."""
+        while True:
+            await asyncio.sleep(interval_s)
+            for symbol in [s for s, periodic in self.auctions.items() if periodic]:
+                await self.uncross(symbol)
+
+    def _remove_resting(self, book: OrderBook, order_id: str, reason: str = "cancelled") -> Optional[Order]:
+        # O(1) id lookup on both sides (plus the deque removal within one level)
+        o = book.bids.remove_order(order_id) or book.asks.remove_order(order_id)
+        if o is not None:
+            if self.risk is not None:
+                self.risk.on_remove([o])
+            self._cancelled(o.symbol, order_id, reason)
+        return o
+
+    async def cancel(self, symbol: str, order_id: str, owner: Optional[str] = None,
+                     arrived: Optional[float] = None) -> bool:
+        """Cancel one resting or trigger order; with `owner`, only if it belongs to that owner."""
+        if self.admission is not None:
+            self.admission.admit(symbol, True, arrived)
+            try:
+                return await self._cancel(symbol, order_id, owner)
+            finally:
+                self.admission.done(symbol)
+        return await self._cancel(symbol, order_id, owner)
+
+    def _cancel_lane(self, symbol: str):
+        lock = self.locks[symbol]
+        return lock.priority if self.cancel_priority else lock
+
+    async def _cancel(self, symbol: str, order_id: str, owner: Optional[str]) -> bool:
+        t0 = time.perf_counter()
+        async with self._cancel_lane(symbol):
+            self.lock_waits["cancel"].append(time.perf_counter() - t0)
+            b = self._known(symbol)
+            if b is not None and owner is not None:
+                o = b.bids.get(order_id) or b.asks.get(order_id)
+                if o is not None and o.owner != owner:
+                    return False
+            ok = b is not None and self._remove_resting(b, order_id) is not None
             if not ok:
-                # maybe it is a trigger order
-                lst = self.triggers.get(symbol, [])
-                n = len(lst)
-                lst = [o for o in lst if o.order_id != order_id]
-                ok = (len(lst) != n)
-                self.triggers[symbol] = lst
+                # maybe it is a trigger order (or a market order waiting for an uncross)
+                for pending in (self.triggers, self.auction_markets):
+                    lst = pending.get(symbol, [])
+                    n = len(lst)
+                    lst = [o for o in lst if o.order_id != order_id or (owner is not None and o.owner != owner)]
+                    if len(lst) != n:
+                        pending[symbol] = lst
+                        self._cancelled(symbol, order_id)
+                        ok = True
+                        break
             if ok:
                 self._emit_md(symbol)
             return ok
 
+    async def amend(self, symbol: str, order_id: str, quantity: Decimal, owner: Optional[str] = None,
+                    arrived: Optional[float] = None) -> bool:
+        """
+        Reduce a resting order's remaining quantity to `quantity`, keeping its time priority.
+        Goes through the cancel lane. False if the order is not resting (or not `owner`'s);
+        ValueError unless 0 < quantity < remaining.
+        """
+        if quantity <= 0:
+            raise ValueError("Amended quantity must be positive (cancel instead)")
+        if self.admission is not None:
+            self.admission.admit(symbol, True, arrived)
+            try:
+                return await self._amend(symbol, order_id, quantity, owner)
+            finally:
+                self.admission.done(symbol)
+        return await self._amend(symbol, order_id, quantity, owner)
+
+    async def _amend(self, symbol: str, order_id: str, quantity: Decimal, owner: Optional[str]) -> bool:
+        t0 = time.perf_counter()
+        async with self._cancel_lane(symbol):
+            self.lock_waits["cancel"].append(time.perf_counter() - t0)
+            b = self._known(symbol)
+            o = (b.bids.get(order_id) or b.asks.get(order_id)) if b is not None else None
+            if o is None or (owner is not None and o.owner != owner):
+                return False
+            if quantity >= o.quantity:
+                raise ValueError("Amend can only reduce the remaining quantity")
+            gone = o.quantity - quantity
+            (b.bids if o.side == "buy" else b.asks).reduce_order(order_id, quantity)
+            if self.risk is not None:
+                self.risk.on_reduce(o, gone)
+            if self.registry is not None:
+                self.registry.on_reduce(order_id, gone)
+            if self.audit is not None:
+                self.audit.amend(symbol, order_id, quantity)
+            self._emit_md(symbol)
+            return True
+
+    def lock_wait_stats(self) -> Dict[str, dict]:
+        """Recent symbol-lock waits (µs) of submits ("new") and cancels / amends ("cancel")."""
+        return {lane: wait_summary(w) for lane, w in self.lock_waits.items()}
+
+    async def mass_cancel(self, symbol: str, side: Optional[str] = None,
+                          price_range: Optional[Tuple[Optional[Decimal], Optional[Decimal]]] = None,
+                          owner: Optional[str] = None) -> List[str]:
+        """
+        Cancel every resting order on `symbol` matching all given filters, under one lock
+        acquisition and with a single md update. Pending trigger orders are included unless
+        a price_range is given (the range applies to resting limit prices only).
+        Returns the cancelled order ids. Takes the cancel lane, like single cancels.
+        """
+        if self._known(symbol) is None and not self.triggers.get(symbol) and not self.auction_markets.get(symbol):
+            return []  # nothing there; and no lock entry for an unknown symbol
+        t0 = time.perf_counter()
+        async with self._cancel_lane(symbol):
+            self.lock_waits["cancel"].append(time.perf_counter() - t0)
+            return self._mass_cancel_locked(symbol, side, price_range, owner)
+
+    def _mass_cancel_locked(self, symbol, side, price_range, owner) -> List[str]:
+        cancelled: List[str] = []
+        book = self._known(symbol)
+        if book is not None:
+            for s, plb in (("buy", book.bids), ("sell", book.asks)):
+                if side is None or side == s:
+                    removed = plb.remove_many(plb.select(owner, price_range))
+                    if self.risk is not None:
+                        self.risk.on_remove(removed)
+                    cancelled += [o.order_id for o in removed]
+        for pending in (self.triggers, self.auction_markets):
+            lst = pending.get(symbol)
+            if lst and price_range is None:
+                keep = []
+                for o in lst:
+                    if (side is None or o.side == side) and (owner is None or o.owner == owner):
+                        cancelled.append(o.order_id)
+                    else:
+                        keep.append(o)
+                pending[symbol] = keep
+        if cancelled:
+            for oid in cancelled:
+                self._cancelled(symbol, oid)
+            self._emit_md(symbol)
+        return cancelled
+
+    async def cancel_owner(self, owner: str) -> Dict[str, List[str]]:
+        """Kill switch: cancel all of `owner`'s resting and trigger orders on every symbol."""
+        out: Dict[str, List[str]] = {}
+        asleep = {s for s, owners in self.hibernated.items() if owners is None or owner in owners}
+        for symbol in set(self.books) | set(self.triggers) | set(self.auction_markets) | asleep:
+            book = self._known(symbol)
+            has_resting = book is not None and (owner in book.bids.by_owner or owner in book.asks.by_owner)
+            if not has_resting and not any(o.owner == owner for pending in (self.triggers, self.auction_markets)
+                                           for o in pending.get(symbol, ())):
+                continue
+            t0 = time.perf_counter()
+            async with self._cancel_lane(symbol):
+                self.lock_waits["cancel"].append(time.perf_counter() - t0)
+                ids = self._mass_cancel_locked(symbol, None, None, owner)
+            if ids:
+                out[symbol] = ids
+        return out
+
+
+    # ---------- GTD / GTT expiry ----------
+
+    async def expire_due(self, now_ns: Optional[int] = None) -> int:
+        """Cancel every resting and trigger order whose expiry has passed; one md update per touched symbol."""
+        fired = self.expiry.advance(time.time_ns() if now_ns is None else now_ns)
+        if not fired:
+            return 0
+        by_symbol: Dict[str, List[str]] = defaultdict(list)
+        for symbol, order_id in fired:
+            by_symbol[symbol].append(order_id)
+        expired = 0
+        for symbol, ids in by_symbol.items():
+            if symbol not in self.books and symbol not in self.hibernated and not self.triggers.get(symbol):
+                continue
+            async with self.locks[symbol]:
+                book = self._known(symbol)
+                n = 0
+                rest = set(ids)
+                if book is not None:
+                    for oid in ids:
+                        # already filled / cancelled orders are simply gone (lazy timer cancel)
+                        if self._remove_resting(book, oid, "expired") is not None:
+                            n += 1
+                            rest.discard(oid)
+                    if n:
+                        self._emit_md(symbol)
+                pending = self.triggers.get(symbol)
+                if rest and pending:
+                    keep = [o for o in pending if o.order_id not in rest]
+                    if len(keep) < len(pending):
+                        for o in pending:
+                            if o.order_id in rest:
+                                self._cancelled(symbol, o.order_id, "expired")
+                        self.triggers[symbol] = keep
+                        n += len(pending) - len(keep)
+                expired += n
+        return expired
+
+    async def run_expiry(self, interval_s: float = 0.01):
+        """Background task: sweep the timer wheel every `interval_s`."""
+        while True:
+            await asyncio.sleep(interval_s)
+            await self.expire_due()
 
     def snapshot(self, symbol: str) -> dict:
-        b = self._book(symbol)
-        d = b.depth(10)
-        return {
+        b = self._known(symbol)  # unknown symbols get an empty book view, not a new book
+        d = b.depth(10) if b is not None else None
+        snap = {
             "timestamp": datetime.datetime.utcnow().isoformat(timespec="microseconds") + "Z",
             "symbol": symbol,
-            "bids": [[ser_decimal(p), ser_decimal(q)] for p,q in d.bids],
-            "asks": [[ser_decimal(p), ser_decimal(q)] for p,q in d.asks],
+            "bids": [[ser_decimal(p), ser_decimal(q)] for p,q in d.bids] if d else [],
+            "asks": [[ser_decimal(p), ser_decimal(q)] for p,q in d.asks] if d else [],
         }
+        if self.checksums:
+            snap["seq"] = self.md_seq.get(symbol, 0)
+            snap["checksum"] = b.checksum() if b is not None else 0
+        return snap
+
+    def md_snapshot(self, symbol: str) -> MdUpdate:
+        """Current top 10 as a feed message carrying the last md seq (binary subscribers start from it)."""
+        b = self._known(symbol)
+        d = b.depth(10) if b is not None else None
+        return MdUpdate(symbol, self.md_seq.get(symbol, 0), time.time_ns(),
+                        d.bids if d else [], d.asks if d else [],
+                        (b.checksum() if b is not None else 0) if self.checksums else None)
+
+    def quote(self, symbol: str, side: str, qty: Decimal) -> dict:
+        """Market-impact estimate for a `side` market order of `qty` against the current book."""
+        b = self._known(symbol)
+        filled, notional, worst, levels = (
+            self._eligible_side(side, b).sweep(qty) if b is not None else (Decimal("0"), Decimal("0"), None, 0)
+        )
+        return {
+            "symbol": symbol,
+            "side": side,
+            "quantity": ser_decimal(qty),
+            "fillable_qty": ser_decimal(filled),
+            "notional": ser_decimal(notional),
+            "vwap": ser_decimal(notional / filled) if filled > 0 else None,
+            "worst_price": ser_decimal(worst),
+            "levels": levels,
+            "complete": filled >= qty,
+        }
+
+    def book_health(self, symbol: str) -> Optional[dict]:
+        """Level / heap bookkeeping of a resident book (does not wake a hibernated one); None if not resident."""
+        b = self.books.get(symbol)
+        return None if b is None else {"symbol": symbol, **b.health()}
+
+    def recent_trades(self, symbol: str, since_ns: Optional[int] = None, limit: int = 500,
+                      after_seq: Optional[int] = None) -> List[dict]:
+        self._known(symbol)  # a hibernated symbol's tape comes back with its book
+        return self.tape.query(symbol, since_ns, limit, after_seq)
 
     # ---------- Persistence (per symbol) ----------
 
@@ -456,13 +1061,17 @@ class MatchingEngine:
         return os.path.join(self.state_dir, f"orderbook_{symbol}.json")
 
     def save_state(self, symbol: str) -> bool:
-        b = self._book(symbol)
+        b = self._known(symbol)
+        if b is None:
+            return False
         data = {
             "symbol": symbol,
             "bids": [[str(p), [o.to_json() for o in list(b.bids.levels[p])]] for p in b.bids.levels],
             "asks": [[str(p), [o.to_json() for o in list(b.asks.levels[p])]] for p in b.asks.levels],
             "triggers": [o.to_json() for o in self.triggers.get(symbol, [])]
         }
+        if b.checksum() is not None:
+            data["checksum"] = b.checksum()
         with open(self._state_path(symbol), "w", encoding="utf-8") as f:
             json.dump(data, f)
         return True
@@ -473,19 +1082,39 @@ class MatchingEngine:
             return False
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
+        if "checksum" in data and _state_checksum(data) != data["checksum"]:
+            raise ValueError(f"{path}: book checksum mismatch, not loaded")
         # reset
         async with self.locks[symbol]:
-            self.books[symbol] = OrderBook(symbol)
+            old = self._known(symbol)
+            if old is not None and self.risk is not None:
+                self.risk.on_remove(list(old.bids.orders.values()) + list(old.asks.orders.values()))
+            stale = [o.order_id for o in self.triggers.get(symbol, [])]
+            if old is not None:
+                stale += list(old.bids.orders) + list(old.asks.orders)
+            self.books[symbol] = OrderBook(symbol, self.checksums)
             self.triggers[symbol] = []
             b = self._book(symbol)
+            # _rest re-registers expiry timers and risk exposure for the restored orders
             for _, orders in data.get("bids", []):
                 for od in orders:
-                    o = Order.from_json(od)
-                    b.bids.add(o)
+                    self._rest(b, Order.from_json(od))
             for _, orders in data.get("asks", []):
                 for od in orders:
-                    o = Order.from_json(od)
-                    b.asks.add(o)
+                    self._rest(b, Order.from_json(od))
             self.triggers[symbol] = [Order.from_json(od) for od in data.get("triggers", [])]
+            for o in self.triggers[symbol]:
+                if o.expire_ts_ns is not None:
+                    self.expiry.schedule(o.expire_ts_ns, (symbol, o.order_id))
+            reg = self.registry
+            if reg is not None:
+                restored = list(b.bids.orders.values()) + list(b.asks.orders.values()) + self.triggers[symbol]
+                keep = {o.order_id for o in restored}
+                for oid in stale:
+                    if oid not in keep:
+                        reg.on_cancel(oid, "reloaded")
+                for o in restored:
+                    if o.order_id not in reg.live:
+                        reg.on_new(o)
             self._emit_md(symbol)
             return True
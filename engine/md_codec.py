@@ -0,0 +1,173 @@
+# engine/md_codec.py
+"""
+Feed messages for the md / trade broadcasters.
+
+Each update is built once as an `MdUpdate` / `TradeUpdate` holding the raw values;
+the JSON text and the binary frame are encoded lazily, at most once each, and
+shared by every subscriber of that encoding.
+
+Binary frames (little endian, prices / quantities / fees as int64 in units of 1e-8):
+    md     u8 type=1 | u64 seq | u64 ts_ns | u32 checksum | u8 len(symbol) | u16 n_bids | u16 n_asks |
+           symbol | n_bids x (i64 price, i64 qty) | n_asks x (i64 price, i64 qty)
+    trade  u8 type=2 | u64 seq | u64 ts_ns | u8 len(symbol) | u8 side (0 buy, 1 sell) |
+           i64 price | i64 qty | i64 maker_fee | i64 taker_fee |
+           16s trade_id | 16s maker_order_id | 16s taker_order_id (UUID bytes) | symbol
+`seq` counts updates per symbol and feed, starting at 1, so receivers can detect gaps.
+`checksum` is the whole-book checksum after the update (`OrderBook.checksum`; 0 in
+binary / absent in JSON when the engine does not track it), for replicas to verify against.
+
+Fixed-point values are rounded half-even to 1e-8, as the settlement ledger rounds them;
+JSON carries the exact Decimal. An int64 holds magnitudes below 2**63 / 1e8 (about
+9.2e10): an update with a larger value has no binary frame (`binary()` returns None)
+and binary subscribers are sent its JSON text frame instead.
+"""
+from __future__ import annotations
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import List, Optional, Tuple
+import datetime, struct, uuid
+import orjson
+
+SCALE = 10**8
+_DSCALE = Decimal(SCALE)
+MD, TRADE = 1, 2
+_MD_HEAD = struct.Struct("<BQQIBHH")
+_TRADE_HEAD = struct.Struct("<BQQBBqqqq16s16s16s")
+_SIDES = ("buy", "sell")
+_I64_MAX = 2**63 - 1
+_UTC = datetime.timezone.utc
+
+
+def _iso(ts_ns: int) -> str:
+    t = datetime.datetime.fromtimestamp(ts_ns // 1_000_000_000, tz=_UTC)
+    return t.replace(microsecond=ts_ns // 1000 % 1_000_000, tzinfo=None).isoformat(timespec="microseconds") + "Z"
+
+
+_FX: dict = {}  # Decimal -> fixed point; book prices and sizes repeat across updates
+
+
+def to_fixed(x: Decimal, scale: Decimal = _DSCALE) -> int:
+    """`x * scale` rounded half-even: the one fixed-point rule for every binary view of the book."""
+    return int((x * scale).to_integral_value(ROUND_HALF_EVEN))
+
+
+def _fx(x: Decimal) -> int:
+    v = _FX.get(x)
+    if v is None:
+        if len(_FX) >= 1 << 16:
+            _FX.clear()
+        v = to_fixed(x)
+        if not -_I64_MAX <= v <= _I64_MAX:
+            raise OverflowError(f"{x} does not fit the int64 fixed-point range")
+        _FX[x] = v
+    return v
+
+
+def _uuid(s: str) -> bytes:
+    return bytes.fromhex(s.replace("-", ""))  # 4x faster than uuid.UUID(s).bytes
+
+
+class _Lazy:
+    __slots__ = ("_text", "_frame")
+
+    def __init__(self):
+        self._text = None
+        self._frame = None
+
+    def json_text(self) -> str:
+        if self._text is None:
+            self._text = orjson.dumps(self.to_json()).decode()
+        return self._text
+
+    def binary(self) -> Optional[bytes]:
+        """Binary frame, or None when a value is outside the int64 range (send `json_text()`)."""
+        if self._frame is None:
+            try:
+                self._frame = self._encode()
+            except OverflowError:
+                self._frame = b""
+        return self._frame or None
+
+
+class MdUpdate(_Lazy):
+    __slots__ = ("symbol", "seq", "ts_ns", "bids", "asks", "checksum")
+
+    def __init__(self, symbol: str, seq: int, ts_ns: int,
+                 bids: List[Tuple[Decimal, Decimal]], asks: List[Tuple[Decimal, Decimal]],
+                 checksum: Optional[int] = None):
+        super().__init__()
+        self.symbol, self.seq, self.ts_ns, self.bids, self.asks = symbol, seq, ts_ns, bids, asks
+        self.checksum = checksum
+
+    def to_json(self) -> dict:
+        d = {
+            "timestamp": _iso(self.ts_ns),
+            "symbol": self.symbol,
+            "seq": self.seq,
+            "bids": [[format(p, "f"), format(q, "f")] for p, q in self.bids],
+            "asks": [[format(p, "f"), format(q, "f")] for p, q in self.asks],
+        }
+        if self.checksum is not None:
+            d["checksum"] = self.checksum
+        return d
+
+    def _encode(self) -> bytes:
+        sym = self.symbol.encode()
+        levels = [_fx(x) for lvl in self.bids for x in lvl] + [_fx(x) for lvl in self.asks for x in lvl]
+        return (_MD_HEAD.pack(MD, self.seq, self.ts_ns, self.checksum or 0, len(sym), len(self.bids), len(self.asks))
+                + sym + struct.pack(f"<{len(levels)}q", *levels))
+
+
+class TradeUpdate(_Lazy):
+    __slots__ = ("seq", "ts_ns", "trade")
+
+    def __init__(self, seq: int, ts_ns: int, trade):
+        super().__init__()
+        self.seq, self.ts_ns, self.trade = seq, ts_ns, trade
+
+    def to_json(self) -> dict:
+        t = self.trade
+        return {
+            "timestamp": _iso(self.ts_ns),
+            "symbol": t.symbol,
+            "seq": self.seq,
+            "trade_id": t.trade_id,
+            "price": format(t.price, "f"),
+            "quantity": format(t.quantity, "f"),
+            "aggressor_side": t.aggressor_side,
+            "maker_order_id": t.maker_order_id,
+            "taker_order_id": t.taker_order_id,
+            "maker_fee": format(t.maker_fee, "f"),
+            "taker_fee": format(t.taker_fee, "f"),
+        }
+
+    def _encode(self) -> bytes:
+        t = self.trade
+        sym = t.symbol.encode()
+        return _TRADE_HEAD.pack(
+            TRADE, self.seq, self.ts_ns, len(sym), t.aggressor_side == "sell",
+            _fx(t.price), _fx(t.quantity), _fx(t.maker_fee), _fx(t.taker_fee),
+            _uuid(t.trade_id), _uuid(t.maker_order_id), _uuid(t.taker_order_id),
+        ) + sym
+
+
+def decode(frame: bytes) -> dict:
+    """Binary frame -> dict shaped like the JSON message (Decimal values, ts_ns instead of timestamp)."""
+    kind = frame[0]
+    if kind == MD:
+        _, seq, ts, checksum, n, nb, na = _MD_HEAD.unpack_from(frame)
+        off = _MD_HEAD.size
+        symbol = frame[off:off + n].decode()
+        vals = struct.unpack_from(f"<{2 * (nb + na)}q", frame, off + n)
+        lv = [(Decimal(vals[i]) / SCALE, Decimal(vals[i + 1]) / SCALE) for i in range(0, len(vals), 2)]
+        return {"type": "md", "symbol": symbol, "seq": seq, "ts_ns": ts, "checksum": checksum,
+                "bids": lv[:nb], "asks": lv[nb:]}
+    if kind == TRADE:
+        _, seq, ts, n, side, px, qty, mf, tf, tid, mid, kid = _TRADE_HEAD.unpack_from(frame)
+        return {
+            "type": "trade", "symbol": frame[_TRADE_HEAD.size:_TRADE_HEAD.size + n].decode(), "seq": seq, "ts_ns": ts,
+            "trade_id": str(uuid.UUID(bytes=tid)), "price": Decimal(px) / SCALE, "quantity": Decimal(qty) / SCALE,
+            "aggressor_side": _SIDES[side],
+            "maker_order_id": str(uuid.UUID(bytes=mid)), "taker_order_id": str(uuid.UUID(bytes=kid)),
+            "maker_fee": Decimal(mf) / SCALE, "taker_fee": Decimal(tf) / SCALE,
+        }
+    raise ValueError(f"unknown frame type {kind}")
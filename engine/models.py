@@ -81,6 +81,9 @@ def now_ns() -> int:
 def gen_id() -> str:
     return str(uuid.uuid4())
 
+class OrderRejected(ValueError):
+    """Order refused before it reached the book; message is the client-facing reason."""
+
 @dataclass
 class Order:
     symbol: str
@@ -90,9 +93,17 @@ class Order:
     price: Optional[Decimal] = None  # required for limit / ioc / fok / stop_limit
     # Bonus trigger fields (for stop/take-profit):
     trigger_price: Optional[Decimal] = None  # required for stop_market/stop_limit/take_profit
+    # GTD/GTT: resting remainder is cancelled at this wall-clock time (None = good-till-cancel)
+    expire_ts_ns: Optional[int] = None
+    # Account / session the order belongs to (mass cancel, kill switch)
+    owner: Optional[str] = None
+    # Client-chosen id; resubmits with the same (owner, client_order_id) return the original result
+    client_order_id: Optional[str] = None
     # Bookkeeping
     order_id: str = field(default_factory=gen_id)
     ts_ns: int = field(default_factory=now_ns)
+    # Engine cache: fee rate resolved once at submit (not persisted)
+    fee_rate: Optional[Any] = field(default=None, repr=False, compare=False)
 
     def clone_shallow(self, **overrides) -> "Order":
         data = self.__dict__.copy()
@@ -109,6 +120,9 @@ class Order:
             "quantity": str(self.quantity),
             "price": sd(self.price),
             "trigger_price": sd(self.trigger_price),
+            "expire_ts_ns": self.expire_ts_ns,
+            "owner": self.owner,
+            "client_order_id": self.client_order_id,
             "order_id": self.order_id,
             "ts_ns": self.ts_ns,
         }
@@ -123,6 +137,9 @@ class Order:
             quantity=Decimal(str(d["quantity"])),
             price=dec(d.get("price")),
             trigger_price=dec(d.get("trigger_price")),
+            expire_ts_ns=d.get("expire_ts_ns"),
+            owner=d.get("owner"),
+            client_order_id=d.get("client_order_id"),
             order_id=d["order_id"],
             ts_ns=int(d.get("ts_ns") or now_ns()),
         )
@@ -140,6 +157,9 @@ class Trade:
     maker_fee: Decimal = Decimal("0")
     taker_fee: Decimal = Decimal("0")
     ts_ns: int = field(default_factory=now_ns)
+    # Order owners, for settlement (None = anonymous)
+    maker_owner: Optional[str] = None
+    taker_owner: Optional[str] = None
 
     def to_json(self):
         return {
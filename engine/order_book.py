@@ -112,42 +112,144 @@
 from __future__ import annotations
 from decimal import Decimal
 from collections import deque
-import heapq
-from typing import Deque, Dict, Optional, List, Tuple
+from bisect import bisect_left, bisect_right
+import heapq, time, zlib
+from typing import Deque, Dict, Iterable, Optional, List, Set, Tuple
 from .models import Order, BBO, DepthSnapshot
 
+ZERO = Decimal("0")
+_MASK = 0xFFFFFFFF
+
+
+def level_crc(side: str, price: Decimal, qty: Decimal) -> int:
+    # canonical text, so 1.50 and 1.5 (e.g. after a JSON round trip) hash alike
+    return zlib.crc32(f"{side}:{price.normalize():f}:{qty.normalize():f}".encode())
+
+
+def levels_checksum(side: str, levels: Iterable[Tuple[Decimal, Decimal]]) -> int:
+    """From-scratch checksum of one side given (price, total qty) per level; matches PriceLevelBook.checksum."""
+    return sum(level_crc(side, p, q) for p, q in levels if q > 0) & _MASK
+
 class PriceLevelBook:
     # Maintains FIFO queues per price level and a heap of active price levels.
     # For bids: max-heap via negative prices. For asks: min-heap.
+    #
+    # Depth index: `keys` holds every level with qty > 0 ordered worst -> best
+    # (best at the end, so top-of-book churn only touches the tail), with running
+    # cumulative qty/notional alongside. A mutation at index i only invalidates
+    # cum_*[i:], which is recomputed lazily on the next depth query.
+    #
+    # Emptied levels stay in `levels`/`heap` until they surface at the top (lazy
+    # deletion). Levels that never do (quotes cancelled away from the touch) are swept
+    # by `compact()` once they outnumber the live ones, and their deques are kept on a
+    # free list for the next new level.
+    POOL_MAX = 1024  # spare level deques kept for reuse
+    COMPACT_MIN = 64  # stale levels tolerated regardless of book size
+
     def __init__(self, side: str):
         assert side in ("buy", "sell")
         self.side = side
         self.levels: Dict[Decimal, Deque[Order]] = {}
         self.heap: List[Decimal] = []
         self.qty_at_price: Dict[Decimal, Decimal] = {}
+        self.orders: Dict[str, Order] = {}  # resting order_id -> order (O(1) cancel lookup)
+        self.by_owner: Dict[str, Set[str]] = {}  # owner -> resting order_ids (mass cancel)
+        self.keys: List[Decimal] = []
+        self.cum_qty: List[Decimal] = []
+        self.cum_notional: List[Decimal] = []
+        self._clean = 0  # cum_* valid for indices < _clean
+        self.dirty: Optional[Set[Decimal]] = None  # levels changed since the last checkpoint capture (when tracked)
+        self._pool: List[Deque[Order]] = []
+        self.compactions = 0
+        self.version = 0  # bumped on every level change; derived views (engine.whatif arrays) key on it
+        self.checksum: Optional[int] = None  # sum of level_crc over live levels, mod 2**32 (when tracked)
 
     def _heap_key(self, price: Decimal) -> Decimal:
         return price if self.side == "sell" else -price
 
+    def _depth_key(self, price: Decimal) -> Decimal:
+        # ascending key == ascending priority
+        return price if self.side == "buy" else -price
+
+    def _key_price(self, key: Decimal) -> Decimal:
+        return key if self.side == "buy" else -key
+
+    def _set_qty(self, price: Decimal, new_qty: Decimal):
+        # every level mutation passes through here
+        self.version += 1
+        if self.dirty is not None:
+            self.dirty.add(price)
+        old_qty = self.qty_at_price.get(price, ZERO)
+        if new_qty <= 0:
+            new_qty = ZERO
+        if self.checksum is not None and new_qty != old_qty:
+            # additive, so one level's change is one subtraction and one addition
+            c = self.checksum
+            if old_qty > 0:
+                c -= level_crc(self.side, price, old_qty)
+            if new_qty > 0:
+                c += level_crc(self.side, price, new_qty)
+            self.checksum = c & _MASK
+        self.qty_at_price[price] = new_qty
+        key = self._depth_key(price)
+        if old_qty > 0:
+            i = bisect_left(self.keys, key)
+            if new_qty == 0:
+                del self.keys[i]
+                del self.cum_qty[i]
+                del self.cum_notional[i]
+        elif new_qty > 0:
+            i = bisect_left(self.keys, key)
+            self.keys.insert(i, key)
+            self.cum_qty.insert(i, ZERO)
+            self.cum_notional.insert(i, ZERO)
+        else:
+            return
+        if i < self._clean:
+            self._clean = i
+
+    def _refresh(self):
+        n = len(self.keys)
+        i = self._clean
+        if i >= n:
+            self._clean = n
+            return
+        cq = self.cum_qty[i - 1] if i > 0 else ZERO
+        cn = self.cum_notional[i - 1] if i > 0 else ZERO
+        for j in range(i, n):
+            p = self._key_price(self.keys[j])
+            q = self.qty_at_price[p]
+            cq += q
+            cn += q * p
+            self.cum_qty[j] = cq
+            self.cum_notional[j] = cn
+        self._clean = n
+
     def add(self, order: Order):
         q = self.levels.get(order.price)
         if q is None:
-            self.levels[order.price] = q = deque()
+            if len(self.heap) - len(self.keys) > max(self.COMPACT_MIN, len(self.keys)):
+                self.compact()
+            self.levels[order.price] = q = self._pool.pop() if self._pool else deque()
             heapq.heappush(self.heap, self._heap_key(order.price))
-            self.qty_at_price[order.price] = Decimal("0")
+            self.qty_at_price[order.price] = ZERO
         q.append(order)
-        self.qty_at_price[order.price] += order.quantity
+        self.orders[order.order_id] = order
+        if order.owner is not None:
+            self.by_owner.setdefault(order.owner, set()).add(order.order_id)
+        self._set_qty(order.price, self.qty_at_price[order.price] + order.quantity)
 
     def best_price(self) -> Optional[Decimal]:
         while self.heap:
             key = self.heap[0]
             price = key if self.side == "sell" else -key
             q = self.levels.get(price)
-            if q and self.qty_at_price.get(price, Decimal("0")) > 0:
+            if q and self.qty_at_price.get(price, ZERO) > 0:
                 return price
+            if self.qty_at_price.get(price, ZERO) > 0:
+                self._set_qty(price, ZERO)
             heapq.heappop(self.heap)
-            self.levels.pop(price, None)
-            self.qty_at_price.pop(price, None)
+            self._release(price)
         return None
 
     def pop_best_order(self) -> Optional[Order]:
@@ -159,45 +261,197 @@ class PriceLevelBook:
             o = q[0]
             if o.quantity > 0:
                 return o
-            q.pop()
-        self.qty_at_price[price] = Decimal("0")
-        self.levels.pop(price, None)
+            self._forget(q.popleft())
+        self._set_qty(price, ZERO)
+        self._release(price)
         if self.heap and ((self.side=="sell" and self.heap[0]==price) or (self.side=="buy" and self.heap[0]==-price)):
             heapq.heappop(self.heap)
         return self.pop_best_order()
 
+    def _release(self, price: Decimal):
+        # level is empty and off the depth index; its heap entry is the caller's business
+        q = self.levels.pop(price, None)
+        self.qty_at_price.pop(price, None)
+        if q is not None and len(self._pool) < self.POOL_MAX:
+            q.clear()
+            self._pool.append(q)
+
+    def compact(self) -> int:
+        """Drop every empty level and rebuild the heap from the live ones; returns how many were dropped."""
+        stale = [p for p, q in self.levels.items() if not q or self.qty_at_price.get(p, ZERO) <= 0]
+        for p in stale:
+            if self.qty_at_price.get(p, ZERO) > 0:
+                self._set_qty(p, ZERO)
+            self._release(p)
+        self.heap = [self._heap_key(p) for p in self.levels]
+        heapq.heapify(self.heap)
+        self.compactions += 1
+        return len(stale)
+
+    def track_checksum(self):
+        """Start maintaining `checksum` (computed once from the current levels)."""
+        self.checksum = levels_checksum(self.side, ((self._key_price(k), self.qty_at_price[self._key_price(k)])
+                                                    for k in self.keys))
+
+    def health(self) -> Dict[str, int]:
+        live = len(self.keys)
+        return {
+            "orders": len(self.orders),
+            "live_levels": live,
+            "stale_levels": len(self.heap) - live,
+            "heap_entries": len(self.heap),
+            "pooled_levels": len(self._pool),
+            "compactions": self.compactions,
+        }
+
     def reduce_head(self, price: Decimal, qty: Decimal):
-        self.qty_at_price[price] -= qty
-        if self.qty_at_price[price] <= 0:
-            self.qty_at_price[price] = Decimal("0")
-
-    def remove_order(self, order_id: str) -> bool:
-        for price, q in list(self.levels.items()):
-            for o in list(q):
-                if o.order_id == order_id:
-                    self.qty_at_price[price] -= o.quantity
-                    q.remove(o)
-                    return True
-        return False
+        # caller has already taken `qty` off the head order; drop it once fully filled
+        q = self.levels.get(price)
+        if q and q[0].quantity <= 0:
+            self._forget(q.popleft())
+        self._set_qty(price, self.qty_at_price[price] - qty)
+
+    def _forget(self, o: Order):
+        self.orders.pop(o.order_id, None)
+        if o.owner is not None:
+            ids = self.by_owner.get(o.owner)
+            if ids is not None:
+                ids.discard(o.order_id)
+                if not ids:
+                    del self.by_owner[o.owner]
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self.orders.get(order_id)
+
+    def remove_order(self, order_id: str) -> Optional[Order]:
+        """Remove a resting order by id; returns it (truthy) or None."""
+        o = self.orders.get(order_id)
+        if o is None:
+            return None
+        self._forget(o)
+        lvl = self.levels[o.price]
+        # by identity: deque.remove would call the dataclass __eq__, comparing every field of each order
+        for i, x in enumerate(lvl):
+            if x is o:
+                del lvl[i]  # O(orders at this level)
+                break
+        self._set_qty(o.price, self.qty_at_price[o.price] - o.quantity)
+        return o
+
+    def reduce_order(self, order_id: str, quantity: Decimal) -> Optional[Order]:
+        """Shrink a resting order to `quantity` (0 < quantity < current) in place, keeping its queue position."""
+        o = self.orders.get(order_id)
+        if o is None:
+            return None
+        gone = o.quantity - quantity
+        o.quantity = quantity
+        self._set_qty(o.price, self.qty_at_price[o.price] - gone)
+        return o
+
+    def select(self, owner: Optional[str] = None,
+               price_range: Optional[Tuple[Optional[Decimal], Optional[Decimal]]] = None) -> List[Order]:
+        """Resting orders matching all given filters (price_range bounds inclusive, None = open)."""
+        lo, hi = price_range if price_range is not None else (None, None)
+        if owner is not None:
+            found = [self.orders[oid] for oid in self.by_owner.get(owner, ())]
+            return [o for o in found if (lo is None or o.price >= lo) and (hi is None or o.price <= hi)]
+        if lo is None and hi is None:
+            return list(self.orders.values())
+        # walk only the levels inside the range via the depth index
+        a, b = (lo, hi) if self.side == "buy" else (hi, lo)
+        i = 0 if a is None else bisect_left(self.keys, self._depth_key(a))
+        j = len(self.keys) if b is None else bisect_right(self.keys, self._depth_key(b))
+        out: List[Order] = []
+        for key in self.keys[i:j]:
+            out.extend(self.levels[self._key_price(key)])
+        return out
+
+    def remove_many(self, victims: Iterable[Order]) -> List[Order]:
+        """Bulk remove resting orders: each touched level is rebuilt and re-indexed once."""
+        by_price: Dict[Decimal, Set[str]] = {}
+        removed: List[Order] = []
+        for o in victims:
+            if self.orders.get(o.order_id) is not o:
+                continue
+            self._forget(o)
+            by_price.setdefault(o.price, set()).add(o.order_id)
+            removed.append(o)
+        for price, ids in by_price.items():
+            gone = ZERO
+            kept: Deque[Order] = deque()
+            for o in self.levels[price]:
+                if o.order_id in ids:
+                    gone += o.quantity
+                else:
+                    kept.append(o)
+            self.levels[price] = kept
+            self._set_qty(price, self.qty_at_price[price] - gone)
+        return removed
+
+    def apply_fills(self, fills: Iterable[Tuple[Order, Decimal]]) -> List[Order]:
+        """Take executed qty off resting orders anywhere in the book (auction uncross); returns the fully filled ones."""
+        per_price: Dict[Decimal, Decimal] = {}
+        done: List[Order] = []
+        for o, qty in fills:
+            o.quantity -= qty
+            per_price[o.price] = per_price.get(o.price, ZERO) + qty
+            if o.quantity <= 0:
+                done.append(o)
+        for price, qty in per_price.items():
+            self._set_qty(price, self.qty_at_price[price] - qty)
+        self.remove_many(done)  # their remaining quantity is already zero
+        return done
 
     def aggregate(self, depth: int) -> List[Tuple[Decimal, Decimal]]:
         result = []
-        prices = list(self.levels.keys())
-        prices.sort(reverse=(self.side=="buy"))
-        for p in prices:
-            qty = self.qty_at_price.get(p, Decimal("0"))
-            if qty > 0:
-                result.append((p, qty))
-                if len(result) >= depth:
-                    break
+        for key in reversed(self.keys[-depth:] if depth > 0 else []):
+            p = self._key_price(key)
+            result.append((p, self.qty_at_price[p]))
         return result
 
+    # ---------- Depth queries (O(log L) once the index is fresh) ----------
+
+    def available(self, limit_price: Optional[Decimal] = None) -> Decimal:
+        """Total resting qty at prices a taker limited at `limit_price` could reach (None = whole side)."""
+        if not self.keys:
+            return ZERO
+        self._refresh()
+        total = self.cum_qty[-1]
+        if limit_price is None:
+            return total
+        i = bisect_left(self.keys, self._depth_key(limit_price))
+        return total - (self.cum_qty[i - 1] if i > 0 else ZERO)
+
+    def sweep(self, qty: Decimal) -> Tuple[Decimal, Decimal, Optional[Decimal], int]:
+        """
+        Cost of taking `qty` from the best price outward.
+        Returns (filled_qty, notional, worst_price, levels_consumed).
+        """
+        if not self.keys or qty <= 0:
+            return (ZERO, ZERO, None, 0)
+        self._refresh()
+        n = len(self.keys)
+        total_q = self.cum_qty[-1]
+        total_n = self.cum_notional[-1]
+        if qty >= total_q:
+            return (total_q, total_n, self._key_price(self.keys[0]), n)
+        # deepest level touched: first j with levels j..n-1 holding >= qty
+        j = bisect_right(self.cum_qty, total_q - qty)
+        full_q = total_q - self.cum_qty[j]
+        full_n = total_n - self.cum_notional[j]
+        worst = self._key_price(self.keys[j])
+        return (qty, full_n + (qty - full_q) * worst, worst, n - j)
+
 
 class OrderBook:
-    def __init__(self, symbol: str):
+    def __init__(self, symbol: str, checksum: bool = False):
         self.symbol = symbol
         self.bids = PriceLevelBook("buy")
         self.asks = PriceLevelBook("sell")
+        if checksum:
+            self.bids.track_checksum()
+            self.asks.track_checksum()
+        self.last_access = time.monotonic()  # maintained by the engine when hibernation is on
 
     def best_bid(self):
         return self.bids.best_price()
@@ -208,9 +462,18 @@ class OrderBook:
     def bbo(self) -> BBO:
         bb = self.best_bid()
         ba = self.best_ask()
-        bb_qty = self.bids.qty_at_price.get(bb, Decimal("0")) if bb is not None else Decimal("0")
-        ba_qty = self.asks.qty_at_price.get(ba, Decimal("0")) if ba is not None else Decimal("0")
+        bb_qty = self.bids.qty_at_price.get(bb, ZERO) if bb is not None else ZERO
+        ba_qty = self.asks.qty_at_price.get(ba, ZERO) if ba is not None else ZERO
         return BBO(symbol=self.symbol, best_bid=bb, best_bid_qty=bb_qty, best_ask=ba, best_ask_qty=ba_qty)
 
     def depth(self, d: int = 10) -> DepthSnapshot:
         return DepthSnapshot(symbol=self.symbol, bids=self.bids.aggregate(d), asks=self.asks.aggregate(d))
+
+    def health(self) -> dict:
+        return {"bids": self.bids.health(), "asks": self.asks.health()}
+
+    def checksum(self) -> Optional[int]:
+        """Whole-book checksum (every live level, both sides), or None if not tracked."""
+        if self.bids.checksum is None:
+            return None
+        return (self.bids.checksum + self.asks.checksum) & _MASK
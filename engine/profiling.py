@@ -0,0 +1,250 @@
+# engine/profiling.py
+from __future__ import annotations
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+import cProfile, functools, io, os, pstats, sys, threading, time
+
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler for one thread (normally the event loop).
+    A daemon thread grabs the target's Python stack every `interval_s` and counts
+    identical stacks; output is the collapsed format flamegraph.pl / speedscope read.
+    Cost to the sampled thread is one GIL hand-off per sample.
+    """
+    def __init__(self, thread_id: Optional[int] = None, interval_s: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started_ns = 0
+        self.stopped_ns = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_s: Optional[float] = None):
+        if self.running:
+            raise RuntimeError("sampler already running")
+        self._stop.clear()
+        self.started_ns = time.time_ns()
+        self._thread = threading.Thread(target=self._run, args=(duration_s,), name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.counts
+
+    def _run(self, duration_s: Optional[float]):
+        deadline = None if duration_s is None else time.monotonic() + duration_s
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None and self.thread_id != me:
+                self.counts[_collapse(frame)] += 1
+                self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_ns = time.time_ns()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+    def write_collapsed(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return path
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Hottest leaf frames (self time)."""
+        leaves: Counter = Counter()
+        for stack, c in self.counts.items():
+            leaves[stack.rsplit(";", 1)[-1]] += c
+        return leaves.most_common(n)
+
+
+def _frame_name(f) -> str:
+    code = f.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+# Cost buckets for attributing cProfile self-time on the submit/cancel path.
+# Decimal arithmetic runs in C without call events, so it lands in the self-time of
+# the Python function doing the math (mostly `_match` and the depth index).
+_BUCKETS: Dict[str, str] = {
+    "_match": "matching+decimal",
+    "_crossable": "matching+decimal",
+    "_best_maker_price": "matching+decimal",
+    "_sweep_available": "matching+decimal",
+    "submit": "matching+decimal",
+    "_submit": "matching+decimal",
+    "_book": "matching+decimal",
+    "_fire_triggers": "matching+decimal",
+    "_make_trade": "matching+decimal",
+    "_rest": "matching+decimal",
+    "_accepted": "matching+decimal",
+    "_cancelled": "matching+decimal",
+    "_cancel": "matching+decimal",
+    "_fee_rate": "matching+decimal",
+    "now_ns": "matching+decimal",
+    "__init__ (models.py)": "matching+decimal",
+    "clone_shallow": "matching+decimal",
+    "_risk_check": "risk",
+    "_submit_once": "dedup",
+    "best_price": "heap",
+    "pop_best_order": "heap",
+    "<built-in method _heapq.heappush>": "heap",
+    "<built-in method _heapq.heappop>": "heap",
+    "_set_qty": "depth index",
+    "_refresh": "depth index",
+    "_key_price": "depth index",
+    "_depth_key": "depth index",
+    "<built-in method _bisect.bisect_left>": "depth index",
+    "<built-in method _bisect.bisect_right>": "depth index",
+    "available": "depth index",
+    "add": "depth index",
+    "reduce_head": "depth index",
+    "_release (order_book.py)": "depth index",
+    "remove_order": "cancel scan",
+    "_remove_resting": "cancel scan",
+    "_forget": "cancel scan",
+    "remove_many": "cancel scan",
+    "select": "cancel scan",
+    "_emit_md": "md emission",
+    "_emit_trade": "md emission",
+    "depth": "md emission",
+    "aggregate": "md emission",
+    "record": "md emission",
+    "append (trade_tape.py)": "md emission",
+    "__init__ (trade_tape.py)": "md emission",
+    "__init__ (md_codec.py)": "md emission",  # feed messages; encoding happens in the subscribers
+    "create_task": "md emission",
+    "level_crc": "checksum",
+    "checksum": "checksum",
+    "<built-in method zlib.crc32>": "checksum",
+    "<method 'normalize' of 'decimal.Decimal' objects>": "checksum",
+    "uuid4": "ids",
+    "__str__ (uuid.py)": "ids",
+    "<built-in method posix.urandom>": "ids",
+}
+# optional engine components, attributed whole by module
+_MODULES = {"uuid.py": "ids", "risk.py": "risk", "registry.py": "registry", "audit.py": "audit",
+            "dedup.py": "dedup", "fees.py": "fees", "admission.py": "admission"}
+
+def _bucket(file: str, name: str) -> str:
+    base = os.path.basename(file)
+    return (_BUCKETS.get(f"{name} ({base})") or _BUCKETS.get(name)
+            or _MODULES.get(base)
+            or ("asyncio" if "asyncio" in file else None)
+            or "other")
+
+
+class _Stepped:
+    # Drives a coroutine by hand so the profiler can be switched on around each step.
+    __slots__ = ("owner", "coro")
+
+    def __init__(self, owner: "EngineProfiler", coro):
+        self.owner = owner
+        self.coro = coro
+
+    def __await__(self):
+        coro, step = self.coro, self.owner._step
+        send, arg = coro.send, None
+        while True:
+            try:
+                yielded = step(send, arg)
+            except StopIteration as e:
+                return e.value
+            try:
+                arg = yield yielded
+                send = coro.send
+            except GeneratorExit:  # close(): shut the coroutine down too, nothing left to profile
+                coro.close()
+                raise
+            except BaseException as e:  # cancellation etc.: deliver it inside the step
+                send, arg = coro.throw, e
+
+
+class EngineProfiler:
+    """
+    Opt-in cProfile around MatchingEngine.submit / cancel (benchmarks, not production).
+    Wraps the bound methods on one engine instance; `detach()` restores them.
+    The profiler is on only while a wrapped call's own coroutine runs, step by step,
+    so time other tasks get while it awaits the symbol lock is not charged to it and
+    concurrent submits are attributed correctly.
+    """
+    def __init__(self, engine, methods: Tuple[str, ...] = ("submit", "cancel")):
+        self.engine = engine
+        self.prof = cProfile.Profile()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._depth = 0  # wrapped coroutine steps currently running (nested calls)
+        self._orig: Dict[str, Optional[Callable]] = {}
+        for name in methods:
+            self._orig[name] = vars(engine).get(name)  # None -> plain class method
+            setattr(engine, name, self._wrap(name, getattr(engine, name)))
+
+    def _wrap(self, name: str, fn):
+        calls = self.calls
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return await _Stepped(self, fn(*args, **kwargs))
+        return wrapper
+
+    def _step(self, send, arg):
+        if self._depth == 0:
+            self.prof.enable()
+        self._depth += 1
+        try:
+            return send(arg)
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self.prof.disable()
+
+    def detach(self):
+        for name, orig in self._orig.items():
+            if orig is None:
+                delattr(self.engine, name)
+            else:
+                setattr(self.engine, name, orig)
+        self._orig.clear()
+
+    def stats(self) -> pstats.Stats:
+        return pstats.Stats(self.prof, stream=io.StringIO())
+
+    def dump(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.prof.dump_stats(path)
+        return path
+
+    def attribution(self) -> Dict[str, float]:
+        """
+        Self-time seconds per cost bucket: matching+decimal, heap, depth index, cancel scan,
+        md emission, checksum, ids, the optional components (risk, registry, audit, dedup,
+        fees, admission), then asyncio and other.
+        """
+        out: Dict[str, float] = defaultdict(float)
+        for (file, _line, name), (_cc, _nc, tt, _ct, _callers) in self.stats().stats.items():
+            out[_bucket(file, name)] += tt
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+    def report(self, n: int = 25, sort: str = "tottime") -> str:
+        s = io.StringIO()
+        pstats.Stats(self.prof, stream=s).sort_stats(sort).print_stats(n)
+        return s.getvalue()
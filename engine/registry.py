@@ -0,0 +1,153 @@
+# engine/registry.py
+from __future__ import annotations
+from bisect import bisect_right
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import itertools, time
+
+from .models import Order
+
+ZERO = Decimal("0")
+TERMINAL = frozenset(("filled", "cancelled", "triggered"))
+
+
+class OrderState:
+    __slots__ = ("seq", "order_id", "client_order_id", "owner", "symbol", "side", "order_type",
+                 "price", "trigger_price", "quantity", "filled_qty", "filled_notional",
+                 "status", "reason", "child_order_id", "created_ns", "updated_ns")
+
+    def __init__(self, seq: int, o: Order):
+        self.seq = seq
+        self.order_id = o.order_id
+        self.client_order_id = o.client_order_id
+        self.owner = o.owner
+        self.symbol = o.symbol
+        self.side = o.side
+        self.order_type = o.order_type
+        self.price = o.price
+        self.trigger_price = o.trigger_price
+        self.quantity = o.quantity
+        self.filled_qty = ZERO
+        self.filled_notional = ZERO
+        self.status = "new"
+        self.reason: Optional[str] = None
+        self.child_order_id: Optional[str] = None
+        self.created_ns = self.updated_ns = time.time_ns()
+
+    def to_json(self) -> dict:
+        def sd(x):
+            return None if x is None else format(x, "f")
+        return {
+            "order_id": self.order_id,
+            "client_order_id": self.client_order_id,
+            "owner": self.owner,
+            "symbol": self.symbol,
+            "side": self.side,
+            "order_type": self.order_type,
+            "price": sd(self.price),
+            "trigger_price": sd(self.trigger_price),
+            "quantity": sd(self.quantity),
+            "filled_qty": sd(self.filled_qty),
+            "remaining_qty": sd(self.quantity - self.filled_qty),
+            "avg_price": sd(self.filled_notional / self.filled_qty) if self.filled_qty > 0 else None,
+            "status": self.status,
+            "reason": self.reason,
+            "child_order_id": self.child_order_id,
+            "created_ns": self.created_ns,
+            "updated_ns": self.updated_ns,
+            "seq": self.seq,
+        }
+
+
+class OrderRegistry:
+    """
+    Status of every order the engine has accepted.
+    Live orders are indexed by id and, per owner, in submission order (a sorted seq
+    list with lazy deletion) for paged open-order listings. Terminal orders move to a
+    bounded FIFO archive, so memory tracks the open book plus `archive_size`.
+    """
+    def __init__(self, archive_size: int = 100_000):
+        self.archive_size = archive_size
+        self.live: Dict[str, OrderState] = {}
+        self.archive: "OrderedDict[str, OrderState]" = OrderedDict()
+        self._owner_seqs: Dict[Optional[str], List[int]] = {}
+        self._owner_ids: Dict[Optional[str], List[str]] = {}
+        self._owner_dead: Dict[Optional[str], int] = {}
+        self._seq = itertools.count(1)
+
+    def get(self, order_id: str) -> Optional[OrderState]:
+        return self.live.get(order_id) or self.archive.get(order_id)
+
+    # ---------- Engine hooks ----------
+
+    def on_new(self, o: Order):
+        st = self.live[o.order_id] = OrderState(next(self._seq), o)
+        self._owner_seqs.setdefault(o.owner, []).append(st.seq)
+        self._owner_ids.setdefault(o.owner, []).append(o.order_id)
+
+    def on_fill(self, order_id: str, qty: Decimal, notional: Decimal):
+        st = self.live.get(order_id)
+        if st is None:
+            return
+        st.filled_qty += qty
+        st.filled_notional += notional
+        st.updated_ns = time.time_ns()
+        if st.filled_qty >= st.quantity:
+            self._finish(st, "filled")
+        else:
+            st.status = "partially_filled"
+
+    def on_cancel(self, order_id: str, reason: str = "cancelled"):
+        st = self.live.get(order_id)
+        if st is not None:
+            st.reason = reason
+            self._finish(st, "cancelled")
+
+    def on_reduce(self, order_id: str, qty: Decimal):
+        st = self.live.get(order_id)
+        if st is not None:
+            st.quantity -= qty  # reduce-only amend: the order is smaller, fills so far stand
+            st.updated_ns = time.time_ns()
+
+    def on_triggered(self, order_id: str, child_order_id: str):
+        st = self.live.get(order_id)
+        if st is not None:
+            st.child_order_id = child_order_id
+            self._finish(st, "triggered")
+
+    def _finish(self, st: OrderState, status: str):
+        st.status = status
+        st.updated_ns = time.time_ns()
+        del self.live[st.order_id]
+        self.archive[st.order_id] = st
+        if len(self.archive) > self.archive_size:
+            self.archive.popitem(last=False)
+        owner = st.owner
+        dead = self._owner_dead[owner] = self._owner_dead.get(owner, 0) + 1
+        ids = self._owner_ids[owner]
+        if dead > 64 and dead * 2 > len(ids):
+            keep = [i for i, oid in enumerate(ids) if oid in self.live]
+            self._owner_ids[owner] = [ids[i] for i in keep]
+            seqs = self._owner_seqs[owner]
+            self._owner_seqs[owner] = [seqs[i] for i in keep]
+            self._owner_dead[owner] = 0
+
+    # ---------- Queries ----------
+
+    def open_orders(self, owner: Optional[str], symbol: Optional[str] = None,
+                    after: int = 0, limit: int = 100) -> Tuple[List[OrderState], Optional[int]]:
+        """Live orders of `owner` in submission order after seq `after`; returns (page, next cursor or None)."""
+        seqs = self._owner_seqs.get(owner)
+        if not seqs:
+            return [], None
+        ids = self._owner_ids[owner]
+        out: List[OrderState] = []
+        for i in range(bisect_right(seqs, after), len(seqs)):
+            st = self.live.get(ids[i])
+            if st is None or (symbol is not None and st.symbol != symbol):
+                continue
+            if len(out) == limit:
+                return out, out[-1].seq
+            out.append(st)
+        return out, None
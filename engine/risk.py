@@ -0,0 +1,147 @@
+# engine/risk.py
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from .models import Order, OrderRejected
+
+ZERO = Decimal("0")
+
+
+class RiskError(OrderRejected):
+    """Order rejected by a pre-trade check; message is the client-facing reason."""
+
+
+@dataclass
+class Account:
+    owner: str
+    balance: Decimal = ZERO                      # quote currency
+    max_order_qty: Optional[Decimal] = None
+    max_open_notional: Optional[Decimal] = None
+    open_notional: Decimal = ZERO                # resting orders, both sides
+    reserved: Decimal = ZERO                     # resting buy notional held against balance
+
+    @property
+    def available(self) -> Decimal:
+        return self.balance - self.reserved
+
+    def to_json(self) -> Dict[str, str]:
+        def sd(x):
+            return None if x is None else format(x, "f")
+        return {
+            "owner": self.owner,
+            "balance": sd(self.balance),
+            "available": sd(self.available),
+            "open_notional": sd(self.open_notional),
+            "reserved": sd(self.reserved),
+            "max_order_qty": sd(self.max_order_qty),
+            "max_open_notional": sd(self.max_open_notional),
+        }
+
+
+class RiskManager:
+    """
+    Per-account exposure kept current by the engine (rest / fill / cancel hooks), so
+    the pre-trade check is a handful of dict lookups and Decimal compares.
+    Orders without an owner, or whose owner has no account, pass unless `strict`.
+    """
+    def __init__(self, strict: bool = False):
+        self.strict = strict
+        self.accounts: Dict[str, Account] = {}
+        # resting order_id -> [account, side, price, open qty]
+        self.resting: Dict[str, list] = {}
+        self.rejects = 0
+
+    def account(self, owner: str) -> Account:
+        a = self.accounts.get(owner)
+        if a is None:
+            self.accounts[owner] = a = Account(owner)
+        return a
+
+    def configure(self, owner: str, balance: Optional[Decimal] = None,
+                  max_order_qty: Optional[Decimal] = None, max_open_notional: Optional[Decimal] = None) -> Account:
+        a = self.account(owner)
+        if balance is not None:
+            a.balance = balance
+        if max_order_qty is not None:
+            a.max_order_qty = max_order_qty
+        if max_open_notional is not None:
+            a.max_open_notional = max_open_notional
+        return a
+
+    # ---------- Pre-trade ----------
+
+    def check(self, o: Order, est_notional: Optional[Decimal] = None):
+        """
+        Raise RiskError if `o` breaches its account's limits. Limit and trigger orders are
+        priced at their own price; a market order at `est_notional`, the cost of sweeping
+        its quantity through the opposite side (`PriceLevelBook.sweep`).
+        """
+        a = self.accounts.get(o.owner) if o.owner is not None else None
+        if a is None:
+            if self.strict:
+                self._reject("unknown account")
+            return
+        if a.max_order_qty is not None and o.quantity > a.max_order_qty:
+            self._reject("max order size exceeded")
+        px = o.price if o.price is not None else o.trigger_price
+        if px is not None:
+            notional = o.quantity * px
+        elif est_notional is not None:
+            notional = est_notional
+        else:
+            return  # nothing to price it against
+        if a.max_open_notional is not None and a.open_notional + notional > a.max_open_notional:
+            self._reject("max open notional exceeded")
+        if o.side == "buy" and notional > a.available:
+            self._reject("insufficient balance")
+
+    def _reject(self, reason: str):
+        self.rejects += 1
+        raise RiskError(reason)
+
+    # ---------- Engine hooks ----------
+
+    def on_rest(self, o: Order):
+        a = self.accounts.get(o.owner) if o.owner is not None else None
+        if a is None:
+            return
+        notional = o.quantity * o.price
+        a.open_notional += notional
+        if o.side == "buy":
+            a.reserved += notional
+        self.resting[o.order_id] = [a, o.side, o.price, o.quantity]
+
+    def _release(self, r: list, qty: Decimal):
+        a, side, price, _ = r
+        notional = qty * price
+        a.open_notional -= notional
+        if side == "buy":
+            a.reserved -= notional
+
+    def on_fill(self, o: Order, qty: Decimal, price: Decimal):
+        r = self.resting.get(o.order_id)
+        if r is not None:
+            self._release(r, qty)
+            r[3] -= qty
+            if r[3] <= 0:
+                del self.resting[o.order_id]
+            a = r[0]
+        else:
+            a = self.accounts.get(o.owner) if o.owner is not None else None
+            if a is None:
+                return
+        a.balance += -qty * price if o.side == "buy" else qty * price
+
+    def on_reduce(self, o: Order, qty: Decimal):
+        r = self.resting.get(o.order_id)
+        if r is not None:
+            self._release(r, qty)
+            r[3] -= qty
+
+    def on_remove(self, orders: List[Order]):
+        for o in orders:
+            r = self.resting.pop(o.order_id, None)
+            if r is not None:
+                self._release(r, r[3])
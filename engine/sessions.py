@@ -0,0 +1,56 @@
+# engine/sessions.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List
+import itertools
+
+
+@dataclass
+class Session:
+    owner: str
+    cancel_on_disconnect: bool
+    session_id: int
+    orders_sent: int = 0
+    errors: int = 0  # messages that failed unexpectedly (answered with an error frame)
+    closed: bool = False
+
+
+class SessionRegistry:
+    """
+    Live order sessions (e.g. one per /ws/orders connection), ref-counted per owner.
+    When the owner's last live session closes and any of its sessions asked for
+    cancel-on-disconnect, every resting and trigger order of that owner is pulled in
+    one batched `MatchingEngine.cancel_owner` call (owner index, one lock + one md
+    update per symbol).
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.live: Dict[str, List[Session]] = {}
+        self._ids = itertools.count(1)
+        self._cod: Dict[str, bool] = {}  # owner -> some live session wants cancel-on-disconnect
+
+    def open(self, owner: str, cancel_on_disconnect: bool = True) -> Session:
+        s = Session(owner, cancel_on_disconnect, next(self._ids))
+        self.live.setdefault(owner, []).append(s)
+        if cancel_on_disconnect:
+            self._cod[owner] = True
+        return s
+
+    def count(self, owner: str) -> int:
+        return len(self.live.get(owner, ()))
+
+    async def close(self, s: Session) -> int:
+        """Drop the session; returns how many orders were cancelled because of it."""
+        if s.closed:
+            return 0
+        s.closed = True
+        sessions = self.live.get(s.owner, [])
+        if s in sessions:
+            sessions.remove(s)
+        if sessions:
+            return 0
+        self.live.pop(s.owner, None)
+        if not self._cod.pop(s.owner, False):
+            return 0
+        cancelled = await self.engine.cancel_owner(s.owner)
+        return sum(map(len, cancelled.values()))
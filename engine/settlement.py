@@ -0,0 +1,162 @@
+# engine/settlement.py
+from __future__ import annotations
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Dict, List, Optional
+import asyncio, json, os, time
+
+from .models import Trade
+
+
+def split_symbol(symbol: str):
+    base, _, quote = symbol.partition("-")
+    return base, quote or "QUOTE"
+
+
+class Ledger:
+    """
+    Per-owner asset balances in integer units (1 unit = 1 / `scale` of the asset).
+    Buyer receives base and pays notional + fee in quote; seller the reverse.
+    Each amount is rounded half-even to a unit once, so settlement is exact and
+    order-independent from there on.
+    """
+    def __init__(self, scale: int = 10**8):
+        self.scale = scale
+        self._scale = Decimal(scale)
+        self.balances: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.fees: Dict[str, int] = defaultdict(int)  # collected, per quote asset
+        self.settled = 0
+        self.last_trade_id: Optional[str] = None
+
+    def units(self, x: Decimal) -> int:
+        return int((x * self._scale).to_integral_value(ROUND_HALF_EVEN))
+
+    def amount(self, units: int) -> Decimal:
+        return Decimal(units) / self._scale
+
+    def apply(self, trades: List[Trade]):
+        units, bal, fees = self.units, self.balances, self.fees
+        for t in trades:
+            base, quote = split_symbol(t.symbol)
+            q = units(t.quantity)
+            n = units(t.quantity * t.price)
+            mf, tf = units(t.maker_fee), units(t.taker_fee)
+            if t.aggressor_side == "buy":
+                buyer, seller, buyer_fee, seller_fee = t.taker_owner, t.maker_owner, tf, mf
+            else:
+                buyer, seller, buyer_fee, seller_fee = t.maker_owner, t.taker_owner, mf, tf
+            if buyer is not None:
+                b = bal[buyer]
+                b[base] += q
+                b[quote] -= n + buyer_fee
+                fees[quote] += buyer_fee
+            if seller is not None:
+                s = bal[seller]
+                s[base] -= q
+                s[quote] += n - seller_fee
+                fees[quote] += seller_fee
+        if trades:
+            self.settled += len(trades)
+            self.last_trade_id = trades[-1].trade_id
+
+    def balances_of(self, owner: str) -> Dict[str, str]:
+        return {asset: format(self.amount(u), "f") for asset, u in self.balances.get(owner, {}).items()}
+
+    def to_json(self) -> dict:
+        return {
+            "scale": self.scale,
+            "settled": self.settled,
+            "last_trade_id": self.last_trade_id,
+            "balances": {o: dict(b) for o, b in self.balances.items()},
+            "fees": dict(self.fees),
+        }
+
+    @staticmethod
+    def from_json(d: dict) -> "Ledger":
+        led = Ledger(d.get("scale", 10**8))
+        for owner, b in d.get("balances", {}).items():
+            led.balances[owner].update({a: int(u) for a, u in b.items()})
+        led.fees.update({a: int(u) for a, u in d.get("fees", {}).items()})
+        led.settled = d.get("settled", 0)
+        led.last_trade_id = d.get("last_trade_id")
+        return led
+
+
+class Settlement:
+    """
+    Feeds engine trades to a Ledger off the matching path.
+    `offer` (called from the engine) is a put_nowait into a bounded queue; `run`
+    drains it in batches. If the queue is full the trade goes to an overflow list,
+    and so does every trade after it until the queue has been emptied; the overflow
+    is settled right after the queue. Trades are settled in engine order and nothing
+    is dropped, but `overflows` counts how often the queue was undersized.
+    """
+    def __init__(self, ledger: Optional[Ledger] = None, maxsize: int = 100_000, path: Optional[str] = None):
+        self.ledger = ledger or Ledger()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.overflow: List[Trade] = []
+        self.overflows = 0
+        self.batches = 0
+        self.path = path
+        self.checkpointed_ns = 0
+
+    @classmethod
+    def open(cls, path: str, **kw) -> "Settlement":
+        """Resume from the checkpoint at `path` if there is one."""
+        ledger = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                ledger = Ledger.from_json(json.load(f))
+        return cls(ledger, path=path, **kw)
+
+    def offer(self, t: Trade):
+        if self.overflow:  # older trades are waiting there; queueing this one would overtake them
+            self.overflow.append(t)
+            return
+        try:
+            self.queue.put_nowait(t)
+        except asyncio.QueueFull:
+            self.overflows += 1
+            self.overflow.append(t)
+
+    @property
+    def pending(self) -> int:
+        return self.queue.qsize() + len(self.overflow)
+
+    def drain(self, batch_max: int = 10_000, first: Optional[Trade] = None) -> int:
+        """Settle what is queued right now (up to batch_max from the queue), then the overflow once the queue is empty."""
+        batch = [] if first is None else [first]
+        q = self.queue
+        for _ in range(min(batch_max, q.qsize())):
+            batch.append(q.get_nowait())
+        if self.overflow and q.empty():  # newer than everything that was queued; settled after it
+            batch += self.overflow
+            self.overflow = []
+        self.ledger.apply(batch)
+        if batch:
+            self.batches += 1
+        return len(batch)
+
+    async def run(self, batch_max: int = 10_000):
+        """Background task: wait for trades, settle whatever has accumulated in one batch."""
+        while True:
+            first = await self.queue.get()
+            self.drain(batch_max, first)
+
+    def checkpoint(self, path: Optional[str] = None) -> str:
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.ledger.to_json(), f)
+        os.replace(tmp, path)  # readers never see a half-written checkpoint
+        self.checkpointed_ns = time.time_ns()
+        return path
+
+    async def run_checkpoints(self, interval_s: float = 5.0):
+        last = -1
+        while True:
+            await asyncio.sleep(interval_s)
+            if self.ledger.settled != last:
+                self.checkpoint()
+                last = self.ledger.settled
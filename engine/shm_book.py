@@ -0,0 +1,172 @@
+# engine/shm_book.py
+"""
+Top-of-book table in shared memory for co-located readers.
+
+Layout (little endian):
+    header  64 bytes: magic "MEBOOK01", u32 n_slots, u32 depth, u32 slot_size, i64 scale
+    slot    per symbol, `slot_size` bytes each:
+            u64 seq | u64 ts_ns | 16s symbol | u32 n_bids | u32 n_asks |
+            depth x (i64 price, i64 qty) bids (best first) | depth x (i64 price, i64 qty) asks
+Prices and quantities are fixed point (value * scale, rounded half-even like the binary
+feed, see `md_codec.to_fixed`). With the default
+scale of 1e8 an i64 holds values below about 9.2e10: a larger quantity is saturated to
+the i64 maximum (read it as "at least"), and an update with a larger price is not
+written at all (the slot keeps its previous state, and a symbol gets no slot until its
+first update is written); both are counted on the publisher.
+
+Each slot is a seqlock: the single writer bumps `seq` to odd, writes the body, then
+bumps it to even. A reader copies the slot and accepts the copy only if `seq` was even
+and unchanged across it; otherwise it retries. Readers never block the writer.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+import struct, time
+
+from .md_codec import to_fixed
+
+MAGIC = b"MEBOOK01"
+_HEADER = struct.Struct("<8sIIIq")
+_HEADER_SIZE = 64
+_SEQ = struct.Struct("<Q")
+_I64_MAX = 2**63 - 1
+
+
+def _body(depth: int) -> struct.Struct:
+    return struct.Struct(f"<Q16sII{4 * depth}q")
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Readers must not unlink the writer's segment when they exit.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+    except TypeError:
+        # Older versions always register with the resource tracker (which unlinks at exit);
+        # unregistering afterwards would also drop the writer's entry when the tracker is shared.
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *a, **k: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class ShmBookPublisher:
+    """Writer side; owned by the engine process (`MatchingEngine(book_shm=...)`)."""
+    def __init__(self, name: Optional[str] = None, n_slots: int = 64, depth: int = 5, scale: int = 10**8):
+        self.depth = depth
+        self.scale = Decimal(scale)
+        self.body = _body(depth)
+        self.slot_size = (_SEQ.size + self.body.size + 63) // 64 * 64
+        self.n_slots = n_slots
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=_HEADER_SIZE + n_slots * self.slot_size)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        _HEADER.pack_into(self.buf, 0, MAGIC, n_slots, depth, self.slot_size, scale)
+        self.slots: Dict[str, int] = {}  # symbol -> byte offset
+        self.seqs: Dict[str, int] = {}
+        self.dropped = 0  # updates for symbols beyond n_slots
+        self.saturated = 0  # updates with a quantity clamped to the i64 maximum
+        self.overflows = 0  # updates skipped for a price beyond the i64 range
+
+    def publish(self, symbol: str, bids: Sequence[Tuple[Decimal, Decimal]], asks: Sequence[Tuple[Decimal, Decimal]]):
+        off = self.slots.get(symbol)
+        if off is None and len(self.slots) == self.n_slots:
+            self.dropped += 1
+            return
+        d, sc = self.depth, self.scale
+        bids, asks = bids[:d], asks[:d]
+        vals = [to_fixed(x, sc) for lvl in bids for x in lvl]
+        vals += (0, 0) * (d - len(bids))
+        vals += [to_fixed(x, sc) for lvl in asks for x in lvl]
+        vals += (0, 0) * (d - len(asks))
+        if max(vals) > _I64_MAX:  # never raise here: the book change has already happened
+            if any(v > _I64_MAX for v in vals[0::2]):
+                self.overflows += 1
+                return
+            vals = [min(v, _I64_MAX) for v in vals]
+            self.saturated += 1
+        if off is None:
+            # allocated only once there is something to write: readers stop at the first seq-0 slot
+            off = self.slots[symbol] = _HEADER_SIZE + len(self.slots) * self.slot_size
+            self.seqs[symbol] = 0
+        seq = self.seqs[symbol]
+        buf = self.buf
+        _SEQ.pack_into(buf, off, seq + 1)  # odd: write in progress
+        self.body.pack_into(buf, off + 8, time.time_ns(), symbol.encode()[:16], len(bids), len(asks), *vals)
+        _SEQ.pack_into(buf, off, seq + 2)
+        self.seqs[symbol] = seq + 2
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+@dataclass
+class ShmTopOfBook:
+    symbol: str
+    seq: int
+    ts_ns: int
+    bids: List[Tuple[int, int]]  # (price, qty) fixed point, best first
+    asks: List[Tuple[int, int]]
+    scale: int
+
+    def bbo(self) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        s = self.scale
+        return (Decimal(self.bids[0][0]) / s if self.bids else None,
+                Decimal(self.asks[0][0]) / s if self.asks else None)
+
+
+class ShmBookReader:
+    """Reader side; attach by segment name from any process on the host."""
+    def __init__(self, name: str):
+        self.shm = _attach(name)
+        self.buf = self.shm.buf
+        magic, self.n_slots, self.depth, self.slot_size, self.scale = _HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{name}: not a book segment")
+        self.body = _body(self.depth)
+        self.slots: Dict[str, int] = {}
+        self.retries = 0
+
+    def _find(self, symbol: str) -> Optional[int]:
+        key = symbol.encode()[:16].ljust(16, b"\0")
+        for i in range(self.n_slots):
+            off = _HEADER_SIZE + i * self.slot_size
+            if _SEQ.unpack_from(self.buf, off)[0] == 0:
+                return None  # slots fill in order; the rest are unused
+            if self.buf[off + 16:off + 32] == key:
+                self.slots[symbol] = off
+                return off
+        return None
+
+    def read(self, symbol: str, max_spins: int = 1000) -> Optional[ShmTopOfBook]:
+        """Consistent copy of `symbol`'s slot; None if it was never published (or stayed torn for max_spins)."""
+        off = self.slots.get(symbol)
+        if off is None:
+            off = self._find(symbol)
+            if off is None:
+                return None
+        buf, d = self.buf, self.depth
+        for _ in range(max_spins):
+            s1 = _SEQ.unpack_from(buf, off)[0]
+            if s1 & 1:
+                self.retries += 1
+                continue
+            ts, _, nb, na, *vals = self.body.unpack_from(buf, off + 8)
+            if _SEQ.unpack_from(buf, off)[0] != s1:
+                self.retries += 1
+                continue
+            bids = [(vals[2 * i], vals[2 * i + 1]) for i in range(nb)]
+            asks = [(vals[2 * (d + i)], vals[2 * (d + i) + 1]) for i in range(na)]
+            return ShmTopOfBook(symbol, s1, ts, bids, asks, self.scale)
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
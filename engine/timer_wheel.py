@@ -0,0 +1,86 @@
+# engine/timer_wheel.py
+from __future__ import annotations
+from typing import Any, List, Tuple
+
+
+class TimerWheel:
+    """
+    Hierarchical hashed timer wheel (Varghese & Lauck).
+    Level l has `slots` buckets each spanning slots**l ticks; a timer is filed in the
+    lowest level whose range covers its deadline and is cascaded down one level each
+    time the wheel above it turns over. schedule() is O(1); advance() is O(1)
+    amortized per expired timer plus one step per elapsed tick.
+
+    Deadlines are rounded up to a whole tick, so an item never fires before its deadline
+    (it may fire up to one tick after it).
+
+    Cancellation is lazy: callers check whether a fired item is still live.
+    """
+    def __init__(self, tick_ns: int = 1_000_000, bits: int = 8, levels: int = 4, start_ns: int = 0):
+        self.tick_ns = tick_ns
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = levels
+        self.wheels: List[List[List[Tuple[int, Any]]]] = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+        self.now_tick = start_ns // tick_ns
+        self.due: List[Tuple[int, Any]] = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, deadline_ns: int, item: Any):
+        self.count += 1
+        self._file(-(-deadline_ns // self.tick_ns), item)  # ceil: never early
+
+    def _file(self, tick: int, item: Any):
+        delta = tick - self.now_tick
+        if delta <= 0:
+            self.due.append((tick, item))
+            return
+        level = 0
+        while level < self.levels - 1 and delta >= 1 << (self.bits * (level + 1)):
+            level += 1
+        self.wheels[level][(tick >> (self.bits * level)) & self.mask].append((tick, item))
+
+    def _cascade(self, level: int):
+        slot = (self.now_tick >> (self.bits * level)) & self.mask
+        entries = self.wheels[level][slot]
+        if entries:
+            self.wheels[level][slot] = []
+            for tick, item in entries:
+                self._file(tick, item)
+
+    def advance(self, now_ns: int) -> List[Any]:
+        """Move the wheel to now_ns; return items whose deadline has passed (in tick order)."""
+        target = now_ns // self.tick_ns
+        if self.count == 0:
+            if target > self.now_tick:
+                self.now_tick = target
+            return []
+        fired: List[Any] = []
+        if self.due:
+            fired.extend(item for _, item in self.due)
+            self.due = []
+        bits, mask = self.bits, self.mask
+        while self.now_tick < target and self.count > len(fired):
+            self.now_tick += 1
+            t = self.now_tick
+            if t & mask == 0:
+                # turn over higher wheels first so their timers land in the slots below
+                top = 1
+                while top < self.levels - 1 and (t >> (bits * top)) & mask == 0:
+                    top += 1
+                for level in range(top, 0, -1):
+                    self._cascade(level)
+                if self.due:  # over-ranged timers can land here after a cascade
+                    fired.extend(item for _, item in self.due)
+                    self.due = []
+            slot = self.wheels[0][t & mask]
+            if slot:
+                self.wheels[0][t & mask] = []
+                fired.extend(item for _, item in slot)
+        if self.now_tick < target:
+            self.now_tick = target  # nothing left to fire; jump
+        self.count -= len(fired)
+        return fired
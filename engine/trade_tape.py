@@ -0,0 +1,209 @@
+# engine/trade_tape.py
+from __future__ import annotations
+from array import array
+from decimal import Decimal
+from typing import Dict, List, Optional, Any
+import datetime
+
+from .models import Trade
+
+_SIDE_CODE = {"buy": 1, "sell": -1}
+_SIDE_NAME = {1: "buy", -1: "sell"}
+
+
+class TradeRing:
+    """
+    Bounded ring buffer of trades for one symbol, stored column-wise.
+    The columns grow with the trades until they hold `capacity`, then wrap, so a quiet
+    symbol costs memory for the trades it has, not for the capacity. `shrink` gives
+    it back when the symbol goes idle.
+    Timestamps are kept non-decreasing so time-range lookups are a binary search.
+    Every trade also gets a per-symbol `seq` (1, 2, ...). Seqs of retained trades are
+    contiguous, so they need no column and a seq cursor is O(1). Clamping makes equal
+    timestamps common in bursts, so page by seq, not by ts_ns.
+    """
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.ts = array("q")
+        self.side = array("b")
+        self.price: List[Decimal] = []
+        self.qty: List[Decimal] = []
+        self.trade_id: List[str] = []
+        self.maker_order_id: List[str] = []
+        self.taker_order_id: List[str] = []
+        self.start = 0   # physical index of the oldest trade (0 until the ring wraps)
+        self.size = 0
+        self.total = 0   # trades ever appended = seq of the newest
+        self.last_ts = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, ts_ns: int, price: Decimal, qty: Decimal, side: str,
+               trade_id: str, maker_order_id: str, taker_order_id: str) -> int:
+        # wall clock may step back; clamp so the column stays sorted
+        if ts_ns < self.last_ts:
+            ts_ns = self.last_ts
+        self.last_ts = ts_ns
+        self.total += 1
+        if self.size < self.capacity:  # still growing: start == 0, the columns hold exactly `size`
+            self.ts.append(ts_ns)
+            self.side.append(_SIDE_CODE[side])
+            self.price.append(price)
+            self.qty.append(qty)
+            self.trade_id.append(trade_id)
+            self.maker_order_id.append(maker_order_id)
+            self.taker_order_id.append(taker_order_id)
+            self.size += 1
+            return self.total
+        i = self.start  # full: overwrite the oldest
+        self.start = (self.start + 1) % self.capacity
+        self.ts[i] = ts_ns
+        self.side[i] = _SIDE_CODE[side]
+        self.price[i] = price
+        self.qty[i] = qty
+        self.trade_id[i] = trade_id
+        self.maker_order_id[i] = maker_order_id
+        self.taker_order_id[i] = taker_order_id
+        return self.total
+
+    def rows(self, keep: int) -> List[tuple]:
+        """The newest `keep` trades, oldest first, as (ts_ns, side, price, qty, trade_id, maker, taker)."""
+        out = []
+        for k in range(max(0, self.size - keep), self.size):
+            i = self._phys(k)
+            out.append((self.ts[i], _SIDE_NAME[self.side[i]], self.price[i], self.qty[i],
+                        self.trade_id[i], self.maker_order_id[i], self.taker_order_id[i]))
+        return out
+
+    def shrink(self, keep: int):
+        """Drop all but the newest `keep` trades and release the rest of the columns; seqs are unchanged."""
+        rows = self.rows(keep)
+        self.ts, self.side = array("q"), array("b")
+        self.price, self.qty, self.trade_id, self.maker_order_id, self.taker_order_id = [], [], [], [], []
+        self.start = self.size = 0
+        self._extend(rows)
+
+    @classmethod
+    def restore(cls, capacity: int, total: int, last_ts: int, rows: List[tuple]) -> "TradeRing":
+        """Rebuild a ring from `rows()` output; `total` is the seq of the newest row."""
+        ring = cls(capacity)
+        ring._extend(rows[-capacity:])
+        ring.total, ring.last_ts = total, last_ts
+        return ring
+
+    def _extend(self, rows: List[tuple]):
+        # caller guarantees start == 0 and size + len(rows) <= capacity; seqs are not advanced
+        for ts_ns, side, price, qty, trade_id, maker, taker in rows:
+            self.ts.append(ts_ns)
+            self.side.append(_SIDE_CODE[side])
+            self.price.append(price)
+            self.qty.append(qty)
+            self.trade_id.append(trade_id)
+            self.maker_order_id.append(maker)
+            self.taker_order_id.append(taker)
+        self.size += len(rows)
+
+    def _phys(self, k: int) -> int:
+        return (self.start + k) % self.capacity
+
+    def first_after(self, since_ns: int) -> int:
+        """Logical index of the first trade with ts > since_ns (O(log n))."""
+        lo, hi = 0, self.size
+        ts = self.ts
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts[self._phys(mid)] <= since_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def first_after_seq(self, after_seq: int) -> int:
+        """Logical index of the first trade with seq > after_seq (O(1))."""
+        return min(self.size, max(0, after_seq - (self.total - self.size)))
+
+    def row(self, k: int, symbol: str) -> Dict[str, Any]:
+        i = self._phys(k)
+        ts_ns = self.ts[i]
+        t = datetime.datetime.fromtimestamp(ts_ns / 1e9, tz=datetime.timezone.utc)
+        return {
+            "timestamp": t.replace(tzinfo=None).isoformat(timespec="microseconds") + "Z",
+            "ts_ns": ts_ns,
+            "seq": self.total - self.size + 1 + k,
+            "symbol": symbol,
+            "trade_id": self.trade_id[i],
+            "price": format(self.price[i], "f"),
+            "quantity": format(self.qty[i], "f"),
+            "aggressor_side": _SIDE_NAME[self.side[i]],
+            "maker_order_id": self.maker_order_id[i],
+            "taker_order_id": self.taker_order_id[i],
+        }
+
+
+class TradeTape:
+    """
+    Per-symbol bounded trade history used for recent-trades queries and reconnect backfill.
+    `idle_keep` is how many of its newest trades a symbol keeps across `release` / `restore`.
+    """
+    def __init__(self, capacity: int = 100_000, idle_keep: int = 1_000):
+        self.capacity = capacity
+        self.idle_keep = idle_keep
+        self.rings: Dict[str, TradeRing] = {}
+
+    def record(self, t: Trade) -> int:
+        """Append `t`; returns its per-symbol seq."""
+        ring = self.rings.get(t.symbol)
+        if ring is None:
+            self.rings[t.symbol] = ring = TradeRing(self.capacity)
+        return ring.append(t.ts_ns, t.price, t.quantity, t.aggressor_side,
+                           t.trade_id, t.maker_order_id, t.taker_order_id)
+
+    def query(self, symbol: str, since_ns: Optional[int] = None, limit: int = 500,
+              after_seq: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        after_seq=N   -> up to `limit` trades with seq > N, oldest first. Page forward by
+                         passing the last returned seq; no trade is skipped or repeated.
+        since_ns=X    -> up to `limit` trades with ts > X, oldest first (a time filter;
+                         trades sharing a timestamp can straddle pages, so don't page by it).
+        neither       -> the latest `limit` trades.
+        """
+        ring = self.rings.get(symbol)
+        if ring is None or limit <= 0:
+            return []
+        if after_seq is not None:
+            lo = ring.first_after_seq(after_seq)
+            hi = min(ring.size, lo + limit)
+        elif since_ns is None:
+            lo = max(0, ring.size - limit)
+            hi = ring.size
+        else:
+            lo = ring.first_after(since_ns)
+            hi = min(ring.size, lo + limit)
+        return [ring.row(k, symbol) for k in range(lo, hi)]
+
+    def shrink(self, symbol: str, keep: int):
+        """Keep only the newest `keep` trades of `symbol` in memory (for idle symbols)."""
+        ring = self.rings.get(symbol)
+        if ring is not None:
+            ring.shrink(keep)
+
+    def release(self, symbol: str) -> Optional[tuple]:
+        """Drop `symbol`'s ring; returns (total, last_ts, newest `idle_keep` rows) for `restore`, None if it never traded."""
+        ring = self.rings.pop(symbol, None)
+        if ring is None:
+            return None
+        return ring.total, ring.last_ts, ring.rows(self.idle_keep)
+
+    def restore(self, symbol: str, total: int, last_ts: int, rows: List[tuple]) -> int:
+        """Rebuild a ring from `release` output; returns its last seq."""
+        self.rings[symbol] = TradeRing.restore(self.capacity, total, last_ts, rows)
+        return total
+
+    def last_price(self, symbol: str) -> Optional[Decimal]:
+        ring = self.rings.get(symbol)
+        if ring is None or ring.size == 0:
+            return None
+        return ring.price[ring._phys(ring.size - 1)]
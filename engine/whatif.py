@@ -0,0 +1,126 @@
+# engine/whatif.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import weakref
+import numpy as np
+
+from .order_book import PriceLevelBook
+
+
+@dataclass
+class SideArrays:
+    """One side of a book, best price first (float64; estimates, not exact Decimals)."""
+    prices: np.ndarray
+    qty: np.ndarray
+    cum_qty: np.ndarray       # inclusive running totals
+    cum_notional: np.ndarray
+    version: int              # PriceLevelBook.version these were built from
+
+
+@dataclass
+class WhatIfResult:
+    """Per hypothetical order; NaN where nothing would fill."""
+    filled: np.ndarray
+    notional: np.ndarray
+    vwap: np.ndarray
+    worst_price: np.ndarray
+    levels: np.ndarray        # price levels touched
+    residual: np.ndarray      # quantity left unfilled (cancelled for IOC/market, resting for limit)
+    slippage_bps: np.ndarray  # vwap vs the touch, positive = worse than the touch
+
+    def to_json(self) -> dict:
+        def col(a):
+            return [None if x != x else x for x in a.tolist()]  # NaN -> null
+        return {k: col(getattr(self, k)) for k in
+                ("filled", "notional", "vwap", "worst_price", "levels", "residual", "slippage_bps")}
+
+
+def side_arrays(side: PriceLevelBook) -> SideArrays:
+    keys = side.keys  # worst -> best, live levels only
+    n = len(keys)
+    prices = np.fromiter((float(side._key_price(k)) for k in reversed(keys)), dtype=np.float64, count=n)
+    qa = side.qty_at_price
+    qty = np.fromiter((float(qa[side._key_price(k)]) for k in reversed(keys)), dtype=np.float64, count=n)
+    return SideArrays(prices, qty, np.cumsum(qty), np.cumsum(prices * qty), side.version)
+
+
+def simulate(arrays: SideArrays, taker_side: str, quantities, limit_prices=None) -> WhatIfResult:
+    """
+    Sweep a batch of hypothetical `taker_side` orders against the opposite side in one
+    vectorized pass. `limit_prices` may be None (all market) or hold NaN for market orders.
+    Each order is evaluated alone against the same book; nothing is mutated.
+    Raises ValueError unless quantities and (non-NaN) limit prices are finite and positive.
+    """
+    q = np.asarray(quantities, dtype=np.float64)
+    if not (np.isfinite(q) & (q > 0)).all():
+        raise ValueError("Invalid quantity")
+    if limit_prices is not None:
+        lim = np.asarray(limit_prices, dtype=np.float64)
+        if lim.shape != q.shape:
+            raise ValueError("limit_prices must match quantities")
+        if not (np.isnan(lim) | (np.isfinite(lim) & (lim > 0))).all():
+            raise ValueError("Invalid limit price")
+    m = len(q)
+    p, cq, cn = arrays.prices, arrays.cum_qty, arrays.cum_notional
+    n = len(p)
+    if n == 0:
+        nan = np.full(m, np.nan)
+        return WhatIfResult(np.zeros(m), np.zeros(m), nan, nan.copy(), np.zeros(m, dtype=np.int64), q.copy(), nan.copy())
+    # levels reachable under each limit (prices are monotone best -> worst)
+    if limit_prices is None:
+        reach = np.full(m, n, dtype=np.int64)
+    else:
+        if taker_side == "buy":  # asks ascending: levels priced <= limit
+            reach = np.searchsorted(p, lim, side="right")
+        else:                    # bids descending: levels priced >= limit
+            reach = np.searchsorted(-p, -lim, side="right")
+        reach = np.where(np.isnan(lim), n, reach)
+    cq0 = np.concatenate(([0.0], cq))
+    cn0 = np.concatenate(([0.0], cn))
+    filled = np.minimum(q, cq0[reach])
+    # level where each fill ends: first with cumulative qty >= filled, within cumsum rounding,
+    # so a fill that exactly empties a level ends there
+    tol = max(n, 4) * np.finfo(np.float64).eps * cq[-1]
+    k = np.minimum(np.searchsorted(cq, filled - tol, side="left"), n - 1)
+    notional = cn0[k] + (filled - cq0[k]) * p[k]
+    hit = filled > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(hit, notional / filled, np.nan)
+    worst = np.where(hit, p[k], np.nan)
+    levels = np.where(hit, k + 1, 0)
+    sign = 1.0 if taker_side == "buy" else -1.0
+    slippage = sign * (vwap / p[0] - 1.0) * 1e4
+    return WhatIfResult(filled, np.where(hit, notional, 0.0), vwap, worst, levels, q - filled, slippage)
+
+
+class BookSimulator:
+    """
+    What-if fills for batches of hypothetical orders against an engine's live books.
+    Side arrays are rebuilt only when the side's `version` moved since the last call,
+    so repeated batches against a quiet book cost just the vectorized sweep.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self._cache: "weakref.WeakKeyDictionary[PriceLevelBook, SideArrays]" = weakref.WeakKeyDictionary()
+        self.rebuilds = 0
+
+    def arrays(self, symbol: str, side: str) -> Optional[SideArrays]:
+        """`side` of `symbol`'s book ("buy" = bids, "sell" = asks); None if the symbol has no book."""
+        book = self.engine._known(symbol)
+        if book is None:
+            return None
+        plb = book.bids if side == "buy" else book.asks
+        a = self._cache.get(plb)
+        if a is None or a.version != plb.version:
+            a = self._cache[plb] = side_arrays(plb)
+            self.rebuilds += 1
+        return a
+
+    def simulate(self, symbol: str, taker_side: str, quantities: Sequence[float],
+                 limit_prices: Optional[Sequence[float]] = None) -> WhatIfResult:
+        maker = "sell" if taker_side == "buy" else "buy"
+        a = self.arrays(symbol, maker)
+        if a is None:
+            a = SideArrays(*(np.empty(0),) * 4, version=0)
+        return simulate(a, taker_side, quantities, limit_prices)
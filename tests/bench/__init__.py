@@ -0,0 +1,3 @@
+# tests/bench — benchmark harnesses (not collected by pytest).
+#   python -m tests.bench                    core matching scenarios -> bench_results.json
+#   python -m tests.bench.api_load --help    load test against a local uvicorn
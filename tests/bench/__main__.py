@@ -0,0 +1,80 @@
+# python -m tests.bench [--only a,b] [--scale 0.1] [--out bench_results.json] [--compare old.json] [--profile DIR]
+# Runs each core scenario in its own process (so peak RSS is per scenario) and writes one results file.
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Any, Optional
+
+from tests.bench.common import ROOT, env_info, write_results
+from tests.bench.scenarios import SCENARIOS
+
+
+def run_child(name: str, scale: float, profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "tests.bench.scenarios", name, "--scale", str(scale)]
+    if profile_dir:
+        cmd += ["--profile", os.path.abspath(profile_dir)]
+    p = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if p.returncode != 0:
+        return {"scenario": name, "scale": scale, "error": p.stderr.strip().splitlines()[-1:]}
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def print_row(r: Dict[str, Any]):
+    if "error" in r:
+        print(f"{r['scenario']:<14} ERROR {r['error']}")
+        return
+    for phase, m in r["phases"].items():
+        lat = m["latency"]
+        print(f"{r['scenario']:<14} {phase:<11} {m['ops']:>9,} ops  {m['ops_per_sec']:>10,.0f}/s  "
+              f"p50={lat.get('p50_us', 0):>8.1f}us  p99={lat.get('p99_us', 0):>9.1f}us  "
+              f"rss={r['peak_rss_mb']:.0f}MB")
+    if "profile" in r:
+        total = sum(r["profile"]["self_time_s"].values()) or 1.0
+        parts = ", ".join(f"{k} {v / total:.0%}" for k, v in r["profile"]["self_time_s"].items() if v / total >= 0.01)
+        print(f"{'':<14} profile: {parts}  ({r['profile']['pstats']})")
+
+
+def compare(new: Dict[str, Any], old: Dict[str, Any]):
+    print("\nvs baseline", old.get("env", {}).get("git_rev", "?"))
+    old_by = {r["scenario"]: r for r in old.get("results", [])}
+    for r in new["results"]:
+        o = old_by.get(r["scenario"])
+        if not o or "phases" not in r or "phases" not in o:
+            continue
+        for phase, m in r["phases"].items():
+            om = o["phases"].get(phase)
+            if not om or not om["ops_per_sec"]:
+                continue
+            d_thr = (m["ops_per_sec"] / om["ops_per_sec"] - 1) * 100
+            p99, o99 = m["latency"].get("p99_us"), om["latency"].get("p99_us")
+            d_p99 = f"{(p99 / o99 - 1) * 100:+6.1f}%" if p99 and o99 else "    n/a"
+            print(f"{r['scenario']:<14} {phase:<11} thr {d_thr:+6.1f}%  p99 {d_p99}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Core matching scenario benchmarks")
+    ap.add_argument("--only", default="", help="comma-separated scenario names")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplier on op counts (0.1 for a quick run)")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", default=None, help="previous results file to diff against")
+    ap.add_argument("--profile", metavar="DIR", default=None,
+                    help="cProfile MatchingEngine.submit/cancel; writes DIR/<scenario>.pstats and a cost breakdown")
+    args = ap.parse_args(argv)
+
+    names = [n for n in args.only.split(",") if n] or list(SCENARIOS)
+    results = []
+    for name in names:
+        r = run_child(name, args.scale, args.profile)
+        print_row(r)
+        results.append(r)
+    out = {"benchmark": "core_scenarios", "env": env_info(), "scale": args.scale, "results": results}
+    write_results(args.out, out)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(out, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# tests/bench/api_load.py
+# Load test against the real API: concurrent HTTP order clients plus WS md/trade subscribers.
+#
+#   python -m tests.bench.api_load --http-clients 32 --md-subscribers 200 --symbols 4 \
+#       --mix limit=50,market=10,ioc=10,cancel=25,stop=5 --duration 30 --out results.json
+#
+# Launches `uvicorn app.main:app` on a free port unless --port points at a running server.
+# Custom workloads: --workload package.module:ClassName (subclass of Workload).
+import argparse
+import asyncio
+import datetime
+import importlib
+import random
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
+
+from tests.bench.common import (
+    HOST, HttpConn, free_port, launch_server, stop_server, summarize, env_info, write_results,
+)
+
+Request = Tuple[str, str, str, str, bytes]  # (kind, symbol, method, path, body)
+
+
+class Workload:
+    """
+    Produces requests for one HTTP client. `on_response` lets stateful workloads
+    remember resting order ids (for cancels) etc. One instance per client.
+    """
+    def __init__(self, symbols: List[str], mix: Dict[str, float], route: str, seed: int):
+        self.symbols = symbols
+        self.route = route
+        self.rng = random.Random(seed)
+
+    def next_request(self) -> Request:
+        raise NotImplementedError
+
+    def on_response(self, kind: str, symbol: str, status: int, body: bytes):
+        pass
+
+
+class MixedWorkload(Workload):
+    """Random walk around a mid price with a weighted mix of limit/market/ioc/cancel/stop."""
+    KINDS = ("limit", "market", "ioc", "cancel", "stop")
+
+    def __init__(self, symbols, mix, route, seed):
+        super().__init__(symbols, mix, route, seed)
+        unknown = set(mix) - set(self.KINDS)
+        if unknown:
+            raise ValueError(f"unknown mix kinds: {sorted(unknown)}")
+        self.kinds = [k for k in self.KINDS if mix.get(k, 0) > 0]
+        self.weights = [mix[k] for k in self.kinds]
+        self.mid = {s: 60000 for s in symbols}
+        self.resting: Dict[str, List[str]] = defaultdict(list)
+
+    def _order(self, symbol: str, **kw) -> Request:
+        kw["symbol"] = symbol
+        return ("order", symbol, "POST", self.route, orjson.dumps(kw))
+
+    def next_request(self) -> Request:
+        rng = self.rng
+        sym = rng.choice(self.symbols)
+        kind = rng.choices(self.kinds, self.weights)[0]
+        self.mid[sym] += rng.choice((-1, 0, 1))
+        mid = self.mid[sym]
+        side = rng.choice(("buy", "sell"))
+        qty = f"{rng.randint(1, 20) / 1000:.3f}"
+
+        if kind == "cancel" and self.resting[sym]:
+            ids = self.resting[sym]
+            oid = ids.pop(rng.randrange(len(ids)))
+            return ("cancel", sym, "POST", f"/orders/{oid}/cancel?symbol={sym}", b"")
+        if kind == "market":
+            return self._order(sym, order_type="market", side=side, quantity=qty)
+        if kind == "ioc":
+            px = mid + 5 if side == "buy" else mid - 5
+            return self._order(sym, order_type="ioc", side=side, quantity=qty, price=str(px))
+        if kind == "stop":
+            trig = mid + 20 if side == "buy" else mid - 20
+            return self._order(sym, order_type="stop_market", side=side, quantity=qty, trigger_price=str(trig))
+        # limit (also the fallback for a cancel with nothing to cancel)
+        off = rng.randint(1, 10)
+        px = mid - off if side == "buy" else mid + off
+        return self._order(sym, order_type="limit", side=side, quantity=qty, price=str(px))
+
+    def on_response(self, kind, symbol, status, body):
+        if kind != "order" or status != 200:
+            return
+        d = orjson.loads(body)
+        if d.get("resting"):
+            ids = self.resting[symbol]
+            ids.append(d["resting_order_id"])
+            if len(ids) > 500:
+                del ids[0]
+
+
+WORKLOADS = {"mixed": MixedWorkload}
+
+
+def load_workload(spec: str):
+    if spec in WORKLOADS:
+        return WORKLOADS[spec]
+    mod, _, cls = spec.partition(":")
+    return getattr(importlib.import_module(mod), cls)
+
+
+def parse_mix(s: str) -> Dict[str, float]:
+    out = {}
+    for part in s.split(","):
+        k, _, v = part.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def _iso_to_epoch(ts: str) -> float:
+    return datetime.datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+async def http_client(port: int, wl: Workload, stop_at: float, max_requests: Optional[int],
+                      lat_by_kind: Dict[str, List[float]], counters: Dict[str, int]):
+    conn = await HttpConn.open(port)
+    try:
+        sent = 0
+        while time.perf_counter() < stop_at and (max_requests is None or sent < max_requests):
+            kind, sym, method, path, body = wl.next_request()
+            s = time.perf_counter()
+            status, resp = await conn.request(method, path, body)
+            lat_by_kind[kind].append((time.perf_counter() - s) * 1e6)
+            counters["requests"] += 1
+            if status != 200:
+                counters["errors"] += 1
+            wl.on_response(kind, sym, status, resp)
+            sent += 1
+    finally:
+        conn.close()
+
+
+async def ws_subscriber(port: int, channel: str, symbol: str, stop_at: float,
+                        lags: List[float], counters: Dict[str, int]):
+    import websockets
+    url = f"ws://{HOST}:{port}/ws/{channel}?symbol={symbol}"
+    async with websockets.connect(url, max_size=None) as ws:
+        while True:
+            remaining = stop_at - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            now = time.time()
+            counters[f"{channel}_messages"] += 1
+            counters[f"{channel}_bytes"] += len(raw)
+            msg = orjson.loads(raw)
+            if "timestamp" in msg:
+                lags.append((now - _iso_to_epoch(msg["timestamp"])) * 1e6)
+
+
+async def run(args) -> Dict[str, Any]:
+    proc = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        proc = launch_server(port)
+    try:
+        symbols = [f"{args.symbol_prefix}{i}-USDT" for i in range(args.symbols)]
+        mix = parse_mix(args.mix)
+        wl_cls = load_workload(args.workload)
+
+        counters: Dict[str, int] = defaultdict(int)
+        lat_by_kind: Dict[str, List[float]] = defaultdict(list)
+        md_lag: List[float] = []
+        trade_lag: List[float] = []
+
+        # Subscribers connect (and receive their snapshot) before order flow starts.
+        sub_stop = time.perf_counter() + args.warmup + args.duration + 2.0
+        subs = [asyncio.create_task(ws_subscriber(port, "marketdata", symbols[i % len(symbols)],
+                                                  sub_stop, md_lag, counters))
+                for i in range(args.md_subscribers)]
+        subs += [asyncio.create_task(ws_subscriber(port, "trades", symbols[i % len(symbols)],
+                                                   sub_stop, trade_lag, counters))
+                 for i in range(args.trade_subscribers)]
+        await asyncio.sleep(args.warmup)
+        md_lag.clear()
+        trade_lag.clear()
+
+        per_client = None if args.requests is None else max(1, args.requests // args.http_clients)
+        t0 = time.perf_counter()
+        stop_at = t0 + args.duration
+        await asyncio.gather(*(
+            http_client(port, wl_cls(symbols, mix, args.route, args.seed + k), stop_at, per_client,
+                        lat_by_kind, counters)
+            for k in range(args.http_clients)
+        ))
+        elapsed = time.perf_counter() - t0
+        for t in subs:
+            t.cancel()
+        await asyncio.gather(*subs, return_exceptions=True)
+
+        all_lat = [x for v in lat_by_kind.values() for x in v]
+        return {
+            "benchmark": "api_load",
+            "env": env_info(),
+            "config": {k: v for k, v in vars(args).items() if k != "out"},
+            "http": {
+                "requests": counters["requests"],
+                "errors": counters["errors"],
+                "elapsed_s": elapsed,
+                "throughput_ops": counters["requests"] / elapsed if elapsed else 0.0,
+                "latency": summarize(all_lat),
+                "by_kind": {k: summarize(v) for k, v in lat_by_kind.items()},
+            },
+            "ws": {
+                "marketdata": {"subscribers": args.md_subscribers,
+                               "messages": counters["marketdata_messages"],
+                               "bytes": counters["marketdata_bytes"],
+                               "lag": summarize(md_lag)},
+                "trades": {"subscribers": args.trade_subscribers,
+                           "messages": counters["trades_messages"],
+                           "bytes": counters["trades_bytes"],
+                           "lag": summarize(trade_lag)},
+            },
+        }
+    finally:
+        stop_server(proc)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load test app.main:app over HTTP + WebSocket")
+    ap.add_argument("--port", type=int, default=None, help="use a running server instead of launching one")
+    ap.add_argument("--server-workers", type=int, default=1, help="must be 1 (the engine is in-process)")
+    ap.add_argument("--route", default="/orders", help="/orders or /orders/fast")
+    ap.add_argument("--http-clients", type=int, default=16)
+    ap.add_argument("--md-subscribers", type=int, default=0)
+    ap.add_argument("--trade-subscribers", type=int, default=0)
+    ap.add_argument("--symbols", type=int, default=1)
+    ap.add_argument("--symbol-prefix", default="LOAD")
+    ap.add_argument("--mix", default="limit=50,market=10,ioc=10,cancel=25,stop=5")
+    ap.add_argument("--workload", default="mixed", help="'mixed' or module:Class")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds of order flow")
+    ap.add_argument("--requests", type=int, default=None, help="stop after ~N requests total")
+    ap.add_argument("--warmup", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default="-", help="results JSON path ('-' = stdout)")
+    args = ap.parse_args(argv)
+    if args.server_workers != 1:
+        ap.error("--server-workers must be 1: each uvicorn worker would run its own engine, "
+                 "so cancels and queries would reach the wrong books")
+    write_results(args.out, asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
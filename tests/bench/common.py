@@ -0,0 +1,123 @@
+# tests/bench/common.py
+# Shared helpers: local uvicorn launcher, raw keep-alive HTTP client, latency stats, JSON results.
+import asyncio
+import json
+import os
+import platform
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+HOST = "127.0.0.1"
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+def launch_server(port: int) -> subprocess.Popen:
+    # One worker: the engine is in-process, so with several workers each has its own books
+    # and cancels / queries land on the wrong one. The server runs in a scratch directory
+    # so its state/ (ledger, audit, checkpoints, hibernated books) never touches the repo's.
+    workdir = tempfile.mkdtemp(prefix="bench-server-")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", ROOT, "--host", HOST, "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir,
+    )
+    proc.workdir = workdir
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    stop_server(proc)
+    raise RuntimeError("uvicorn did not start")
+
+def stop_server(proc: Optional[subprocess.Popen]):
+    if proc is None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    shutil.rmtree(proc.workdir, ignore_errors=True)
+
+class HttpConn:
+    """Minimal HTTP/1.1 keep-alive client; avoids measuring a client library."""
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int):
+        self.reader, self.writer, self.host, self.port = reader, writer, host, port
+
+    @classmethod
+    async def open(cls, port: int, host: str = HOST) -> "HttpConn":
+        r, w = await asyncio.open_connection(host, port)
+        return cls(r, w, host, port)
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode() + body)
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            k, _, v = line.partition(b":")
+            if k.strip().lower() == b"content-length":
+                length = int(v)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        self.writer.close()
+
+def pct(lat: List[float], p: float) -> float:
+    return lat[min(len(lat) - 1, int(p * len(lat)))]
+
+def summarize(lat_us: List[float]) -> Dict[str, Any]:
+    """Latency percentiles in microseconds (sorts in place)."""
+    if not lat_us:
+        return {"count": 0}
+    lat_us.sort()
+    return {
+        "count": len(lat_us),
+        "mean_us": sum(lat_us) / len(lat_us),
+        "p50_us": pct(lat_us, 0.50),
+        "p90_us": pct(lat_us, 0.90),
+        "p95_us": pct(lat_us, 0.95),
+        "p99_us": pct(lat_us, 0.99),
+        "p999_us": pct(lat_us, 0.999),
+        "max_us": lat_us[-1],
+    }
+
+def env_info() -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return {
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "unix_ts": int(time.time()),
+    }
+
+def write_results(path: Optional[str], results: Dict[str, Any]):
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path in (None, "-"):
+        print(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
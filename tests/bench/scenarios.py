@@ -0,0 +1,541 @@
+# tests/bench/scenarios.py
+# Scenario benchmarks for the in-process matching core (no HTTP).
+# Run all of them with `python -m tests.bench`; one scenario with
+#   python -m tests.bench.scenarios NAME [--scale 0.1]
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import time
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.profiling import EngineProfiler
+from tests.bench.common import summarize
+
+SCENARIOS: Dict[str, Callable[[float], Awaitable[Dict[str, Any]]]] = {}
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (rss if sys.platform == "darwin" else rss * 1024) / 1e6
+
+def order(sym: str, side: str, qty, px=None, t: str = "limit", trig=None) -> Order:
+    return Order(symbol=sym, order_type=t, side=side, quantity=Decimal(qty),
+                 price=None if px is None else Decimal(px),
+                 trigger_price=None if trig is None else Decimal(trig))
+
+_PROFILE = False
+PROFILERS: List[EngineProfiler] = []  # one per engine when run with --profile
+
+def new_engine() -> MatchingEngine:
+    eng = MatchingEngine(state_dir="state/bench")
+    if _PROFILE:
+        PROFILERS.append(EngineProfiler(eng))
+    return eng
+
+
+class Phase:
+    """Times individual awaited ops; yields to the loop every `drain_every` ops so md/trade
+    publish tasks don't pile up (untimed)."""
+    def __init__(self, name: str, drain_every: int = 1000):
+        self.name = name
+        self.lat_us: List[float] = []
+        self.drain_every = drain_every
+        self.elapsed = 0.0
+        self.units = 0  # optional domain count (e.g. levels swept, stops fired)
+
+    async def op(self, coro):
+        s = time.perf_counter()
+        r = await coro
+        d = time.perf_counter() - s
+        self.elapsed += d
+        self.lat_us.append(d * 1e6)
+        if len(self.lat_us) % self.drain_every == 0:
+            await asyncio.sleep(0)
+        return r
+
+    def result(self) -> Dict[str, Any]:
+        n = len(self.lat_us)
+        out = {"ops": n, "elapsed_s": self.elapsed,
+               "ops_per_sec": n / self.elapsed if self.elapsed else 0.0,
+               "latency": summarize(self.lat_us)}
+        if self.units:
+            out["units"] = self.units
+            out["units_per_sec"] = self.units / self.elapsed if self.elapsed else 0.0
+        return out
+
+
+def _n(base: int, scale: float) -> int:
+    return max(1, int(base * scale))
+
+
+@scenario
+async def ioc_static(scale: float) -> Dict[str, Any]:
+    """The original benchmark_engine workload: alternating IOCs against a static 1,000-order book."""
+    eng = new_engine()
+    sym = "BTC-USDT"
+    for i in range(1000):
+        await eng.submit(order(sym, "sell", "0.01", 60000 + (i % 50)))
+        await eng.submit(order(sym, "buy", "0.01", 59950 - (i % 50)))
+    ph = Phase("ioc")
+    for i in range(_n(10_000, scale)):
+        o = order(sym, "buy", "0.005", 60010, "ioc") if i % 2 == 0 else order(sym, "sell", "0.005", 59990, "ioc")
+        await ph.op(eng.submit(o))
+    return {"ioc": ph.result()}
+
+
+@scenario
+async def mm_requote(scale: float) -> Dict[str, Any]:
+    """20 makers x 5 quotes/side requoting around a random-walk mid, 1 taker IOC per 20 requotes."""
+    rng = random.Random(7)
+    eng = new_engine()
+    sym = "ETH-USDT"
+    mid = 3000
+    quotes: List[List[str]] = [[] for _ in range(20)]
+    for m in range(20):
+        for k in range(1, 6):
+            _, b = await eng.submit(order(sym, "buy", "1", mid - k))
+            _, a = await eng.submit(order(sym, "sell", "1", mid + k))
+            quotes[m] += [b.order_id, a.order_id]
+    cancel, place, take = Phase("cancel"), Phase("place"), Phase("take")
+    for i in range(_n(20_000, scale)):
+        mid += rng.choice((-1, 0, 1))
+        m = i % 20
+        if quotes[m]:
+            # may already be filled by a taker; a missed cancel is still a realistic op
+            oid = quotes[m].pop(rng.randrange(len(quotes[m])))
+            await cancel.op(eng.cancel(sym, oid))
+        side = rng.choice(("buy", "sell"))
+        px = mid - rng.randint(1, 5) if side == "buy" else mid + rng.randint(1, 5)
+        _, rested = await place.op(eng.submit(order(sym, side, "1", px)))
+        if rested is not None:
+            quotes[m].append(rested.order_id)
+        if i % 20 == 19:
+            side = rng.choice(("buy", "sell"))
+            await take.op(eng.submit(order(sym, side, "0.5", mid + 6 if side == "buy" else mid - 6, "ioc")))
+    return {"cancel": cancel.result(), "place": place.result(), "take": take.result()}
+
+
+async def _ladder(eng: MatchingEngine, sym: str, side: str, start: int, levels: int, per_level: int):
+    step = 1 if side == "sell" else -1
+    for k in range(levels):
+        for _ in range(per_level):
+            await eng.submit(order(sym, side, "1", start + step * k))
+
+
+@scenario
+async def sweep_100(scale: float) -> Dict[str, Any]:
+    """Market, limit and FOK takers each sweeping through 100 ask levels (3 orders/level), book replenished untimed."""
+    eng = new_engine()
+    sym = "SOL-USDT"
+    market, limit, fok_ok, fok_fail = Phase("market"), Phase("limit"), Phase("fok_ok"), Phase("fok_fail")
+    for i in range(_n(300, scale)):
+        await _ladder(eng, sym, "sell", 100, 100, 3)
+        kind = i % 3
+        if kind == 0:
+            trades, _ = await market.op(eng.submit(order(sym, "buy", "300", t="market")))
+            market.units += len(trades)
+        elif kind == 1:
+            trades, _ = await limit.op(eng.submit(order(sym, "buy", "300", 199, "limit")))
+            limit.units += len(trades)
+        else:
+            await fok_fail.op(eng.submit(order(sym, "buy", "301", 199, "fok")))
+            trades, _ = await fok_ok.op(eng.submit(order(sym, "buy", "300", 199, "fok")))
+            fok_ok.units += len(trades)
+    return {"market": market.result(), "limit": limit.result(),
+            "fok_ok": fok_ok.result(), "fok_fail": fok_fail.result()}
+
+
+@scenario
+async def stop_cascade(scale: float) -> Dict[str, Any]:
+    """500 sell stops stacked one per bid level; a single sell sets off the whole cascade."""
+    eng = new_engine()
+    sym = "BNB-USDT"
+    ph = Phase("cascade", drain_every=1)
+    place = Phase("place_stop")
+    for _ in range(_n(20, scale)):
+        await _ladder(eng, sym, "buy", 1000, 501, 1)
+        for k in range(500):
+            await place.op(eng.submit(order(sym, "sell", "1", t="stop_market", trig=1000 - k)))
+        await ph.op(eng.submit(order(sym, "sell", "1", 1000)))
+        ph.units += 500 - len(eng.triggers[sym])
+        eng.triggers[sym].clear()
+        await eng.submit(order(sym, "sell", "1000", t="market"))  # clear leftovers
+    return {"cascade": ph.result(), "place_stop": place.result()}
+
+
+@scenario
+async def deep_book(scale: float) -> Dict[str, Any]:
+    """1M resting orders over +/-5,000 ticks, then takers, cancels and top-of-book inserts against it."""
+    rng = random.Random(11)
+    eng = new_engine()
+    sym = "BTC-USDT"
+    mid = 60000
+    ins, take, canc, top = Phase("insert"), Phase("take"), Phase("cancel"), Phase("top_insert")
+    ids: List[str] = []
+    for i in range(_n(1_000_000, scale)):
+        side = "buy" if i % 2 else "sell"
+        off = rng.randint(1, 5000)
+        _, r = await ins.op(eng.submit(order(sym, side, "0.01", mid - off if side == "buy" else mid + off)))
+        if i % 1000 == 0:
+            ids.append(r.order_id)
+    for i in range(_n(10_000, scale)):
+        side = "buy" if i % 2 else "sell"
+        await take.op(eng.submit(order(sym, side, "0.015", mid + 5000 if side == "buy" else mid - 5000, "ioc")))
+        await top.op(eng.submit(order(sym, "sell" if side == "buy" else "buy", "0.01",
+                                      mid + 1 if side == "buy" else mid - 1)))
+    rng.shuffle(ids)
+    for oid in ids[:_n(1_000, scale)]:
+        await canc.op(eng.cancel(sym, oid))
+    return {"insert": ins.result(), "take": take.result(), "top_insert": top.result(), "cancel": canc.result()}
+
+
+@scenario
+async def many_symbols(scale: float) -> Dict[str, Any]:
+    """2,000 symbols, each with a small book; round-robin limits and IOCs across all of them."""
+    rng = random.Random(3)
+    eng = new_engine()
+    syms = [f"S{i:04d}-USDT" for i in range(_n(2_000, scale))]
+    for s in syms:
+        for k in range(1, 4):
+            await eng.submit(order(s, "buy", "1", 100 - k))
+            await eng.submit(order(s, "sell", "1", 100 + k))
+    ph = Phase("mixed")
+    for i in range(_n(100_000, scale)):
+        s = syms[i % len(syms)]
+        side = rng.choice(("buy", "sell"))
+        if i % 2:
+            await ph.op(eng.submit(order(s, side, "0.5", 103 if side == "buy" else 97, "ioc")))
+        else:
+            await ph.op(eng.submit(order(s, side, "0.5", 99 if side == "buy" else 101)))
+    return {"mixed": ph.result()}
+
+
+@scenario
+async def disconnect_cancel(scale: float) -> Dict[str, Any]:
+    """One owner with 10k resting quotes over 100 levels per side (plus other flow); time its session drop."""
+    from engine.sessions import SessionRegistry
+    eng = new_engine()
+    sessions = SessionRegistry(eng)
+    sym = "XRP-USDT"
+    ph = Phase("disconnect", drain_every=1)
+    for _ in range(_n(20, scale)):
+        s = sessions.open("mm", cancel_on_disconnect=True)
+        for i in range(10_000):
+            side = "buy" if i % 2 else "sell"
+            px = 1000 - i % 100 if side == "buy" else 1001 + i % 100
+            await eng.submit(Order(symbol=sym, order_type="limit", side=side, quantity=Decimal(1),
+                                   price=Decimal(px), owner="mm" if i % 10 else "other"))
+        ph.units += await ph.op(sessions.close(s))
+    return {"disconnect": ph.result()}
+
+
+@scenario
+async def auction_burst(scale: float) -> Dict[str, Any]:
+    """100k-order burst around a mid: accumulate in a call phase and uncross once vs. match continuously."""
+    rng = random.Random(13)
+    burst = [("buy" if rng.random() < 0.5 else "sell", rng.randint(1, 20), 1000 + rng.randint(-50, 50))
+             for _ in range(_n(100_000, scale))]
+    sym = "ADA-USDT"
+    cont, acc, unc = Phase("continuous"), Phase("accumulate"), Phase("uncross", drain_every=1)
+    eng = new_engine()
+    for side, q, px in burst:
+        await cont.op(eng.submit(order(sym, side, q, px)))
+    eng = new_engine()
+    eng.start_auction(sym)
+    for side, q, px in burst:
+        await acc.op(eng.submit(order(sym, side, q, px)))
+    unc.units = len(await unc.op(eng.uncross(sym)))
+    return {"continuous": cont.result(), "accumulate": acc.result(), "uncross": unc.result()}
+
+
+@scenario
+async def risk_overhead(scale: float) -> Dict[str, Any]:
+    """Identical owned limit/IOC flow with and without pre-trade risk; plus RiskManager.check alone."""
+    from engine.risk import RiskManager
+    rng = random.Random(17)
+    flow = [(rng.choice(("buy", "sell")), rng.randint(1, 5), rng.randint(-10, 10), i % 4 == 3)
+            for i in range(_n(50_000, scale))]
+    sym = "DOT-USDT"
+    out: Dict[str, Any] = {}
+    for name, risk in (("no_risk", None), ("risk", RiskManager())):
+        if risk is not None:
+            for k in range(8):
+                risk.configure(f"acct{k}", balance=Decimal(10**12), max_order_qty=Decimal(100),
+                               max_open_notional=Decimal(10**12))
+        eng = MatchingEngine(state_dir="state/bench", risk=risk)
+        ph = Phase(name)
+        for i, (side, q, off, take) in enumerate(flow):
+            o = order(sym, side, q, 1000 + off, "ioc" if take else "limit")
+            o.owner = f"acct{i % 8}"
+            await ph.op(eng.submit(o))
+        out[name] = ph.result()
+    # the check by itself, too cheap to time per call
+    probe = order(sym, "buy", 1, 1000)
+    probe.owner = "acct0"
+    n = _n(200_000, scale)
+    s = time.perf_counter()
+    for _ in range(n):
+        risk.check(probe, None)
+    elapsed = time.perf_counter() - s
+    out["check_only"] = {"ops": n, "elapsed_s": elapsed, "ops_per_sec": n / elapsed,
+                         "latency": {"count": n, "mean_us": elapsed / n * 1e6}}
+    return out
+
+
+@scenario
+async def md_encoding(scale: float) -> Dict[str, Any]:
+    """Feed encoding cost with 10 subscribers: JSON per subscriber (old) vs JSON once vs binary once."""
+    import orjson
+    from engine.md_codec import MdUpdate, TradeUpdate
+    eng = MatchingEngine(state_dir="state/bench")
+    sym = "SOL-USDT"
+    for k in range(10):
+        await eng.submit(order(sym, "buy", "1.25", f"{99 - k}.5"))
+        await eng.submit(order(sym, "sell", "1.25", f"{101 + k}.5"))
+    trades, _ = await eng.submit(order(sym, "buy", "0.75", "101.5", "ioc"))
+    depth = eng.books[sym].depth(10)
+    n, subs = _n(20_000, scale), 10
+    msgs = [MdUpdate(sym, i, time.time_ns(), depth.bids, depth.asks) if i % 2 else TradeUpdate(i, time.time_ns(), trades[0])
+            for i in range(n)]
+    out: Dict[str, Any] = {}
+    for name, enc in (
+        ("json_per_sub", lambda m: [orjson.dumps(m.to_json()) for _ in range(subs)][0]),
+        ("json_once", lambda m: [m.json_text() for _ in range(subs)][0].encode()),
+        ("binary_once", lambda m: [m.binary() for _ in range(subs)][0]),
+    ):
+        for m in msgs:
+            m._text = m._frame = None
+        size = 0
+        s = time.perf_counter()
+        for m in msgs:
+            size += len(enc(m))
+        elapsed = time.perf_counter() - s
+        out[name] = {"ops": n, "elapsed_s": elapsed, "ops_per_sec": n / elapsed,
+                     "latency": {"count": n, "mean_us": elapsed / n * 1e6}, "bytes_per_msg": size / n}
+    return out
+
+
+@scenario
+async def checkpoint_pause(scale: float) -> Dict[str, Any]:
+    """Order-flow stalls (gap between consecutive submits) while a 200k-order book is saved:
+    synchronous save_state vs the background Checkpointer (first full capture, then incremental)."""
+    from engine.checkpoint import Checkpointer
+    eng = MatchingEngine(state_dir="state/bench")
+    sym = "AVAX-USDT"
+    n = _n(200_000, scale)
+    for i in range(n):
+        side = "buy" if i % 2 else "sell"
+        eng._match(order(sym, side, 1, (9000 - i % 1000) if side == "buy" else (10000 + i % 1000)))
+    cp = Checkpointer(eng)
+    out: Dict[str, Any] = {}
+
+    async def save_sync():
+        await asyncio.sleep(0.01)
+        eng.save_state(sym)
+
+    for name, save in (("sync_save_state", save_sync), ("checkpoint_full", lambda: cp.checkpoint(sym)),
+                       ("checkpoint_incremental", lambda: cp.checkpoint(sym))):
+        gaps: List[float] = []
+        done = asyncio.Event()
+
+        async def flow():
+            rng = random.Random(5)
+            last = time.perf_counter()
+            while not done.is_set() or len(gaps) < 200:
+                await eng.submit(order(sym, rng.choice(("buy", "sell")), 1, rng.randint(8990, 10010), "ioc"))
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                gaps.append((now - last) * 1e6)
+                last = now
+
+        async def run_save():
+            s = time.perf_counter()
+            await save()
+            done.set()
+            return time.perf_counter() - s
+        f = asyncio.create_task(flow())
+        took = await run_save()
+        await f
+        out[name] = {"ops": len(gaps), "elapsed_s": took, "ops_per_sec": len(gaps) / took if took else 0.0,
+                     "latency": summarize(gaps)}
+    out["checkpoint_incremental"]["max_capture_pause_us"] = cp.max_pause_s * 1e6
+    return out
+
+
+@scenario
+async def level_churn(scale: float) -> Dict[str, Any]:
+    """Long-running quote churn behind a fixed top of book: bids are placed at new prices along a
+    wide random walk and cancelled before they ever reach the top, so every cancel strands a level.
+    Reports latency and book size per window; both should stay flat."""
+    rng = random.Random(11)
+    eng = new_engine()
+    sym = "DOT-USDT"
+    await eng.submit(order(sym, "buy", 1, "100000"))
+    await eng.submit(order(sym, "sell", 1, "100001"))
+    bids = eng._book(sym).bids
+    walk, live = 50_000_00, []
+    out: Dict[str, Any] = {}
+    windows, per_window = 10, _n(20_000, scale)
+    for w in range(windows):
+        ph = Phase(f"window_{w}")
+        for _ in range(per_window):
+            walk = min(max(walk + rng.randint(-500, 500), 1_00), 99_000_00)
+            _, rested = await ph.op(eng.submit(order(sym, "buy", 1, Decimal(walk).scaleb(-2))))
+            live.append(rested.order_id)
+            if len(live) > 50:
+                await ph.op(eng.cancel(sym, live.pop(rng.randrange(len(live)))))
+        r = ph.result()
+        r.update(bids.health())
+        r["peak_rss_mb"] = peak_rss_mb()
+        out[ph.name] = r
+    return out
+
+
+@scenario
+async def admission_burst(scale: float) -> Dict[str, Any]:
+    """A burst of 20k requests (1 in 10 a cancel) lands at once on one symbol, with and without
+    AdmissionControl; latency is arrival -> response for each request, shed ones included."""
+    from engine.admission import AdmissionControl, AdmissionError
+    out: Dict[str, Any] = {}
+    n = _n(20_000, scale)
+    for name, admission in (("unbounded", None), ("admission", AdmissionControl())):
+        rng = random.Random(3)
+        eng = MatchingEngine(state_dir="state/bench", admission=admission)
+        sym = "LINK-USDT"
+        resting = []
+        for i in range(2000):
+            _, r = await eng.submit(order(sym, "buy", 1, 1000 - i % 100))
+            resting.append(r.order_id)
+        done: Dict[str, List[float]] = {"new": [], "cancel": [], "shed": []}
+
+        async def one(i: int, arrived: float):
+            try:
+                if i % 10 == 0:
+                    await eng.cancel(sym, resting.pop(), arrived=arrived)
+                    kind = "cancel"
+                else:
+                    await eng.submit(order(sym, rng.choice(("buy", "sell")), 1, rng.randint(990, 1010)), arrived)
+                    kind = "new"
+            except AdmissionError:
+                kind = "shed"
+            done[kind].append((time.perf_counter() - arrived) * 1e6)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i, time.perf_counter()) for i in range(n)))
+        took = time.perf_counter() - t0
+        for kind, lat in done.items():
+            out[f"{name}_{kind}"] = {"ops": len(lat), "elapsed_s": took, "ops_per_sec": len(lat) / took,
+                                     "latency": summarize(lat)}
+    return out
+
+
+@scenario
+async def cancel_lane(scale: float) -> Dict[str, Any]:
+    """Mixed flood while the symbol lock is held (1 ms, as by an uncross): 50 taker IOCs queue,
+    then the maker's cancel. FIFO locks vs the cancel priority lane; reports symbol-lock waits
+    per lane and how much of the maker's quote was picked off before the cancel landed."""
+    out: Dict[str, Any] = {}
+    rounds = _n(500, scale)
+    for name, prio in (("fifo", False), ("cancel_priority", True)):
+        eng = MatchingEngine(state_dir="state/bench", cancel_priority=prio)
+        sym = "SOL-USDT"
+        picked = Decimal(0)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            _, quote = await eng.submit(order(sym, "sell", 1, 100))
+            async with eng.locks[sym]:
+                takers = [asyncio.create_task(eng.submit(order(sym, "buy", "0.05", 100, "ioc"))) for _ in range(50)]
+                pull = asyncio.create_task(eng.cancel(sym, quote.order_id))
+                await asyncio.sleep(0.001)
+            for trades, _ in await asyncio.gather(*takers):
+                picked += sum(t.quantity for t in trades)
+            await pull
+            await eng.mass_cancel(sym)  # leftovers of a quote the takers did not finish
+        took = time.perf_counter() - t0
+        stats = eng.lock_wait_stats()
+        for lane in ("new", "cancel"):
+            out[f"{name}_{lane}"] = {"ops": stats[lane]["count"], "elapsed_s": took,
+                                     "ops_per_sec": stats[lane]["count"] / took, "latency": {
+                                         "count": stats[lane]["count"], "mean_us": stats[lane]["mean"],
+                                         "p50_us": stats[lane]["p50"], "p99_us": stats[lane]["p99"],
+                                         "max_us": stats[lane]["max"]}}
+        out[f"{name}_cancel"]["picked_off_qty_per_round"] = float(picked / rounds)
+    return out
+
+
+@scenario
+async def whatif_batch(scale: float) -> Dict[str, Any]:
+    """Slippage of 10k hypothetical buys against a 2,000-level ask side: submit on a deep copy of
+    the engine (the old way, sampled), a quote() loop, and BookSimulator batches cold and cached."""
+    import copy
+    from engine.whatif import BookSimulator
+    rng = random.Random(9)
+    eng = MatchingEngine(state_dir="state/bench")
+    sym = "ADA-USDT"
+    for i in range(_n(20_000, scale)):
+        eng._match(order(sym, "sell", f"{rng.randint(1, 500) / 100}", f"{1 + (i % 2000) / 10_000}"))
+    sizes = [rng.randint(1, 2_000_000) / 100 for _ in range(10_000)]
+    out: Dict[str, Any] = {}
+
+    def phase(name: str, n: int, took: float):
+        out[name] = {"ops": n, "elapsed_s": took, "ops_per_sec": n / took,
+                     "latency": {"count": n, "mean_us": took / n * 1e6}}
+
+    t0 = time.perf_counter()
+    for qty in sizes[:20]:
+        trial = copy.deepcopy(eng)
+        trial._match(order(sym, "buy", f"{qty}", t="market"))
+    phase("submit_on_copy", 20, time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for qty in sizes:
+        eng.quote(sym, "buy", Decimal(f"{qty}"))
+    phase("quote_loop", len(sizes), time.perf_counter() - t0)
+    sim = BookSimulator(eng)
+    t0 = time.perf_counter()
+    sim.simulate(sym, "buy", sizes)
+    phase("batch_cold", len(sizes), time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for _ in range(10):
+        sim.simulate(sym, "buy", sizes)
+    phase("batch_cached", 10 * len(sizes), time.perf_counter() - t0)
+    out["batch_cached"]["array_rebuilds"] = sim.rebuilds
+    return out
+
+
+async def run_scenario(name: str, scale: float, profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    global _PROFILE
+    _PROFILE = profile_dir is not None
+    t0 = time.perf_counter()
+    phases = await SCENARIOS[name](scale)
+    out = {"scenario": name, "scale": scale, "wall_s": time.perf_counter() - t0,
+           "peak_rss_mb": peak_rss_mb(), "phases": phases}
+    if PROFILERS:
+        # cProfile inflates latencies; compare profiled runs only with profiled runs
+        prof = PROFILERS[0]
+        out["profile"] = {"pstats": prof.dump(os.path.join(profile_dir, f"{name}.pstats")),
+                          "calls": dict(prof.calls),
+                          "self_time_s": prof.attribution()}
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run one core scenario; prints its JSON result")
+    ap.add_argument("name", choices=sorted(SCENARIOS))
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--profile", metavar="DIR", default=None, help="cProfile submit/cancel, write DIR/NAME.pstats")
+    args = ap.parse_args(argv)
+    print(json.dumps(asyncio.run(run_scenario(args.name, args.scale, args.profile))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# tests/benchmark_api.py
+# Compares POST /orders (pydantic) with POST /orders/fast against a local uvicorn.
+#   python -m tests.benchmark_api [N] [CONCURRENCY]
+import asyncio
+import sys
+import time
+from typing import Dict, Any, List
+import orjson
+
+from tests.bench.common import HttpConn, free_port, launch_server, stop_server, summarize
+
+async def drive(port: int, path: str, n: int, conc: int, symbol: str) -> Dict[str, Any]:
+    conns = [await HttpConn.open(port) for _ in range(conc)]
+    # seed some depth so IOCs trade
+    for i in range(200):
+        side, px = ("sell", 60000 + i % 20) if i % 2 else ("buy", 59990 - i % 20)
+        await conns[0].request("POST", "/orders", orjson.dumps(
+            {"symbol": symbol, "order_type": "limit", "side": side, "quantity": "1", "price": str(px)}))
+
+    bodies = [
+        orjson.dumps({"symbol": symbol, "order_type": "limit", "side": "buy", "quantity": "0.01", "price": "59980"}),
+        orjson.dumps({"symbol": symbol, "order_type": "ioc", "side": "buy", "quantity": "0.005", "price": "60010"}),
+        orjson.dumps({"symbol": symbol, "order_type": "limit", "side": "sell", "quantity": "0.01", "price": "60015"}),
+        orjson.dumps({"symbol": symbol, "order_type": "ioc", "side": "sell", "quantity": "0.005", "price": "59985"}),
+    ]
+    lat_us: List[float] = []
+    errors = 0
+
+    async def worker(c: HttpConn, k: int):
+        nonlocal errors
+        for i in range(k, n, conc):
+            s = time.perf_counter()
+            status, _ = await c.request("POST", path, bodies[i % len(bodies)])
+            lat_us.append((time.perf_counter() - s) * 1e6)
+            errors += status != 200
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(c, k) for k, c in enumerate(conns)))
+    dt = time.perf_counter() - t0
+    for c in conns:
+        c.close()
+    return {"route": path, "N": n, "concurrency": conc, "elapsed_s": dt, "throughput_ops": n / dt,
+            "errors": errors, **summarize(lat_us)}
+
+async def main(n: int, conc: int):
+    port = free_port()
+    proc = launch_server(port)
+    try:
+        for path in ("/orders", "/orders/fast"):
+            r = await drive(port, path, n, conc, symbol=f"BENCH{path.replace('/', '-')}")
+            print(f"{r['route']:<13} N={r['N']:,} c={r['concurrency']}  thr={r['throughput_ops']:.0f}/s  "
+                  f"p50={r['p50_us']:.0f}us  p95={r['p95_us']:.0f}us  p99={r['p99_us']:.0f}us  errors={r['errors']}")
+    finally:
+        stop_server(proc)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    conc = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    asyncio.run(main(n, conc))
@@ -0,0 +1,60 @@
+# tests/benchmark_tape.py
+import sys
+import time
+import resource
+import uuid
+from decimal import Decimal
+from engine.trade_tape import TradeRing
+
+SYM = "BTC-USDT"
+
+def rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def run_once(n: int):
+    # Level prices and order ids are shared with the book in practice, so reuse a pool of them.
+    prices = [Decimal(60000 + i) for i in range(100)]
+    qtys = [Decimal("0.001") * (i + 1) for i in range(50)]
+    order_ids = [str(uuid.uuid4()) for _ in range(1000)]
+
+    # tracemalloc slows appends ~10x at this size; peak RSS is close enough for sizing
+    base = rss_bytes()
+    ring = TradeRing(n)
+    empty = rss_bytes() - base
+
+    t0 = time.perf_counter()
+    ts = time.time_ns()
+    for i in range(n):
+        ring.append(ts + i, prices[i % 100], qtys[i % 50], "buy" if i & 1 else "sell",
+                    uuid.uuid4().hex, order_ids[i % 1000], order_ids[(i * 7) % 1000])
+    fill_s = time.perf_counter() - t0
+    used = rss_bytes() - base
+
+    lat_us = []
+    for k in range(1000):
+        since = ts + (k * 9973) % n
+        s = time.perf_counter()
+        ring.first_after(since)
+        lat_us.append((time.perf_counter() - s) * 1e6)
+    lat_us.sort()
+
+    return {
+        "N": n,
+        "fill_s": fill_s,
+        "append_ops": n / fill_s,
+        "columns_mb": empty / 1e6,
+        "retained_mb": used / 1e6,
+        "bytes_per_trade": used / n,
+        "lookup_p50_us": lat_us[500],
+        "lookup_p99_us": lat_us[990],
+    }
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    r = run_once(n)
+    print(f"Trades: {r['N']:,}, fill={r['fill_s']:.1f}s ({r['append_ops']:,.0f} appends/s)")
+    print(f"Memory: columns={r['columns_mb']:.0f}MB retained={r['retained_mb']:.0f}MB "
+          f"({r['bytes_per_trade']:.0f} B/trade)")
+    print(f"since-lookup (us): p50={r['lookup_p50_us']:.1f}, p99={r['lookup_p99_us']:.1f}")
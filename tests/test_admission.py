@@ -0,0 +1,48 @@
+import asyncio
+import time
+from decimal import Decimal
+import pytest
+from engine.admission import AdmissionControl, AdmissionError
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+
+SYM = "BTC-USDT"
+
+def mk(side, qty, px):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(qty), price=Decimal(px))
+
+def test_depth_limit_sheds_new_orders_but_admits_cancels():
+    async def scenario():
+        eng = MatchingEngine(admission=AdmissionControl(max_depth=2, cancel_headroom=2))
+        _, rested = await eng.submit(mk("buy", 1, 100))
+        async with eng.locks[SYM]:  # e.g. an uncross in progress: requests queue on the lock
+            waiting = [asyncio.create_task(eng.submit(mk("buy", 1, 99))) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionError, match="2 requests queued"):
+                await eng.submit(mk("buy", 1, 98))
+            cancel = asyncio.create_task(eng.cancel(SYM, rested.order_id))
+            await asyncio.sleep(0)
+            assert eng.admission.queues[SYM].depth == 3
+        await asyncio.gather(*waiting)
+        assert await cancel
+        st = eng.admission.stats()[SYM]
+        assert st["depth"] == 0 and st["admitted"] == 4 and st["shed_full"] == 1
+        assert eng.snapshot(SYM)["bids"] == [["99", "2"]]
+    asyncio.run(scenario())
+
+def test_standing_delay_sheds_new_orders_until_one_gets_through_in_time():
+    async def scenario():
+        eng = MatchingEngine(admission=AdmissionControl(target_delay_s=0.005, interval_s=0.02))
+        late = time.perf_counter() - 0.05
+        await eng.submit(mk("buy", 1, 100), late)  # first sighting of a standing queue: admitted
+        await asyncio.sleep(0.03)
+        with pytest.raises(AdmissionError, match="queueing delay"):
+            await eng.submit(mk("buy", 1, 100), late)
+        assert not await eng.cancel(SYM, "nope", arrived=late)  # cancels are never shed for delay
+        assert eng.admission.stats(SYM)[SYM]["shedding"]
+        await eng.submit(mk("buy", 1, 100), time.perf_counter())
+        await eng.submit(mk("buy", 1, 100), late)  # the standing-queue clock restarted
+        st = eng.admission.stats(SYM)[SYM]
+        assert st["shed_delay"] == 1 and st["admitted"] == 4 and st["wait_us"]["max"] >= 50_000
+        assert eng.snapshot(SYM)["bids"] == [["100", "3"]]
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+
+pytest.importorskip("numpy")
+from engine.auction import uncross
+
+SYM = "BTC-USDT"
+
+def lim(side, qty, px, ts):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(qty), price=Decimal(px), ts_ns=ts)
+
+def test_clearing_price_maximizes_volume_then_minimizes_imbalance():
+    buys = [lim("buy", "3", 102, 1), lim("buy", "2", 101, 2), lim("buy", "4", 99, 3)]
+    sells = [lim("sell", "1", 98, 4), lim("sell", "2", 100, 5), lim("sell", "5", 101, 6)]
+    res = uncross(buys, sells)
+    # 101: demand 5, supply 8 -> 5;  100: demand 5, supply 3 -> 3
+    assert (res.price, res.volume, res.imbalance) == (Decimal("101"), Decimal("5"), Decimal("3"))
+    assert [(o.price, q) for o, q in res.buy_fills] == [(Decimal("102"), Decimal("3")), (Decimal("101"), Decimal("2"))]
+    # price-time: cheapest sells first, 101 seller only partially filled
+    assert [q for _, q in res.sell_fills] == [Decimal("1"), Decimal("2"), Decimal("2")]
+
+def test_no_cross_no_price():
+    assert uncross([lim("buy", "1", 99, 1)], [lim("sell", "1", 100, 2)]).price is None
+
+def test_opening_auction_uncrosses_then_resumes_continuous():
+    async def scenario():
+        eng = MatchingEngine()
+        eng.start_auction(SYM)
+        for o in (lim("buy", "1", 105, 1), lim("buy", "1", 103, 2), lim("sell", "1.5", 101, 3),
+                  lim("sell", "1", 104, 4)):
+            trades, rested = await eng.submit(o)
+            assert trades == [] and rested is not None  # nothing matches during the call phase
+        mkt = Order(symbol=SYM, order_type="market", side="sell", quantity=Decimal("0.5"))
+        assert (await eng.submit(mkt))[1] is mkt
+        assert Decimal(eng.indicative(SYM)["volume"]) == 2
+        trades = await eng.uncross(SYM, reference_price=Decimal("104"))  # 101 and 103 tie on volume and imbalance
+        assert {t.price for t in trades} == {Decimal("103")}
+        assert sum(t.quantity for t in trades) == Decimal("2")
+        assert eng.snapshot(SYM)["bids"] == [] and eng.snapshot(SYM)["asks"] == [["104", "1"]]
+        assert SYM not in eng.auctions
+        trades, _ = await eng.submit(lim("buy", "1", 104, 9))  # continuous again
+        assert len(trades) == 1
+    asyncio.run(scenario())
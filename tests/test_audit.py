@@ -0,0 +1,56 @@
+import asyncio
+import os
+from decimal import Decimal
+import pytest
+from engine.audit import AuditLog, read_records, segments
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.risk import RiskError, RiskManager
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, typ="limit", owner="a"):
+    return Order(symbol=SYM, order_type=typ, side=side, quantity=Decimal(qty), price=Decimal(px), owner=owner)
+
+def test_engine_events_are_journaled(tmp_path):
+    async def scenario():
+        risk = RiskManager()
+        risk.configure("poor", balance=Decimal("1"))
+        audit = AuditLog(str(tmp_path), flush_interval_s=0.01)
+        eng = MatchingEngine(state_dir=str(tmp_path), audit=audit, risk=risk)
+        rest = o("sell", "1", "100")
+        await eng.submit(rest)
+        await eng.submit(o("buy", "3", "100", "ioc", owner="b"))  # 1 filled, 2 unfilled
+        with pytest.raises(RiskError):
+            await eng.submit(o("buy", "1", "100", owner="poor"))
+        keep = o("buy", "1", "90")
+        await eng.submit(keep)
+        await eng.cancel(SYM, keep.order_id)
+        audit.close()
+        return rest, keep, audit
+    rest, keep, audit = asyncio.run(scenario())
+    paths = segments(str(tmp_path))
+    assert len(paths) == 1 and paths[0].endswith(".log.gz")
+    recs = list(read_records(paths[0]))
+    assert [r["type"] for r in recs] == ["order", "order", "trade", "cancel", "reject", "order", "cancel"]
+    assert recs[0]["order"]["order_id"] == rest.order_id
+    assert recs[2]["price"] == "100" and recs[2]["maker_order_id"] == rest.order_id
+    assert recs[3]["reason"] == "unfilled" and recs[6]["order_id"] == keep.order_id
+    assert audit.records_written == 7 and audit.dropped == 0 and audit.queued == 0
+    assert audit.bytes_written == sum(len(__import__("orjson").dumps(r)) + 4 for r in recs)
+
+def test_rotation_and_overflow_never_block(tmp_path):
+    audit = AuditLog(str(tmp_path), rotate_bytes=2000, batch_bytes=500, flush_interval_s=0.005, compress=False, max_queue=None)
+    for i in range(200):
+        audit.cancel(SYM, f"id-{i}")
+    audit.close()
+    paths = segments(str(tmp_path))
+    assert len(paths) > 1 and all(p.endswith(".log") for p in paths)
+    ids = [r["order_id"] for p in paths for r in read_records(p)]
+    assert ids == [f"id-{i}" for i in range(200)]
+    full = AuditLog(str(tmp_path / "full"), flush_interval_s=60, max_queue=5)
+    for i in range(8):
+        full.cancel(SYM, str(i))
+    assert full.queued == 5 and full.dropped == 3
+    full.close()
+    assert full.records_written == 5
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from decimal import Decimal
+from engine.checkpoint import Checkpointer
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, typ="limit", **kw):
+    return Order(symbol=SYM, order_type=typ, side=side, quantity=Decimal(qty),
+                 price=None if px is None else Decimal(px), **kw)
+
+def book_of(eng):
+    b = eng.books[SYM]
+    return {side: {p: [(x.order_id, x.quantity) for x in lvl if x.quantity > 0] for p, lvl in plb.levels.items()
+                   if plb.qty_at_price.get(p, 0) > 0}
+            for side, plb in (("buy", b.bids), ("sell", b.asks))}
+
+def test_checkpoint_round_trips_and_reuses_unchanged_levels(tmp_path):
+    async def scenario():
+        eng = MatchingEngine(state_dir=str(tmp_path))
+        cp = Checkpointer(eng, chunk_orders=4)
+        for i in range(20):
+            await eng.submit(o("buy", "1", str(100 - i), owner="a"))
+            await eng.submit(o("buy", "2", str(100 - i)))
+            await eng.submit(o("sell", "1", str(101 + i)))
+        await eng.submit(o("sell", "1.5", None, "market"))  # partial fill at the top bid
+        await eng.submit(o("sell", "1", None, "stop_market", trigger_price=Decimal("50")))
+        assert await cp.checkpoint(SYM) and cp.last_encoded_levels == 40
+        await eng.submit(o("buy", "1", "80"))
+        assert not cp.changed("ETH-USDT")
+        assert cp.changed(SYM) and await cp.checkpoint(SYM) and cp.last_encoded_levels == 1
+        assert not cp.changed(SYM)
+        fresh = MatchingEngine(state_dir=str(tmp_path))
+        assert await fresh.load_state(SYM)
+        assert book_of(fresh) == book_of(eng)
+        assert [t.order_id for t in fresh.triggers[SYM]] == [t.order_id for t in eng.triggers[SYM]]
+    asyncio.run(scenario())
+
+def test_checkpoint_is_consistent_while_matching_continues(tmp_path):
+    async def scenario():
+        eng = MatchingEngine(state_dir=str(tmp_path))
+        cp = Checkpointer(eng, chunk_orders=8)
+        for i in range(200):
+            await eng.submit(o("buy", "1", str(1000 - i)))
+            await eng.submit(o("sell", "1", str(1001 + i)))
+        mdq = await eng.md_pub.subscribe(f"md:{SYM}")
+
+        async def flow():
+            for i in range(300):
+                await eng.submit(o("buy" if i % 2 else "sell", "0.5", str(995 + i % 11)))
+                await asyncio.sleep(0)
+        await asyncio.gather(cp.checkpoint(SYM), flow())
+        await asyncio.sleep(0)
+        with open(tmp_path / f"orderbook_{SYM}.json") as f:
+            seq = json.load(f)["md_seq"]
+        assert 400 < seq < 700  # taken mid-flow
+        updates = {}
+        while not mdq.empty():
+            m = mdq.get_nowait()
+            updates[m.seq] = (m.bids, m.asks)
+        fresh = MatchingEngine(state_dir=str(tmp_path))
+        await fresh.load_state(SYM)
+        d = fresh.books[SYM].depth(10)
+        assert (d.bids, d.asks) == updates[seq]
+        assert cp.max_pause_s < 0.05
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from engine.dedup import DedupCache
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.risk import RiskError, RiskManager
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, cid, owner="gw"):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(qty), price=Decimal(px),
+                 owner=owner, client_order_id=cid)
+
+def test_retry_returns_original_result_once_on_book():
+    async def scenario():
+        eng = MatchingEngine()
+        first = o("buy", "1", "100", "c-1")
+        retry = o("buy", "1", "100", "c-1")
+        # the retry races the original: both are in flight before either finishes
+        r1, r2 = await asyncio.gather(eng.submit(first), eng.submit(retry))
+        assert r1 is r2 and retry.order_id == first.order_id
+        assert eng.snapshot(SYM)["bids"] == [["100", "1"]]
+        await eng.submit(o("buy", "1", "100", "c-1", owner="other"))  # ids are per owner
+        assert eng.snapshot(SYM)["bids"] == [["100", "2"]]
+    asyncio.run(scenario())
+
+def test_rejected_order_can_be_retried():
+    async def scenario():
+        risk = RiskManager()
+        risk.configure("gw", balance=Decimal("50"))
+        eng = MatchingEngine(risk=risk)
+        with pytest.raises(RiskError):
+            await eng.submit(o("buy", "1", "100", "c-2"))
+        risk.configure("gw", balance=Decimal("500"))
+        _, rested = await eng.submit(o("buy", "1", "100", "c-2"))
+        assert rested is not None
+    asyncio.run(scenario())
+
+def test_cache_bounded_per_owner_and_by_owners():
+    c = DedupCache(per_owner=3, window_s=None, max_owners=2)
+    for i in range(10):
+        c.put("a", i, i)
+    assert len(c) == 3 and c.get("a", 6) is None and c.get("a", 9) == 9
+    c.put("b", 1, 1)
+    c.put("c", 1, 1)  # "a" idle longest -> dropped
+    assert c.get("a", 9) is None and len(c) == 2
+    w = DedupCache(window_s=60)
+    w.put("a", 1, 1)
+    w.owners["a"][1] = (w.owners["a"][1][0] - 61 * 10**9, 1)  # age the entry past the window
+    assert w.get("a", 1) is None and len(w) == 0
+
+def test_cancelled_original_releases_its_id():
+    async def scenario():
+        eng = MatchingEngine()
+        await eng.locks[SYM].acquire()  # hold the symbol so the submits queue
+        first = asyncio.create_task(eng.submit(o("buy", "1", "100", "c-3")))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(eng.submit(o("buy", "1", "100", "c-3")))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        eng.locks[SYM].release()
+        _, rested = await asyncio.wait_for(retry, 1)  # takes the cancelled original's place
+        assert first.cancelled() and rested is not None
+        assert eng.snapshot(SYM)["bids"] == [["100", "1"]]
+        r = await asyncio.wait_for(eng.submit(o("buy", "1", "100", "c-3")), 1)
+        assert r[1] is rested  # and is itself deduplicated
+        await eng.locks[SYM].acquire()
+        first2 = asyncio.create_task(eng.submit(o("buy", "1", "100", "c-4")))
+        await asyncio.sleep(0)
+        first2.cancel()
+        await asyncio.gather(first2, return_exceptions=True)
+        eng.locks[SYM].release()
+        assert first2.cancelled() and eng.dedup.get("gw", "c-4") is None
+    asyncio.run(scenario())
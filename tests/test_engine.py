@@ -1,9 +1,13 @@
+import asyncio
 from decimal import Decimal
 from engine.matching_engine import MatchingEngine
 from engine.models import Order
 
 SYM = "BTC-USDT"
 
+def run(coro):
+    return asyncio.run(coro)
+
 def mk(side, qty, px=None, t="limit"):
     return Order(symbol=SYM, order_type=t, side=side, quantity=Decimal(str(qty)), price=Decimal(str(px)) if px else None)
 
@@ -12,9 +16,9 @@ def test_price_time_priority():
     a = mk("sell", 1, 101)
     b = mk("sell", 1, 101)
     c = mk("buy",  2,  105)  # crosses
-    eng.submit(a)
-    eng.submit(b)
-    trades, _ = eng.submit(c)
+    run(eng.submit(a))
+    run(eng.submit(b))
+    trades, _ = run(eng.submit(c))
     assert len(trades) == 2
     assert trades[0].maker_order_id == a.order_id
     assert trades[1].maker_order_id == b.order_id
@@ -22,29 +26,356 @@ def test_price_time_priority():
 
 def test_partial_fill_and_rest():
     eng = MatchingEngine()
-    eng.submit(mk("sell", 1.5, 100))
+    run(eng.submit(mk("sell", 1.5, 100)))
     buy = mk("buy", 3, 100)
-    trades, rest = eng.submit(buy)
+    trades, rest = run(eng.submit(buy))
     assert len(trades) == 1
     assert trades[0].quantity == Decimal("1.5")
     assert rest is not None and rest.quantity == Decimal("1.5")
 
 def test_ioc_cancels_remainder():
     eng = MatchingEngine()
-    eng.submit(mk("sell", 1, 100))
+    run(eng.submit(mk("sell", 1, 100)))
     ioc = mk("buy", 2, 100, t="ioc")
-    trades, rest = eng.submit(ioc)
+    trades, rest = run(eng.submit(ioc))
     assert len(trades) == 1 and rest is None
 
 def test_fok_requires_full():
     eng = MatchingEngine()
-    eng.submit(mk("sell", 1, 100))
+    run(eng.submit(mk("sell", 1, 100)))
     fok = mk("buy", 2, 101, t="fok")
-    trades, rest = eng.submit(fok)
+    trades, rest = run(eng.submit(fok))
     assert len(trades) == 0 and rest is None
 
-    eng.submit(mk("sell", 1, 100))
+    run(eng.submit(mk("sell", 1, 100)))
     fok2 = mk("buy", 2, 101, t="fok")
-    trades, rest = eng.submit(fok2)
+    trades, rest = run(eng.submit(fok2))
     assert sum(t.quantity for t in trades) == Decimal("2") and rest is None
 
+
+def test_trade_tape_range_query():
+    eng = MatchingEngine(tape_capacity=3)
+    for px in (100, 101, 102, 103):
+        run(eng.submit(mk("sell", 1, px)))
+        run(eng.submit(mk("buy", 1, px)))
+    latest = eng.recent_trades(SYM)
+    assert [t["price"] for t in latest] == ["101", "102", "103"]  # oldest evicted
+    assert [t["seq"] for t in latest] == [2, 3, 4]
+    after = eng.recent_trades(SYM, after_seq=latest[0]["seq"], limit=1)
+    assert after == [latest[1]]
+    assert eng.recent_trades(SYM, after_seq=0, limit=1) == [latest[0]]  # evicted seqs: resume at the oldest kept
+    assert eng.recent_trades("ETH-USDT") == []
+
+def test_trade_tape_pages_by_seq_through_equal_timestamps():
+    from engine.models import Trade
+    from engine.trade_tape import TradeTape
+    tape = TradeTape(capacity=100)
+    for i in range(7):  # a burst: every trade clamped to the same ts_ns
+        tape.record(Trade(symbol=SYM, trade_id=f"t{i}", price=Decimal(100), quantity=Decimal(1),
+                          aggressor_side="buy", maker_order_id="m", taker_order_id="k", ts_ns=1_000))
+    pages, cursor = [], 0
+    while True:
+        page = tape.query(SYM, after_seq=cursor, limit=3)
+        if not page:
+            break
+        pages.append([t["trade_id"] for t in page])
+        cursor = page[-1]["seq"]
+    assert pages == [["t0", "t1", "t2"], ["t3", "t4", "t5"], ["t6"]]
+    assert tape.query(SYM, since_ns=1_000) == []  # a ts cursor would have lost the rest of the burst
+
+def test_trade_ring_grows_lazily_and_shrinks_when_idle():
+    from engine.trade_tape import TradeRing
+    ring = TradeRing(100_000)
+    assert len(ring.price) == 0 and len(ring.ts) == 0
+    small = TradeRing(4)
+    for i in range(6):
+        ring.append(i, Decimal(100 + i), Decimal(1), "buy", f"t{i}", "m", "k")
+        small.append(i, Decimal(100 + i), Decimal(1), "sell", f"t{i}", "m", "k")
+    assert len(ring.price) == 6 and len(small.price) == 4  # sized by trades, wrapped at capacity
+    assert [r[4] for r in small.rows(10)] == ["t2", "t3", "t4", "t5"]
+    small.shrink(2)
+    assert len(small.price) == 2 and small.start == 0 and small.total == 6
+    assert [small.row(k, SYM)["seq"] for k in range(2)] == [5, 6]
+    for i in range(6, 9):  # grows again, then wraps
+        small.append(i, Decimal(100), Decimal(1), "buy", f"t{i}", "m", "k")
+    assert [r[4] for r in small.rows(10)] == ["t5", "t6", "t7", "t8"] and small.total == 9
+    back = TradeRing.restore(4, small.total, small.last_ts, small.rows(3))
+    assert back.rows(10) == small.rows(3) and back.row(0, SYM)["seq"] == 7
+
+def test_remove_order_matches_by_identity():
+    import copy
+    eng = MatchingEngine()
+    first, second = mk("buy", 1, 99), mk("buy", 1, 99)
+    run(eng.submit(first))
+    run(eng.submit(second))
+    bids = eng.books[SYM].bids
+    resting = bids.get(second.order_id)
+    twin = copy.copy(resting)  # equal in every field, but not the resting order
+    bids.levels[Decimal(99)].appendleft(twin)
+    assert bids.remove_order(second.order_id) is resting
+    left = list(bids.levels[Decimal(99)])
+    assert len(left) == 2 and left[0] is twin and left[1] is bids.get(first.order_id)
+
+def test_quote_and_depth_index():
+    eng = MatchingEngine()
+    for px, q in ((100, 1), (101, 2), (103, 3)):
+        run(eng.submit(mk("sell", q, px)))
+    run(eng.submit(mk("buy", 1, 99)))
+    r = eng.quote(SYM, "buy", Decimal("2"))
+    assert r["levels"] == 2 and r["worst_price"] == "101" and Decimal(r["vwap"]) == Decimal("100.5")
+    r = eng.quote(SYM, "buy", Decimal("10"))
+    assert not r["complete"] and r["fillable_qty"] == "6" and r["levels"] == 3
+    run(eng.submit(mk("buy", 1.5, 101, t="ioc")))  # consumes 100 fully, 0.5 of 101
+    r = eng.quote(SYM, "buy", Decimal("2"))
+    assert r["worst_price"] == "103" and Decimal(r["notional"]) == Decimal("1.5") * 101 + Decimal("0.5") * 103
+    assert eng.books[SYM].asks.available(Decimal("101")) == Decimal("1.5")
+    assert eng.snapshot(SYM)["asks"] == [["101", "1.5"], ["103", "3"]]
+
+def test_stop_cascade_fires_without_deadlock():
+    eng = MatchingEngine()
+    for px in (100, 99, 98, 97):
+        run(eng.submit(mk("buy", 1, px)))
+    stop1 = Order(symbol=SYM, order_type="stop_market", side="sell", quantity=Decimal("1"), trigger_price=Decimal("100"))
+    stop2 = Order(symbol=SYM, order_type="stop_market", side="sell", quantity=Decimal("1"), trigger_price=Decimal("99"))
+    run(eng.submit(stop1))
+    run(eng.submit(stop2))
+    trades, _ = run(asyncio.wait_for(eng.submit(mk("sell", 1, 100)), timeout=1))
+    assert [t.price for t in trades] == [Decimal("100")]
+    # stop1 fired at 100 -> trades 99 -> fires stop2 -> trades 98
+    assert eng.triggers[SYM] == []
+    assert eng.snapshot(SYM)["bids"] == [["97", "1"]]
+
+def test_engine_profiler_attributes_submit_cost():
+    from engine.profiling import EngineProfiler
+    eng = MatchingEngine()
+    prof = EngineProfiler(eng)
+    run(eng.submit(mk("sell", 1, 100)))
+    run(eng.submit(mk("buy", 1, 100)))
+    assert prof.calls["submit"] == 2
+    buckets = prof.attribution()
+    assert "md emission" in buckets and "depth index" in buckets
+    prof.detach()
+    assert "submit" not in vars(eng)
+
+def test_engine_profiler_skips_other_tasks_while_submits_wait():
+    from engine.profiling import EngineProfiler
+    eng = MatchingEngine()
+    prof = EngineProfiler(eng)
+
+    def unrelated_busy():
+        return sum(range(10_000))
+
+    async def scenario():
+        await eng.locks[SYM].acquire()
+        subs = [asyncio.create_task(eng.submit(mk("buy", 1, 100 - i))) for i in range(3)]
+        for _ in range(5):
+            await asyncio.sleep(0)
+            unrelated_busy()  # runs while the submits wait on the lock
+        eng.locks[SYM].release()
+        await asyncio.gather(*subs)
+        await eng.locks[SYM].acquire()
+        t = asyncio.create_task(eng.submit(mk("buy", 1, 50)))
+        await asyncio.sleep(0)
+        t.cancel()  # delivered through the wrapper to the submit waiting on the lock
+        await asyncio.gather(t, return_exceptions=True)
+        eng.locks[SYM].release()
+        assert t.cancelled()
+    run(scenario())
+    names = {name for (_f, _l, name) in prof.stats().stats}
+    assert prof.calls["submit"] == 4 and "_match" in names and "unrelated_busy" not in names
+    assert len(eng.snapshot(SYM)["bids"]) == 3 and prof._depth == 0
+
+def test_engine_profiler_closes_the_wrapped_coroutine_on_close():
+    import types
+    from engine.profiling import EngineProfiler, _Stepped
+    prof, log = EngineProfiler(MatchingEngine(), methods=()), []
+
+    @types.coroutine
+    def pause():
+        yield "tick"
+
+    async def waits():
+        try:
+            await pause()
+            log.append("resumed")
+        finally:
+            log.append("closed")
+    inner = waits()
+    outer = _Stepped(prof, inner).__await__()
+    assert outer.send(None) == "tick"
+    outer.close()  # GeneratorExit goes to close(), not through a profiled throw step
+    assert log == ["closed"] and inner.cr_frame is None and prof._depth == 0
+
+def test_gtd_orders_expire_in_one_batch():
+    import time
+    eng = MatchingEngine()
+    t0 = time.time_ns()
+    gtd = [Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal("1"),
+                 price=Decimal(100 - i), expire_ts_ns=t0 + 1_000_000_000) for i in range(3)]
+    for o in gtd:
+        run(eng.submit(o))
+    run(eng.submit(mk("sell", 1, 100)))  # fills gtd[0] before it expires
+    run(eng.submit(mk("buy", 1, 90)))    # GTC, stays
+    assert run(eng.expire_due(t0 + 500_000_000)) == 0
+    assert run(eng.expire_due(t0 + 2_000_000_000)) == 2
+    assert eng.snapshot(SYM)["bids"] == [["90", "1"]]
+    assert not run(eng.cancel(SYM, gtd[1].order_id))
+
+def test_gtd_deadline_inside_a_tick_never_expires_early():
+    import time
+    eng = MatchingEngine()
+    tick = eng.expiry.tick_ns
+    deadline = (time.time_ns() // tick + 1000) * tick + tick // 2  # halfway through a tick
+    run(eng.submit(Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal("1"),
+                         price=Decimal("100"), expire_ts_ns=deadline)))
+    assert run(eng.expire_due(deadline - 1)) == 0 and eng.snapshot(SYM)["bids"] == [["100", "1"]]
+    assert run(eng.expire_due(deadline - deadline % tick + tick)) == 1  # the first tick boundary after it
+    assert eng.snapshot(SYM)["bids"] == []
+
+def test_gtd_triggers_expire_and_past_deadlines_are_rejected():
+    import time, pytest
+    from engine.models import OrderRejected
+    eng = MatchingEngine()
+    t0 = time.time_ns()
+    stop = Order(symbol=SYM, order_type="stop_limit", side="sell", quantity=Decimal("1"), price=Decimal("80"),
+                 trigger_price=Decimal("90"), expire_ts_ns=t0 + 1_000_000_000)
+    run(eng.submit(stop))
+    assert run(eng.expire_due(t0 + 2_000_000_000)) == 1 and eng.triggers[SYM] == []
+    # a trigger past its deadline never fires, even before the sweep removes it
+    late = Order(symbol=SYM, order_type="stop_market", side="sell", quantity=Decimal("1"),
+                 trigger_price=Decimal("90"), expire_ts_ns=t0 + 1_000_000_000)
+    run(eng.submit(late))
+    late.expire_ts_ns = t0  # as if the deadline passed while it sat in the trigger list
+    run(eng.submit(mk("buy", 1, 89)))
+    run(eng.submit(mk("sell", 1, 89)))  # trades at 89: would fire the stop
+    assert eng.triggers[SYM] == [late] and eng.snapshot(SYM)["bids"] == []
+    with pytest.raises(OrderRejected, match="in the past"):
+        run(eng.submit(Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal("1"),
+                             price=Decimal("1"), expire_ts_ns=t0)))
+    assert eng.snapshot(SYM)["bids"] == []
+
+def test_mass_cancel_filters_and_owner_kill_switch():
+    eng = MatchingEngine()
+    def q(side, px, owner, sym=SYM):
+        return Order(symbol=sym, order_type="limit", side=side, quantity=Decimal("1"),
+                     price=Decimal(px), owner=owner)
+    for px in (95, 96, 97):
+        run(eng.submit(q("buy", px, "mm1")))
+        run(eng.submit(q("buy", px, "mm2")))
+    for px in (103, 104):
+        run(eng.submit(q("sell", px, "mm1")))
+    run(eng.submit(q("sell", 200, "mm1", sym="ETH-USDT")))
+    stop = Order(symbol=SYM, order_type="stop_market", side="sell", quantity=Decimal("1"),
+                 trigger_price=Decimal("90"), owner="mm1")
+    run(eng.submit(stop))
+
+    # mm1 bids in [96, 97] only
+    ids = run(eng.mass_cancel(SYM, side="buy", price_range=(Decimal("96"), Decimal("97")), owner="mm1"))
+    assert len(ids) == 2
+    assert eng.snapshot(SYM)["bids"] == [["97", "1"], ["96", "1"], ["95", "2"]]
+    # any owner, asks from 104 up
+    assert len(run(eng.mass_cancel(SYM, side="sell", price_range=(Decimal("104"), None)))) == 1
+
+    killed = run(eng.cancel_owner("mm1"))
+    assert sorted(killed) == [SYM, "ETH-USDT"]
+    assert stop.order_id in killed[SYM] and len(killed[SYM]) == 3  # 95 bid, 103 ask, stop
+    assert eng.snapshot(SYM)["asks"] == [] and eng.triggers[SYM] == []
+    assert eng.snapshot(SYM)["bids"] == [["97", "1"], ["96", "1"], ["95", "1"]]
+    assert eng.books[SYM].bids.by_owner.keys() == {"mm2"}
+    assert run(eng.cancel_owner("mm1")) == {}
+
+def test_owner_index_drops_filled_orders():
+    eng = MatchingEngine()
+    m = Order(symbol=SYM, order_type="limit", side="sell", quantity=Decimal("1"), price=Decimal("100"), owner="mm")
+    run(eng.submit(m))
+    run(eng.submit(mk("buy", 1, 100)))
+    assert eng.books[SYM].asks.by_owner == {} and eng.books[SYM].asks.orders == {}
+    assert run(eng.mass_cancel(SYM, owner="mm")) == []
+
+def test_cancel_on_disconnect_when_last_session_closes():
+    from engine.sessions import SessionRegistry
+    async def scenario():
+        eng = MatchingEngine()
+        reg = SessionRegistry(eng)
+        s1 = reg.open("mm", cancel_on_disconnect=True)
+        s2 = reg.open("mm", cancel_on_disconnect=False)
+        for i in range(10_000):
+            await eng.submit(Order(symbol=SYM, order_type="limit", side="sell" if i % 2 else "buy",
+                                   quantity=Decimal("1"), price=Decimal(1000 + i % 50 if i % 2 else 900 - i % 50),
+                                   owner="mm"))
+        await eng.submit(Order(symbol=SYM, order_type="stop_market", side="buy", quantity=Decimal("1"),
+                               trigger_price=Decimal("2000"), owner="mm"))
+        other = Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal("1"), price=Decimal("1"))
+        await eng.submit(other)
+        assert not await eng.cancel(SYM, other.order_id, owner="mm")  # not theirs
+        assert await reg.close(s1) == 0   # s2 still connected
+        assert await reg.close(s2) == 10_001
+        assert eng.snapshot(SYM)["asks"] == [] and eng.snapshot(SYM)["bids"] == [["1", "1"]]
+        assert eng.triggers[SYM] == [] and reg.count("mm") == 0
+    run(scenario())
+
+def test_stranded_levels_are_compacted_and_reused():
+    eng = MatchingEngine()
+    run(eng.submit(mk("buy", 1, 1000)))
+    bids = eng._book(SYM).bids
+    for i in range(500):  # quote and pull at new prices behind the touch
+        o = mk("buy", 1, 500 + i)
+        run(eng.submit(o))
+        run(eng.cancel(SYM, o.order_id))
+    h = eng.book_health(SYM)["bids"]
+    assert h["live_levels"] == 1 and h["compactions"] > 0
+    assert h["heap_entries"] <= bids.COMPACT_MIN + 2 and h["pooled_levels"] > 0
+    bids.compact()
+    assert bids.heap == [Decimal(-1000)] and list(bids.levels) == [Decimal(1000)]
+    run(eng.submit(mk("buy", 2, 999)))
+    trades, _ = run(eng.submit(mk("sell", 3, 999)))
+    assert [t.price for t in trades] == [Decimal(1000), Decimal(999)]
+    assert eng.book_health("NOPE") is None
+
+def test_amend_reduces_in_place_and_keeps_priority():
+    from engine.registry import OrderRegistry
+    from engine.risk import RiskManager
+    risk = RiskManager()
+    risk.configure("mm", balance=Decimal(10_000))
+    eng = MatchingEngine(risk=risk, registry=OrderRegistry())
+    first = Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal(5), price=Decimal(100), owner="mm")
+    run(eng.submit(first))
+    run(eng.submit(mk("buy", 1, 100)))
+    assert run(eng.amend(SYM, first.order_id, Decimal(2)))
+    assert not run(eng.amend(SYM, first.order_id, Decimal(1), owner="other"))
+    for bad in (Decimal(2), Decimal(0)):
+        try:
+            run(eng.amend(SYM, first.order_id, bad))
+            assert False, bad
+        except ValueError:
+            pass
+    assert eng.snapshot(SYM)["bids"] == [["100", "3"]]
+    assert risk.accounts["mm"].open_notional == Decimal(200)
+    assert eng.registry.get(first.order_id).to_json()["remaining_qty"] == "2"
+    trades, _ = run(eng.submit(mk("sell", 2, 100)))
+    assert [t.maker_order_id for t in trades] == [first.order_id]  # still first in the queue
+    assert eng.registry.get(first.order_id).status == "filled"
+
+def test_cancel_lane_overtakes_queued_submits():
+    async def scenario(cancel_priority, how):
+        eng = MatchingEngine(cancel_priority=cancel_priority)
+        quote = Order(symbol=SYM, order_type="limit", side="sell", quantity=Decimal("1"), price=Decimal("100"), owner="mm")
+        await eng.submit(quote)
+        async with eng.locks[SYM]:  # e.g. an uncross holding the book
+            takers = [asyncio.create_task(eng.submit(mk("buy", 1, 100, t="ioc"))) for _ in range(3)]
+            if how == "cancel":
+                pull = asyncio.create_task(eng.cancel(SYM, quote.order_id))
+            elif how == "mass_cancel":
+                pull = asyncio.create_task(eng.mass_cancel(SYM, owner="mm"))
+            else:  # kill switch / cancel-on-disconnect
+                pull = asyncio.create_task(eng.cancel_owner("mm"))
+            await asyncio.sleep(0)
+        filled = sum(len(t) for t, _ in await asyncio.gather(*takers))
+        stats = eng.lock_wait_stats()
+        assert stats["new"]["count"] == 4 and stats["cancel"]["count"] == 1
+        return filled, bool(await pull)
+    for how in ("cancel", "mass_cancel", "cancel_owner"):
+        assert run(scenario(False, how)) == (1, False)  # FIFO: the quote is picked off first
+        assert run(scenario(True, how)) == (0, True)
+    eng = MatchingEngine()
+    assert run(eng.mass_cancel("NOPE")) == [] and "NOPE" not in eng.locks
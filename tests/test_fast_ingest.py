@@ -0,0 +1,39 @@
+import orjson
+import pytest
+from decimal import Decimal
+from app.fast_ingest import IngestError, parse_order, encode_submit_result
+
+def body(**kw):
+    return orjson.dumps(kw)
+
+def test_parse_matches_order_model_rules():
+    o = parse_order(body(symbol="BTC-USDT", order_type="stop_limit", side="sell",
+                         quantity="0.5", price="59000", trigger_price="59500"))
+    assert (o.order_type, o.quantity, o.price, o.trigger_price) == \
+        ("stop_limit", Decimal("0.5"), Decimal("59000"), Decimal("59500"))
+    assert parse_order(body(symbol="X", order_type="market", side="buy", quantity="1")).price is None
+
+@pytest.mark.parametrize("kw, detail", [
+    (dict(symbol="X", order_type="limit", side="buy", quantity="1"), "price required for this order_type"),
+    (dict(symbol="X", order_type="limit", side="buy", quantity="-1", price="1"), "Invalid quantity"),
+    (dict(symbol="X", order_type="iceberg", side="buy", quantity="1"), "Invalid order_type"),
+    (dict(symbol="X", order_type="market", side="hold", quantity="1"), "Invalid side"),
+    (dict(symbol="X", order_type="market", side=["buy"], quantity="1"), "Invalid side"),
+    (dict(symbol="X", order_type={"t": 1}, side="buy", quantity="1"), "Invalid order_type"),
+    (dict(symbol="X", order_type="market", side="buy", quantity="1", tif="gtc"), "Unknown field(s): tif"),
+])
+def test_parse_rejects(kw, detail):
+    with pytest.raises(IngestError) as e:
+        parse_order(body(**kw))
+    assert str(e.value) == detail
+
+def test_encode_result_shape():
+    o = parse_order(body(symbol="X", order_type="limit", side="buy", quantity="2", price="10"))
+    out = orjson.loads(encode_submit_result(o, [], o))
+    assert out == {"order_id": o.order_id, "client_order_id": None, "resting": True, "resting_order_id": o.order_id,
+                   "resting_qty": "2", "trades": []}
+
+def test_owner_passed_through_and_type_checked():
+    assert parse_order(body(symbol="X", order_type="limit", side="buy", quantity="1", price="1", owner="mm1")).owner == "mm1"
+    with pytest.raises(IngestError, match="owner"):
+        parse_order(body(symbol="X", order_type="limit", side="buy", quantity="1", price="1", owner=7))
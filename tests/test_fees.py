@@ -0,0 +1,39 @@
+import asyncio
+from decimal import Decimal
+from engine.fees import FeeSchedule, FeeTier
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, owner):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(qty), price=Decimal(px), owner=owner)
+
+def test_resolution_order_and_tier_promotion():
+    fs = FeeSchedule(10, 20, tiers=[FeeTier(Decimal(1000), 5, 15), FeeTier(Decimal(10_000), -2, 10)])
+    fs.set_symbol("ETH-USDT", 0, 5)
+    fs.set_account("vip", -1, 8)
+    assert fs.rate("vip", "ETH-USDT").to_json() == {"maker_bps": -1, "taker_bps": 8}
+    assert fs.rate("bob", "ETH-USDT").taker_bps == 5
+    assert fs.rate("bob", SYM).taker_bps == 20
+    fs.record("bob", Decimal(999))
+    assert fs.rate("bob", SYM).taker_bps == 20
+    fs.record("bob", Decimal(1))
+    assert fs.rate("bob", SYM).taker_bps == 15
+    fs.record("bob", Decimal(9000))
+    assert fs.rate("bob", SYM).maker_bps == -2
+    assert fs.rate(None, SYM).taker_bps == 20
+
+def test_rate_fixed_per_order_and_maker_rebate():
+    async def scenario():
+        fs = FeeSchedule(10, 20, tiers=[FeeTier(Decimal(100), -1, 10)])
+        eng = MatchingEngine(fees=fs)
+        await eng.submit(o("sell", "1", "100", "mm"))   # rate cached: still the base tier
+        await eng.submit(o("sell", "1", "100", "mm"))
+        t1, _ = await eng.submit(o("buy", "1", "100", "taker"))
+        assert (t1[0].maker_fee, t1[0].taker_fee) == (Decimal("0.1"), Decimal("0.2"))
+        assert fs.rate("mm", SYM).maker_bps == -1       # promoted after 100 of volume
+        await eng.submit(o("sell", "1", "100", "mm"))   # new order picks up the rebate
+        t2, _ = await eng.submit(o("buy", "2", "100", "other"))
+        assert [t.maker_fee for t in t2] == [Decimal("0.1"), Decimal("-0.01")]
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+from decimal import Decimal
+from engine.book_store import BookStore
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.registry import OrderRegistry
+from engine.risk import RiskManager
+
+def o(sym, side, qty, px, typ="limit", owner="a", **kw):
+    return Order(symbol=sym, order_type=typ, side=side, quantity=Decimal(qty),
+                 price=None if px is None else Decimal(px), owner=owner, **kw)
+
+def test_lru_cap_hibernates_and_wakes_books(tmp_path):
+    async def scenario():
+        risk = RiskManager()
+        risk.configure("a", balance=Decimal(10**6))
+        store = BookStore(str(tmp_path / "hib"))
+        eng = MatchingEngine(state_dir=str(tmp_path), risk=risk, store=store, max_books=2)
+        first = o("A-USD", "buy", "1", "10")
+        await eng.submit(first)
+        await eng.submit(o("A-USD", "buy", "2", "10"))
+        await eng.submit(o("A-USD", "sell", "1", None, "stop_market", trigger_price=Decimal("5")))
+        await eng.submit(o("B-USD", "sell", "1", "20"))
+        await eng.submit(o("C-USD", "sell", "1", "30"))
+        assert list(eng.books) == ["B-USD", "C-USD"] and "A-USD" not in eng.triggers
+        assert store.symbols() == ["A-USD"] and eng.hibernated == {"A-USD": {"a"}}
+        assert risk.accounts["a"].open_notional == Decimal("80")  # exposure kept while asleep
+        assert eng.snapshot("A-USD")["bids"] == [["10", "3"]]  # wakes A (and parks B)
+        assert list(eng.books) == ["C-USD", "A-USD"] and eng.wakes == 1 and store.symbols() == ["B-USD"]
+        trades, _ = await eng.submit(o("A-USD", "sell", "1", "10", owner="b"))
+        assert trades[0].maker_order_id == first.order_id  # FIFO survived
+        assert risk.accounts["a"].open_notional == Decimal("70")
+        assert len(eng.triggers["A-USD"]) == 1
+        cancelled = await eng.cancel_owner("a")  # reaches into hibernated B-USD too
+        assert set(cancelled) == {"A-USD", "B-USD", "C-USD"} and risk.accounts["a"].open_notional == 0
+    asyncio.run(scenario())
+
+def test_queries_do_not_create_books_and_idle_books_hibernate(tmp_path):
+    async def scenario():
+        eng = MatchingEngine(state_dir=str(tmp_path), store=BookStore(str(tmp_path / "hib")))
+        assert eng.snapshot("NOPE")["bids"] == [] and not await eng.cancel("NOPE", "x")
+        assert eng.quote("NOPE", "buy", Decimal(1))["fillable_qty"] == "0" and not eng.books
+        deadline = time.time_ns() + 10**9
+        await eng.submit(o("A-USD", "buy", "1", "10", expire_ts_ns=deadline))
+        await eng.submit(o("B-USD", "buy", "1", "10"))
+        eng.books["A-USD"].last_access -= 600
+        assert eng.hibernate_idle(300) == 1 and list(eng.books) == ["B-USD"]
+        assert await eng.expire_due(deadline + 10**6) == 1  # expiry reaches hibernated books
+        assert eng.snapshot("A-USD")["bids"] == []
+    asyncio.run(scenario())
+
+def test_books_left_by_a_previous_process_load_lazily(tmp_path):
+    async def scenario():
+        store = BookStore(str(tmp_path / "hib"))
+        eng = MatchingEngine(state_dir=str(tmp_path), store=store)
+        keep = o("A-USD", "buy", "1", "10")
+        await eng.submit(keep)
+        eng.hibernate("A-USD")
+        risk, reg = RiskManager(), OrderRegistry()
+        risk.configure("a", balance=Decimal(100))
+        fresh = MatchingEngine(state_dir=str(tmp_path), store=BookStore(str(tmp_path / "hib")), risk=risk, registry=reg)
+        assert fresh.hibernated == {"A-USD": None} and not fresh.books
+        assert fresh.snapshot("A-USD")["bids"] == [["10", "1"]]
+        assert risk.accounts["a"].open_notional == 10 and reg.get(keep.order_id).status == "new"
+        assert not os.listdir(tmp_path / "hib")
+    asyncio.run(scenario())
+
+def test_hibernation_releases_tape_seqs_lock_and_admission_state(tmp_path):
+    from engine.admission import AdmissionControl
+    async def scenario():
+        eng = MatchingEngine(state_dir=str(tmp_path), store=BookStore(str(tmp_path / "hib")),
+                             admission=AdmissionControl())
+        for px in ("10", "11", "12"):
+            await eng.submit(o("A-USD", "sell", "1", px))
+            await eng.submit(o("A-USD", "buy", "1", px, owner="b"))
+        before, md = eng.recent_trades("A-USD"), eng.md_seq["A-USD"]
+        assert eng.trade_seq["A-USD"] == 3 and "A-USD" in eng.admission.queues
+        assert eng.hibernate("A-USD")
+        for per_symbol in (eng.tape.rings, eng.trade_seq, eng.md_seq, eng.locks, eng.admission.queues):
+            assert "A-USD" not in per_symbol
+        assert eng.hibernated == {"A-USD": set()}  # nothing resting, but the tape and seqs are parked
+        assert eng.recent_trades("A-USD") == before and eng.md_seq["A-USD"] == md  # wakes it
+        await eng.submit(o("A-USD", "sell", "1", "13"))
+        trades, _ = await eng.submit(o("A-USD", "buy", "1", "13", owner="b"))
+        assert eng.recent_trades("A-USD", after_seq=3)[0]["trade_id"] == trades[0].trade_id
+        assert eng.trade_seq["A-USD"] == 4 and eng.md_seq["A-USD"] > md
+    asyncio.run(scenario())
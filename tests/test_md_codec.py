@@ -0,0 +1,47 @@
+import asyncio
+import orjson
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.md_codec import decode
+from engine.models import Order
+
+SYM = "BTC-USDT"
+
+def test_binary_frames_match_json_messages():
+    async def scenario():
+        eng = MatchingEngine()
+        mdq = await eng.md_pub.subscribe(f"md:{SYM}")
+        trq = await eng.trades_pub.subscribe(f"trades:{SYM}")
+        await eng.submit(Order(symbol=SYM, order_type="limit", side="sell", quantity=Decimal("1.5"), price=Decimal("100.25")))
+        await eng.submit(Order(symbol=SYM, order_type="limit", side="buy", quantity=Decimal("0.5"), price=Decimal("99")))
+        await eng.submit(Order(symbol=SYM, order_type="ioc", side="buy", quantity=Decimal("0.1"), price=Decimal("101")))
+        await asyncio.sleep(0)
+        mds = [mdq.get_nowait() for _ in range(3)]
+        assert [m.seq for m in mds] == [1, 2, 3]
+        last = mds[-1]
+        j = orjson.loads(last.json_text())
+        assert j["timestamp"].endswith("Z") and j["bids"] == [["99", "0.5"]] and j["asks"] == [["100.25", "1.4"]]
+        b = decode(last.binary())
+        assert (b["type"], b["seq"], b["ts_ns"]) == ("md", 3, last.ts_ns)
+        assert [[format(p, "f"), format(q, "f")] for p, q in b["asks"]] == j["asks"]
+        assert last.binary() is last.binary()  # encoded once
+        t = trq.get_nowait()
+        j, b = orjson.loads(t.json_text()), decode(t.binary())
+        assert b["seq"] == j["seq"] == 1
+        for k in ("trade_id", "maker_order_id", "taker_order_id", "aggressor_side", "symbol"):
+            assert b[k] == j[k]
+        for k in ("price", "quantity", "maker_fee", "taker_fee"):
+            assert b[k] == Decimal(j[k])
+        assert len(t.binary()) < len(t.json_text()) / 2
+        snap = decode(eng.md_snapshot(SYM).binary())
+        assert snap["seq"] == 3 and snap["bids"] == decode(last.binary())["bids"]
+        assert decode(eng.md_snapshot("NEW-SYM").binary())["bids"] == [] and "NEW-SYM" not in eng.books
+    asyncio.run(scenario())
+
+def test_fixed_point_rounding_and_range():
+    from engine.md_codec import MdUpdate
+    m = MdUpdate(SYM, 1, 1_700_000_000_123_456_789, [(Decimal("0.000000015"), Decimal("2.000000025"))], [])
+    assert decode(m.binary())["bids"] == [(Decimal("0.00000002"), Decimal("2.00000002"))]  # half-even
+    assert orjson.loads(m.json_text())["timestamp"] == "2023-11-14T22:13:20.123456Z"
+    big = MdUpdate(SYM, 2, 0, [(Decimal("0.00001"), Decimal("1e11"))], [])
+    assert big.binary() is None and orjson.loads(big.json_text())["bids"] == [["0.00001", "100000000000"]]
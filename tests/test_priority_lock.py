@@ -0,0 +1,37 @@
+import asyncio
+from engine.priority_lock import PriorityLock
+
+def test_priority_lane_goes_first_and_fifo_within_lanes():
+    async def scenario():
+        lock, order = PriorityLock(), []
+
+        async def take(name, priority):
+            await lock.acquire(priority)
+            order.append(name)
+            await asyncio.sleep(0)
+            lock.release()
+        async with lock:
+            tasks = [asyncio.create_task(take(n, p)) for n, p in (("a", False), ("b", False), ("c", True), ("d", True))]
+            await asyncio.sleep(0)
+            assert lock._waiters == 4
+        await asyncio.gather(*tasks)
+        assert order == ["c", "d", "a", "b"] and not lock.locked()
+    asyncio.run(scenario())
+
+def test_cancelled_waiters_do_not_strand_the_lock():
+    async def scenario():
+        lock = PriorityLock()
+        await lock.acquire()
+        gone = asyncio.create_task(lock.acquire(priority=True))
+        handed = asyncio.create_task(lock.acquire())
+        nxt = asyncio.create_task(lock.acquire())
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        lock.release()  # skips the cancelled waiter and hands the lock to `handed`...
+        handed.cancel()  # ...which is cancelled before it runs, so it passes the lock on
+        await asyncio.gather(gone, handed, return_exceptions=True)
+        assert await nxt and lock.locked() and lock._waiters == 0
+        lock.release()
+        assert not lock.locked()
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import asyncio
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.registry import OrderRegistry
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px=None, typ="limit", owner="a", **kw):
+    return Order(symbol=SYM, order_type=typ, side=side, quantity=Decimal(qty),
+                 price=None if px is None else Decimal(px), owner=owner, **kw)
+
+def test_status_fills_and_average_price():
+    async def scenario():
+        reg = OrderRegistry()
+        eng = MatchingEngine(registry=reg)
+        s1, s2 = o("sell", "1", "100"), o("sell", "1", "102")
+        await eng.submit(s1)
+        await eng.submit(s2)
+        assert reg.get(s1.order_id).status == "new"
+        b = o("buy", "3", "101", typ="ioc", owner="b")
+        await eng.submit(b)
+        st = reg.get(b.order_id).to_json()
+        assert st["status"] == "cancelled" and st["reason"] == "unfilled"
+        assert st["filled_qty"] == "1" and st["avg_price"] == "100"
+        assert reg.get(s1.order_id).status == "filled"
+        b2 = o("buy", "2", "103", owner="b")
+        await eng.submit(b2)  # fills 1 @ 102, rests 1
+        st = reg.get(b2.order_id)
+        assert st.status == "partially_filled" and st.filled_qty == 1
+        stop = o("sell", "1", typ="stop_market", trigger_price=Decimal("90"))
+        await eng.submit(stop)
+        await eng.cancel(SYM, stop.order_id)
+        assert reg.get(stop.order_id).status == "cancelled"
+        await eng.cancel(SYM, b2.order_id)
+        assert reg.get(b2.order_id).status == "cancelled" and not reg.live
+    asyncio.run(scenario())
+
+def test_triggered_parent_links_child():
+    async def scenario():
+        reg = OrderRegistry()
+        eng = MatchingEngine(registry=reg)
+        stop = o("buy", "1", typ="stop_market", trigger_price=Decimal("100"))
+        await eng.submit(stop)
+        await eng.submit(o("sell", "2", "100", owner="m"))
+        await eng.submit(o("buy", "1", "100", owner="t"))  # trades at 100 -> stop fires
+        parent = reg.get(stop.order_id)
+        assert parent.status == "triggered"
+        child = reg.get(parent.child_order_id)
+        assert child.status == "filled" and child.owner == "a"
+    asyncio.run(scenario())
+
+def test_paged_open_orders_and_bounded_archive():
+    async def scenario():
+        reg = OrderRegistry(archive_size=10)
+        eng = MatchingEngine(registry=reg)
+        orders = [o("buy", "1", str(100 - i)) for i in range(250)]
+        for x in orders:
+            await eng.submit(x)
+        for x in orders[::2]:
+            await eng.cancel(SYM, x.order_id)
+        seen, cursor = [], 0
+        while True:
+            page, cursor = reg.open_orders("a", after=cursor, limit=40)
+            seen += [s.order_id for s in page]
+            if cursor is None:
+                break
+        assert seen == [x.order_id for x in orders[1::2]]
+        assert len(reg.archive) == 10 and reg.get(orders[0].order_id) is None
+        assert reg.get(orders[-2].order_id).status == "cancelled"
+        assert reg.open_orders("a", symbol="ETH-USDT") == ([], None)
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.risk import RiskError, RiskManager
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, owner="acct", t="limit"):
+    return Order(symbol=SYM, order_type=t, side=side, quantity=Decimal(qty),
+                 price=None if px is None else Decimal(px), owner=owner)
+
+def test_pre_trade_limits_and_incremental_exposure():
+    async def scenario():
+        risk = RiskManager()
+        risk.configure("acct", balance=Decimal("1000"), max_order_qty=Decimal("5"),
+                       max_open_notional=Decimal("1200"))
+        eng = MatchingEngine(risk=risk)
+        a = risk.accounts["acct"]
+        with pytest.raises(RiskError, match="max order size"):
+            await eng.submit(o("buy", "6", 10))
+        _, bid = await eng.submit(o("buy", "5", 100))
+        assert (a.open_notional, a.reserved, a.available) == (500, 500, 500)
+        with pytest.raises(RiskError, match="insufficient balance"):
+            await eng.submit(o("buy", "5", 120))
+        with pytest.raises(RiskError, match="max open notional"):
+            await eng.submit(o("sell", "5", 150))
+        await eng.submit(o("sell", "2", 100, owner=None))  # someone else hits the bid
+        assert (a.balance, a.open_notional, a.reserved) == (800, 300, 300)
+        await eng.submit(o("sell", "1", 110, owner=None))
+        trades, _ = await eng.submit(o("buy", "1", None, t="market"))  # priced at the best ask
+        assert len(trades) == 1 and a.balance == 690
+        assert await eng.cancel(SYM, bid.order_id)
+        assert (a.open_notional, a.reserved, risk.rejects) == (0, 0, 3)
+        await eng.submit(o("sell", "3", 200))
+        await eng.mass_cancel(SYM, owner="acct")
+        assert a.open_notional == 0 and risk.resting == {}
+    asyncio.run(scenario())
+
+def test_unknown_accounts_pass_unless_strict():
+    async def scenario():
+        await MatchingEngine(risk=RiskManager()).submit(o("buy", "1", 1, owner="nobody"))
+        with pytest.raises(RiskError, match="unknown account"):
+            await MatchingEngine(risk=RiskManager(strict=True)).submit(o("buy", "1", 1, owner=None))
+    asyncio.run(scenario())
+
+def test_market_order_priced_at_its_sweep_notional():
+    async def scenario():
+        risk = RiskManager()
+        risk.configure("acct", balance=Decimal("250"))
+        eng = MatchingEngine(risk=risk)
+        await eng.submit(o("sell", "1", 100, owner=None))
+        await eng.submit(o("sell", "1", 200, owner=None))
+        # 2 at the best ask would be 200; sweeping both levels costs 300
+        with pytest.raises(RiskError, match="insufficient balance"):
+            await eng.submit(o("buy", "2", None, t="market"))
+        assert eng.snapshot(SYM)["asks"] == [["100", "1"], ["200", "1"]]
+        trades, _ = await eng.submit(o("buy", "1.5", None, t="market"))  # 100 + 0.5 * 200 = 200
+        assert len(trades) == 2 and risk.accounts["acct"].balance == 50
+    asyncio.run(scenario())
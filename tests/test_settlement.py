@@ -0,0 +1,67 @@
+import asyncio
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.settlement import Ledger, Settlement
+
+SYM = "BTC-USDT"
+
+def o(side, qty, px, owner):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(qty), price=Decimal(px), owner=owner)
+
+def test_fills_and_fees_settle_in_integer_units(tmp_path):
+    async def scenario():
+        st = Settlement(maxsize=2, path=str(tmp_path / "ledger.json"))
+        eng = MatchingEngine(state_dir=str(tmp_path), settlement=st)  # 10 / 20 bps
+        await eng.submit(o("sell", "0.5", "60000", "maker"))
+        await eng.submit(o("sell", "0.5", "60010", "maker"))
+        await eng.submit(o("sell", "1", "60020", "maker"))
+        await eng.submit(o("buy", "2", "60020", "taker"))  # 3 trades into a queue of 2
+        assert st.overflows == 1 and st.ledger.settled == 0  # nothing settled on the hot path
+        assert st.drain() == 3
+        led = st.ledger
+        notional = Decimal("0.5") * 60000 + Decimal("0.5") * 60010 + 60020
+        assert led.balances["taker"]["BTC"] == 2 * 10**8
+        assert led.balances["maker"]["BTC"] == -2 * 10**8
+        assert led.amount(led.balances["taker"]["USDT"]) == -(notional + notional * Decimal("0.002"))
+        assert led.amount(led.balances["maker"]["USDT"]) == notional - notional * Decimal("0.001")
+        assert sum(b["USDT"] for b in led.balances.values()) + led.fees["USDT"] == 0
+        st.checkpoint()
+        again = Settlement.open(str(tmp_path / "ledger.json")).ledger
+        assert again.to_json() == led.to_json()
+    asyncio.run(scenario())
+
+def test_background_consumer_batches():
+    async def scenario():
+        st = Settlement()
+        eng = MatchingEngine(settlement=st)
+        task = asyncio.create_task(st.run())
+        for i in range(50):
+            await eng.submit(o("sell", "1", "100", "a"))
+            await eng.submit(o("buy", "1", "100", "b"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        task.cancel()
+        assert st.ledger.settled == 50 and st.pending == 0
+        assert st.batches < 50
+        assert st.ledger.balances_of("b") == {"BTC": "50", "USDT": "-5010"}
+    asyncio.run(scenario())
+
+def test_overflow_settles_after_the_queue_in_engine_order():
+    async def scenario():
+        from engine.models import Trade
+        st = Settlement(maxsize=3)
+        trades = [Trade(symbol=SYM, trade_id=f"t{i}", price=Decimal(100), quantity=Decimal(1), aggressor_side="buy",
+                        maker_order_id="m", taker_order_id="k", taker_owner="b", maker_owner="s") for i in range(8)]
+        order = []
+        st.ledger.apply = lambda batch: order.extend(t.trade_id for t in batch)
+        for t in trades[:5]:
+            st.offer(t)  # t3, t4 spill
+        assert st.drain(batch_max=2) == 2 and order == ["t0", "t1"]  # t2 still queued: overflow waits
+        st.offer(trades[5])  # room in the queue now, but t3, t4 are older
+        assert st.drain(batch_max=2) == 4
+        st.offer(trades[6])
+        st.offer(trades[7])
+        st.drain()
+        assert order == [f"t{i}" for i in range(8)] and st.pending == 0
+    asyncio.run(scenario())
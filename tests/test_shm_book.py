@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing as mp
+from decimal import Decimal
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+from engine.md_codec import _fx
+from engine.shm_book import ShmBookPublisher, ShmBookReader
+
+def D(x): return Decimal(x)
+
+def _read_in_child(name, q):
+    r = ShmBookReader(name)
+    t = r.read("ETH-USDT")
+    q.put((t.bids, t.asks, r.scale))
+    r.close()
+
+def test_engine_publishes_top_of_book():
+    async def scenario():
+        pub = ShmBookPublisher(n_slots=2, depth=2)
+        try:
+            eng = MatchingEngine(book_shm=pub)
+            for side, px in (("buy", "99.5"), ("buy", "99"), ("buy", "98"), ("sell", "101")):
+                await eng.submit(Order(symbol="ETH-USDT", order_type="limit", side=side,
+                                       quantity=D("0.25"), price=D(px)))
+            r = ShmBookReader(pub.name)
+            t = r.read("ETH-USDT")
+            assert t.bids == [(9_950_000_000, 25_000_000), (9_900_000_000, 25_000_000)]  # depth 2
+            assert t.bbo() == (D("99.5"), D("101")) and t.seq % 2 == 0
+            assert r.read("BTC-USDT") is None
+            # another process sees the same bytes
+            q = mp.get_context("spawn").Queue()
+            p = mp.get_context("spawn").Process(target=_read_in_child, args=(pub.name, q))
+            p.start()
+            assert q.get(timeout=30) == (t.bids, t.asks, 10**8)
+            p.join()
+            for s in ("A", "B", "C"):
+                pub.publish(s, [], [])
+            assert pub.dropped == 2  # ETH-USDT + A fill both slots
+            r.close()
+        finally:
+            pub.close()
+    asyncio.run(scenario())
+
+def test_reader_rejects_torn_slot():
+    pub = ShmBookPublisher(n_slots=1, depth=1)
+    try:
+        pub.publish("X", [(D("1"), D("2"))], [])
+        r = ShmBookReader(pub.name)
+        assert r.read("X").bids == [(10**8, 2 * 10**8)]
+        off = pub.slots["X"]
+        pub.buf[off] += 1  # writer "in progress"
+        assert r.read("X", max_spins=10) is None and r.retries == 10
+        pub.buf[off] += 1
+        assert r.read("X").seq == 4
+        r.close()
+    finally:
+        pub.close()
+
+def test_out_of_range_values_never_raise():
+    async def scenario():
+        pub = ShmBookPublisher(n_slots=1, depth=1)
+        try:
+            eng = MatchingEngine(book_shm=pub)
+            # 1e11 * 1e8 does not fit an i64: the quantity saturates instead of failing submit
+            _, rested = await eng.submit(Order(symbol="SHIB-USDT", order_type="limit", side="buy",
+                                               quantity=D("1e11"), price=D("0.00001")))
+            assert rested is not None and pub.saturated == 1
+            r = ShmBookReader(pub.name)
+            assert r.read("SHIB-USDT").bids == [(1000, 2**63 - 1)]
+            pub.publish("SHIB-USDT", [(D("1e12"), D("1"))], [])  # unrepresentable price: skipped
+            assert pub.overflows == 1 and r.read("SHIB-USDT").bids == [(1000, 2**63 - 1)]
+            r.close()
+        finally:
+            pub.close()
+    asyncio.run(scenario())
+
+def test_skipped_first_update_does_not_hide_later_symbols():
+    pub = ShmBookPublisher(n_slots=4, depth=2)
+    try:
+        pub.publish("BIG-USD", [(D("1e12"), D("1"))], [])  # skipped before it ever had a slot
+        pub.publish("ETH-USD", [(D("1999.999999995"), D("0.000000015"))], [])
+        r = ShmBookReader(pub.name)
+        assert r.read("BIG-USD") is None and pub.overflows == 1 and "BIG-USD" not in pub.slots
+        # rounded half-even to 1e-8, the same values the binary md feed carries
+        assert r.read("ETH-USD").bids == [(_fx(D("1999.999999995")), _fx(D("0.000000015")))] == [(200000000000, 2)]
+        r.close()
+    finally:
+        pub.close()
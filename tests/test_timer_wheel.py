@@ -0,0 +1,25 @@
+import random
+from engine.timer_wheel import TimerWheel
+
+def test_wheel_fires_exactly_when_due_across_levels():
+    rng = random.Random(5)
+    w = TimerWheel(tick_ns=1, bits=3, levels=3, start_ns=0)  # small wheels: 8/64/512 ticks
+    now, pending = 0, {}
+    for step in range(2000):
+        for k in range(rng.randint(0, 3)):
+            d = now + rng.choice((rng.randint(-2, 8), rng.randint(0, 100), rng.randint(0, 3000)))
+            pending[(step, k)] = d
+            w.schedule(d, (step, k))
+        now += rng.choice((0, 1, 1, 3, 17, 200))
+        fired = w.advance(now)
+        assert set(fired) == {key for key, d in pending.items() if d <= now}
+        for key in fired:
+            del pending[key]
+        assert len(w) == len(pending)
+
+def test_deadline_inside_a_tick_fires_at_the_next_boundary():
+    w = TimerWheel(tick_ns=1000, start_ns=0)
+    w.schedule(2500, "a")
+    w.schedule(3000, "b")  # on a boundary: fires exactly then
+    assert w.advance(2999) == []  # floor(2500 / tick) == 2 would have fired "a" 500 ns early
+    assert w.advance(3000) == ["a", "b"]
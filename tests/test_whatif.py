@@ -0,0 +1,76 @@
+import asyncio
+import random
+from decimal import Decimal
+import pytest
+from engine.matching_engine import MatchingEngine
+from engine.models import Order
+
+np = pytest.importorskip("numpy")
+from engine.whatif import BookSimulator
+
+SYM = "BTC-USDT"
+
+def lim(side, qty, px):
+    return Order(symbol=SYM, order_type="limit", side=side, quantity=Decimal(str(qty)), price=Decimal(str(px)))
+
+def test_batch_matches_quote_and_submit_without_touching_the_book():
+    async def scenario():
+        rng = random.Random(2)
+        eng = MatchingEngine()
+        for _ in range(300):
+            await eng.submit(lim("sell", rng.randint(1, 40) / 10, 100 + rng.randint(0, 60) / 4))
+            await eng.submit(lim("buy", rng.randint(1, 40) / 10, 99 - rng.randint(0, 60) / 4))
+        before = eng.snapshot(SYM)
+        sim = BookSimulator(eng)
+        sizes = [rng.randint(1, 4000) / 10 for _ in range(200)]
+        for side in ("buy", "sell"):
+            res = sim.simulate(SYM, side, sizes)
+            for i, qty in enumerate(sizes):
+                q = eng.quote(SYM, side, Decimal(str(qty)))
+                assert res.filled[i] == pytest.approx(float(q["fillable_qty"]))
+                assert res.vwap[i] == pytest.approx(float(q["vwap"]))
+                assert res.worst_price[i] == float(q["worst_price"]) and res.levels[i] == q["levels"]
+        assert eng.snapshot(SYM)["bids"] == before["bids"] and eng.snapshot(SYM)["asks"] == before["asks"]
+        # limit prices cap the sweep; NaN = market; the result agrees with really submitting an IOC
+        res = sim.simulate(SYM, "buy", [5.0, 5.0, 5.0], [99.0, 101.0, float("nan")])
+        assert res.filled[0] == 0 and np.isnan(res.vwap[0]) and res.residual[0] == 5
+        trades, _ = await eng.submit(Order(symbol=SYM, order_type="ioc", side="buy", quantity=Decimal(5), price=Decimal(101)))
+        assert res.filled[1] == pytest.approx(float(sum(t.quantity for t in trades)))
+        assert res.notional[1] == pytest.approx(float(sum(t.quantity * t.price for t in trades)))
+        assert res.slippage_bps[2] > 0
+    asyncio.run(scenario())
+
+def test_side_arrays_are_cached_until_the_side_changes():
+    async def scenario():
+        eng = MatchingEngine()
+        sim = BookSimulator(eng)
+        assert sim.arrays(SYM, "sell") is None
+        r = sim.simulate(SYM, "buy", [1.0]).to_json()
+        assert r["filled"] == [0.0] and r["vwap"] == [None] and r["residual"] == [1.0]
+        await eng.submit(lim("sell", 2, 100))
+        a = sim.arrays(SYM, "sell")
+        await eng.submit(lim("buy", 1, 90))  # other side only
+        assert sim.arrays(SYM, "sell") is a and sim.rebuilds == 1
+        await eng.submit(lim("sell", 1, 101))
+        b = sim.arrays(SYM, "sell")
+        assert b is not a and b.prices.tolist() == [100.0, 101.0] and b.cum_qty.tolist() == [2.0, 3.0]
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("qty, limits, msg", [
+    ([1.0, float("nan")], None, "Invalid quantity"),
+    ([float("inf")], None, "Invalid quantity"),
+    ([-2.0], None, "Invalid quantity"),
+    ([1.0], [float("inf")], "Invalid limit price"),
+    ([1.0, 1.0], [float("nan"), -100.0], "Invalid limit price"),
+    ([1.0, 1.0], [100.0], "limit_prices must match quantities"),
+])
+def test_batch_rejects_non_finite_or_non_positive_inputs(qty, limits, msg):
+    async def scenario():
+        eng = MatchingEngine()
+        sim = BookSimulator(eng)
+        with pytest.raises(ValueError, match=msg):
+            sim.simulate(SYM, "buy", qty, limits)  # empty book: still validated
+        await eng.submit(lim("sell", 2, 100))
+        with pytest.raises(ValueError, match=msg):
+            sim.simulate(SYM, "buy", qty, limits)
+    asyncio.run(scenario())